@@ -0,0 +1,235 @@
+"""Runs the level role sync against the local Mee6 stand-in and a made up server.
+Reports the wall time, the REST calls, the failed requests and the peak memory of every sync.
+Example: python -m benchmarks.level_sync --members 50000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from benchmarks.mee6_server import LeaderboardServer, local_api, make_players
+from cogs.mee6api import Mee6api
+from utils.db import Repositories
+from utils.ids import GuildIDs
+from utils.logger import get_logger
+from utils.roles import RoleRegistry
+from utils.sqlite import Database, setup_db
+
+
+class FakeRole:
+    def __init__(self, role_id: int, default: bool = False) -> None:
+        self.id = role_id
+        self.name = str(role_id)
+        self.default = default
+
+    def is_default(self) -> bool:
+        return self.default
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", member_id: int) -> None:
+        self.guild = guild
+        self.id = member_id
+        self.roles = [guild.default_role]
+
+    async def request(self) -> None:
+        # Just like discord.py, every role that gets added or removed is its own request.
+        self.guild.edits += 1
+        if self.guild.latency:
+            await asyncio.sleep(self.guild.latency)
+
+    async def add_roles(self, *roles: FakeRole, reason: Optional[str] = None) -> None:
+        for role in roles:
+            await self.request()
+            self.roles.append(role)
+
+    async def remove_roles(
+        self, *roles: FakeRole, reason: Optional[str] = None
+    ) -> None:
+        for role in roles:
+            await self.request()
+            self.roles.remove(role)
+
+
+class FakeGuild:
+    """The parts of a server the level sync uses, counting the role edits it makes."""
+
+    def __init__(self, member_ids: range, role_ids: set[int], latency: float) -> None:
+        self.id = GuildIDs.TRAINING_GROUNDS
+        self.latency = latency
+        self.edits = 0
+
+        self.default_role = FakeRole(self.id, default=True)
+        self.roles = {role_id: FakeRole(role_id) for role_id in role_ids}
+        self._members = {
+            member_id: FakeMember(self, member_id) for member_id in member_ids
+        }
+
+    @property
+    def members(self) -> list[FakeMember]:
+        return list(self._members.values())
+
+    def get_member(self, member_id: int) -> Optional[FakeMember]:
+        return self._members.get(member_id)
+
+    def get_role(self, role_id: int) -> Optional[FakeRole]:
+        return self.roles.get(role_id)
+
+
+class FakeBot:
+    def __init__(self, repo: Repositories) -> None:
+        self.repo = repo
+        self.roles = RoleRegistry()
+
+    def get_logger(self, name: str):
+        return get_logger(name)
+
+
+@dataclass
+class SyncResult:
+    __slots__ = (
+        "wall_time",
+        "page_requests",
+        "failed_requests",
+        "role_edits",
+        "peak_memory",
+        "changed",
+    )
+
+    wall_time: float
+    page_requests: int
+    # The page requests the stand-in failed on purpose, they are part of the page requests.
+    failed_requests: int
+    role_edits: int
+    # In bytes, of everything allocated during the sync.
+    peak_memory: int
+    changed: int
+
+    def __str__(self) -> str:
+        return (
+            f"{self.wall_time:8.2f}s | {self.page_requests:5} page request(s) | "
+            f"{self.failed_requests:4} failed | "
+            f"{self.role_edits:6} role edit(s) | {self.peak_memory / 2**20:7.1f} MiB peak | "
+            f"{self.changed} level(s) changed"
+        )
+
+
+async def run_sync(
+    cog: Mee6api, guild: FakeGuild, server: LeaderboardServer, trace: bool = True
+) -> SyncResult:
+    """Runs one sync, and measures it.
+    Failed page requests get tried again by the sync, if a page keeps failing
+    the sync sticks to the levels of the last one, so nothing here raises on them.
+    """
+    requests, errors, edits = server.requests, server.errors, guild.edits
+
+    if trace:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    changes = await cog.sync_level_roles(
+        guild, local_api(server.url, GuildIDs.LEADERBOARD_GUILD)
+    )
+    wall_time = time.perf_counter() - start
+
+    peak = 0
+    if trace:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return SyncResult(
+        wall_time,
+        server.requests - requests,
+        server.errors - errors,
+        guild.edits - edits,
+        peak,
+        len(changes.levels),
+    )
+
+
+async def benchmark(args: argparse.Namespace) -> list[SyncResult]:
+    # Some players on the leaderboard left the server in the meantime.
+    players = make_players(int(args.members * (1 + args.departed)), args.seed)
+    server = LeaderboardServer(
+        players,
+        page_size=args.page_size,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    await server.start()
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        filepath = os.path.join(tempdir, "benchmark.db")
+        await setup_db(filepath)
+        database = Database(filepath)
+        await database.start()
+
+        try:
+            bot = FakeBot(Repositories(database))
+            guild = FakeGuild(
+                range(1, args.members + 1), bot.roles.role_ids, args.edit_latency
+            )
+            cog = Mee6api(bot)
+
+            results = []
+            for run in range(args.runs):
+                # The first run starts from scratch, the ones after that only see a few level ups.
+                if run:
+                    server.level_up(args.level_ups)
+                results.append(await run_sync(cog, guild, server, not args.no_trace))
+        finally:
+            await database.close()
+            await server.close()
+
+    return results
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument(
+        "--departed",
+        type=float,
+        default=0.2,
+        help="Players on the leaderboard that are not in the server, relative to the members.",
+    )
+    parser.add_argument("--runs", type=int, default=2)
+    parser.add_argument(
+        "--level-ups",
+        type=float,
+        default=0.01,
+        help="The part of the players that levels up before every run but the first.",
+    )
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Of every page request, in seconds."
+    )
+    parser.add_argument(
+        "--edit-latency",
+        type=float,
+        default=0.0,
+        help="Of every role that gets added or removed, in seconds.",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--no-trace",
+        action="store_true",
+        help="Skips measuring the memory, which slows down the sync quite a bit.",
+    )
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    for number, result in enumerate(asyncio.run(benchmark(arguments)), start=1):
+        print(f"Sync #{number}: {result}")
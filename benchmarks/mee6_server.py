@@ -0,0 +1,167 @@
+"""A local stand-in for the leaderboard endpoint of the Mee6 API, serving made up players.
+Run it on its own with: python -m benchmarks.mee6_server --players 50000
+"""
+
+import argparse
+import asyncio
+import random
+from typing import Optional
+
+from aiohttp import web
+from mee6_py_api import API
+from mee6_py_api.plugins.levels import Levels
+
+# The amount of players on a page, the same as on the real leaderboard.
+PAGE_SIZE = 100
+
+
+def make_players(
+    count: int, seed: Optional[int] = None, max_level: int = 150
+) -> list[dict]:
+    """Makes up the leaderboard entries of a server, sorted by XP like the real leaderboard.
+    Most players are a low level, only a few of them make it far, like on a real server.
+    """
+    rng = random.Random(seed)
+    players = []
+
+    for user_id in range(1, count + 1):
+        level = min(int(rng.expovariate(1 / 8)), max_level)
+        players.append(
+            {
+                "id": str(user_id),
+                "username": f"Player {user_id}",
+                "level": level,
+                # Enough XP for the level, and some of the way to the next one.
+                "xp": 5 * level**2 + 50 * level + rng.randrange(100),
+            }
+        )
+
+    players.sort(key=lambda player: player["xp"], reverse=True)
+    return players
+
+
+class LeaderboardServer:
+    """Serves the leaderboard pages over HTTP on localhost.
+    Every request can be slowed down by a fixed latency, and fail at random with an error status.
+    """
+
+    def __init__(
+        self,
+        players: list[dict],
+        page_size: int = PAGE_SIZE,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.players = players
+        self.page_size = page_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+
+        # The amount of requests we got, and how many of them we failed on purpose.
+        self.requests = 0
+        self.errors = 0
+
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def level_up(self, fraction: float) -> int:
+        """Gives a random part of the players a level, like between two syncs.
+        Returns the amount of players that levelled up.
+        """
+        levelled = self.rng.sample(self.players, int(len(self.players) * fraction))
+
+        for player in levelled:
+            player["level"] += 1
+            player["xp"] = 5 * player["level"] ** 2 + 50 * player["level"]
+
+        self.players.sort(key=lambda player: player["xp"], reverse=True)
+        return len(levelled)
+
+    async def leaderboard(self, request: web.Request) -> web.Response:
+        self.requests += 1
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response(
+                {"error": {"message": "Made up error"}}, status=self.error_status
+            )
+
+        page = int(request.query.get("page", 0))
+        first = page * self.page_size
+        last = first + self.page_size
+
+        return web.json_response({"page": page, "players": self.players[first:last]})
+
+    async def start(self, port: int = 0) -> str:
+        """Starts the server, on a free port unless you pick one.
+        Returns the base URL, to point the Mee6 API at.
+        """
+        app = web.Application()
+        app.router.add_get(
+            "/api/plugins/levels/leaderboard/{guild_id}", self.leaderboard
+        )
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/api/"
+        return self.url
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+def local_api(url: str, guild_id: int) -> API:
+    """Gets you a Mee6 API client that talks to the stand-in instead."""
+    api = API(guild_id)
+    api.base_url = url
+    # The levels plugin builds its URL from the base URL right away, so it needs to be made again.
+    api.levels = Levels(api)
+    return api
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = LeaderboardServer(
+        make_players(args.players, args.seed),
+        page_size=args.page_size,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    url = await server.start(args.port)
+    print(f"Serving {args.players} players at {url}, press Ctrl+C to stop.")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--latency", type=float, default=0.0, help="In seconds.")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--port", type=int, default=8080)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
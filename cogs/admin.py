@@ -1,14 +1,13 @@
 import asyncio
-import random
 from typing import Optional, Union
 
-import aiosqlite
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 import utils.check
 import utils.search
+from utils.db.notes import NoteRow
 from utils.ids import AdminVars, GuildIDs, GuildNames
 
 
@@ -495,27 +494,19 @@ class Admin(commands.Cog):
             return
 
         # Getting the stored past user- and nicknames.
-        async with aiosqlite.connect("./db/database.db") as db:
-            usernames = await db.execute_fetchall(
-                """SELECT * FROM usernames WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
-            nicknames = await db.execute_fetchall(
-                """SELECT * FROM nicknames WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
+        usernames, nicknames = await self.bot.repo.names.get_history(user.id)
 
         user_embed = [
-            f"{discord.utils.escape_markdown(name)} - <t:{timestamp}:R>\n"
-            for _, name, timestamp in usernames
+            f"{discord.utils.escape_markdown(username.old_name)} - <t:{username.timestamp}:R>\n"
+            for username in usernames
         ]
 
         nick_embed = []
-        for (_, name, guild_id, timestamp) in nicknames:
-            guild = self.bot.get_guild(guild_id)
+        for nickname in nicknames:
+            guild = self.bot.get_guild(nickname.guild_id)
             guild_name = guild.name if guild else "Unknown Server"
             nick_embed.append(
-                f"{discord.utils.escape_markdown(name)} - <t:{timestamp}:R> ({guild_name})\n"
+                f"{discord.utils.escape_markdown(nickname.old_name)} - <t:{nickname.timestamp}:R> ({guild_name})\n"
             )
 
         # We want the most recent names to show up first.
@@ -577,26 +568,22 @@ class Admin(commands.Cog):
         self, ctx: commands.Context, user: discord.User, *, note: str
     ) -> None:
         """Sets a note on a user visible for the staff team."""
-        note_id = random.randint(1000000, 9999999)
         timestamp = int(discord.utils.utcnow().timestamp())
         # Only getting the first 160 chars, should hopefully be enough.
         # The maximum limit for an embed is 6000 characters,
         # 160 + 80 (For the set by header) * 25 (Max number of embed fields) = 6000.
         note = note[:160]
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """INSERT INTO notes VALUES (:note_id, :user_id, :timestamp, :mod_id, :note)""",
-                {
-                    "note_id": note_id,
-                    "user_id": user.id,
-                    "timestamp": timestamp,
-                    "mod_id": ctx.author.id,
-                    "note": note,
-                },
+        note_id = await self.bot.repo.notes.add(
+            NoteRow(
+                # Gets a free random ID once it is saved.
+                note_id=0,
+                user_id=user.id,
+                timestamp=timestamp,
+                mod_id=ctx.author.id,
+                note=note,
             )
-
-            await db.commit()
+        )
 
         await ctx.send(
             f"Set a new note (ID: `{note_id}`) for {user.mention} to:\n`{note}`"
@@ -608,11 +595,7 @@ class Admin(commands.Cog):
     @utils.check.is_moderator()
     async def modnote_view(self, ctx: commands.Context, user: discord.User) -> None:
         """Views all of the notes of a user."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_notes = await db.execute_fetchall(
-                """SELECT * FROM notes WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
+        user_notes = await self.bot.repo.notes.get_by_user(user.id)
 
         if len(user_notes) == 0:
             await ctx.send("This user does not have any notes set.")
@@ -623,10 +606,10 @@ class Admin(commands.Cog):
         )
 
         # Only getting the last 25, because that is the max number of embed fields.
-        for (note_id, _, timestamp, mod_id, note) in reversed(user_notes[:25]):
+        for note in reversed(user_notes[:25]):
             embed.add_field(
-                name=f"ID: {note_id}",
-                value=f"**Set at: <t:{timestamp}:F> by: <@{mod_id}>\nContent:**\n{note}\n",
+                name=f"ID: {note.note_id}",
+                value=f"**Set at: <t:{note.timestamp}:F> by: <@{note.mod_id}>\nContent:**\n{note.note}\n",
                 inline=False,
             )
 
@@ -644,24 +627,12 @@ class Admin(commands.Cog):
         self, ctx: commands.Context, user: discord.User, note_id: str
     ) -> None:
         """Deletes a moderator note from a user."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_note = await db.execute_fetchall(
-                """SELECT * FROM notes WHERE user_id = :user_id AND note_id = :note_id""",
-                {"user_id": user.id, "note_id": note_id},
-            )
-
-            if len(matching_note) == 0:
-                await ctx.send(
-                    "I could not find any note with this ID. \n"
-                    f"View all of the notes of a user with `{ctx.prefix}modnote view <@user>`"
-                )
-                return
-
-            await db.execute(
-                """DELETE FROM notes WHERE user_id = :user_id AND note_id = :note_id""",
-                {"user_id": user.id, "note_id": note_id},
+        if not await self.bot.repo.notes.delete(user.id, note_id):
+            await ctx.send(
+                "I could not find any note with this ID. \n"
+                f"View all of the notes of a user with `{ctx.prefix}modnote view <@user>`"
             )
-            await db.commit()
+            return
 
         await ctx.send(f"Deleted note ID {note_id}.")
 
@@ -672,13 +643,12 @@ class Admin(commands.Cog):
         if not interaction.namespace.user:
             return []
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_notes = await db.execute_fetchall(
-                """SELECT note_id FROM notes WHERE user_id = :user_id""",
-                {"user_id": interaction.namespace.user.id},
+        note_ids = [
+            str(note_id)
+            for note_id in await self.bot.repo.notes.get_ids(
+                interaction.namespace.user.id
             )
-
-        note_ids = [str(note[0]) for note in user_notes]
+        ]
 
         # We dont really need the fuzzy search here, this is all just numbers.
         choices = [
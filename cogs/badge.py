@@ -1,4 +1,3 @@
-import aiosqlite
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -15,24 +14,6 @@ class Badge(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
-    async def new_profile(self, user: discord.User) -> None:
-        """Creates a new userbadges profile entry, if the user is not found in the database."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_users = await db.execute_fetchall(
-                """SELECT * FROM userbadges WHERE :user_id = user_id""",
-                {"user_id": user.id},
-            )
-
-            if len(matching_users) != 0:
-                return
-
-            await db.execute(
-                """INSERT INTO userbadges VALUES (:user_id, :badges)""",
-                {"user_id": user.id, "badges": ""},
-            )
-
-            await db.commit()
-
     @commands.hybrid_group()
     @app_commands.guilds(*GuildIDs.ALL_GUILDS)
     @app_commands.default_permissions(administrator=True)
@@ -88,31 +69,8 @@ class Badge(commands.Cog):
                 await ctx.send("Please use only valid emojis as badges!")
                 return
 
-        await self.new_profile(user)
-
-        added_badges = []
-
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_badges = await db.execute_fetchall(
-                """SELECT badges FROM userbadges WHERE :user_id = user_id""",
-                {"user_id": user.id},
-            )
-
-            user_badges = user_badges[0][0].split(" ")
-
-            added_badges.extend(
-                badge for badge in badge_list if badge not in user_badges
-            )
-            user_badges = user_badges + added_badges
-
-            user_badges = " ".join(user_badges)
-
-            await db.execute(
-                """UPDATE userbadges SET badges = :badges WHERE user_id = :user_id""",
-                {"badges": user_badges, "user_id": user.id},
-            )
-
-            await db.commit()
+        # This also creates the entry for the user, if needed.
+        added_badges = await self.bot.repo.badges.add_badges(user.id, badge_list)
 
         await ctx.send(f"Added badge(s) {' '.join(added_badges)} to {user.mention}.")
 
@@ -130,37 +88,15 @@ class Badge(commands.Cog):
         # No emoji check here, since the bot could lose access in the meantime.
         # Also it doesnt really work with slash commands anyways.
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_users = await db.execute_fetchall(
-                """SELECT * FROM userbadges WHERE :user_id = user_id""",
-                {"user_id": user.id},
-            )
-
-            if len(matching_users) == 0:
-                await ctx.send("This user did not have any badges.")
-                return
-
-            badges = await db.execute_fetchall(
-                """SELECT badges FROM userbadges WHERE :user_id = user_id""",
-                {"user_id": user.id},
-            )
-
-            badges = badges[0][0].split(" ")
-
-            if badge not in badges:
-                await ctx.send("This user did not have this badge.")
-                return
-
-            badges.remove(badge)
-
-            badges = " ".join(badges)
+        removed = await self.bot.repo.badges.remove_badge(user.id, badge)
 
-            await db.execute(
-                """UPDATE userbadges SET badges = :badges WHERE user_id = :user_id""",
-                {"badges": badges, "user_id": user.id},
-            )
+        if removed is None:
+            await ctx.send("This user did not have any badges.")
+            return
 
-            await db.commit()
+        if not removed:
+            await ctx.send("This user did not have this badge.")
+            return
 
         await ctx.send(f"Removed badge {badge} from {user.mention}.")
 
@@ -171,22 +107,9 @@ class Badge(commands.Cog):
     @utils.check.is_moderator()
     async def badge_clear(self, ctx: commands.Context, user: discord.User) -> None:
         """Removes all badges from a user."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_users = await db.execute_fetchall(
-                """SELECT * FROM userbadges WHERE :user_id = user_id""",
-                {"user_id": user.id},
-            )
-
-            if len(matching_users) == 0:
-                await ctx.send("This user did not have any badges.")
-                return
-
-            await db.execute(
-                """DELETE FROM userbadges WHERE :user_id = user_id""",
-                {"user_id": user.id},
-            )
-
-            await db.commit()
+        if not await self.bot.repo.badges.clear(user.id):
+            await ctx.send("This user did not have any badges.")
+            return
 
         await ctx.send(f"Cleared all badges from {user.mention}.")
 
@@ -216,12 +139,7 @@ class Badge(commands.Cog):
             return
 
         if not info_text:
-            async with aiosqlite.connect("./db/database.db") as db:
-                await db.execute(
-                    """DELETE FROM badgeinfo WHERE badge = :badge""", {"badge": badge}
-                )
-
-                await db.commit()
+            await self.bot.repo.badges.delete_info(badge)
 
             await ctx.send(f"Deleted the info text for {badge}.")
             return
@@ -229,18 +147,7 @@ class Badge(commands.Cog):
         # 1000 characters seems like a good limit.
         info_text = info_text[:1000]
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            # We just delete the entry to make sure that no duplicates sneak in.
-            await db.execute(
-                """DELETE FROM badgeinfo WHERE badge = :badge""", {"badge": badge}
-            )
-
-            await db.execute(
-                """INSERT INTO badgeinfo (badge, info) VALUES (:badge, :info)""",
-                {"badge": badge, "info": info_text},
-            )
-
-            await db.commit()
+        await self.bot.repo.badges.set_info(badge, info_text)
 
         await ctx.send(f"Updated badgeinfo of {badge} to: \n`{info_text}`")
 
@@ -251,26 +158,15 @@ class Badge(commands.Cog):
         """Gets you information about a given badge."""
         match = Match(latinise=True, ignore_case=True, include_partial=True)
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            # Searching for the matching badge, since our badges are mostly animated
-            # this would mean that otherwise only nitro users could search for them.
-            all_badges = await db.execute_fetchall("""SELECT badge FROM badgeinfo""")
-
-            matching_badge = match.get_best_match(
-                badge, [b[0] for b in all_badges], score=40
-            )
-
-            result_badge = await db.execute_fetchall(
-                """SELECT info FROM badgeinfo WHERE badge = :badge""",
-                {"badge": matching_badge},
-            )
+        # Searching for the matching badge, since our badges are mostly animated
+        # this would mean that otherwise only nitro users could search for them.
+        matching_badge = match.get_best_match(
+            badge, await self.bot.repo.badges.get_info_names(), score=40
+        )
 
-            matching_users = await db.execute_fetchall(
-                """SELECT user_id from userbadges WHERE INSTR(badges, :badge) > 0""",
-                {"badge": matching_badge},
-            )
+        badge_info = await self.bot.repo.badges.get_info(matching_badge)
 
-        if len(result_badge) == 0:
+        if badge_info is None:
             await ctx.send(
                 "I could not find a matching badge in the database! Make sure you have the right one."
             )
@@ -292,9 +188,12 @@ class Badge(commands.Cog):
         ):
             embed = discord.Embed(title=f"Badgeinfo of {badge}", colour=0x007377)
 
-        users = [f"<@{user_id[0]}>" for user_id in matching_users]
+        users = [
+            f"<@{user_id}>"
+            for user_id in await self.bot.repo.badges.get_users_with(matching_badge)
+        ]
 
-        embed.add_field(name="Information:", value=result_badge[0][0], inline=False)
+        embed.add_field(name="Information:", value=badge_info, inline=False)
         embed.add_field(
             name=f"Users with this badge ({len(users)}):",
             value=f"{', '.join(users) if users else 'None'}",
@@ -2,7 +2,6 @@ import datetime
 from itertools import cycle
 from zoneinfo import ZoneInfo
 
-import aiosqlite
 import discord
 from discord.ext import commands, tasks
 from stringmatch import Match
@@ -78,7 +77,7 @@ class Events(commands.Cog):
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member) -> None:
-        async with aiosqlite.connect("./db/database.db") as db:
+        async with self.bot.db.read() as db:
             matching_user = await db.execute_fetchall(
                 """SELECT * FROM muted WHERE user_id = :user_id""",
                 {"user_id": member.id},
@@ -92,12 +91,8 @@ class Events(commands.Cog):
             if len(matching_user) != 0:
                 # Getting both the cadet role and the muted role
                 # since you dont really have to accept the rules if you come back muted.
-                muted_role = discord.utils.get(
-                    member.guild.roles, id=TGRoleIDs.MUTED_ROLE
-                )
-                cadet = discord.utils.get(
-                    member.guild.roles, id=TGLevelRoleIDs.RECRUIT_ROLE
-                )
+                muted_role = self.bot.roles.get(member.guild, TGRoleIDs.MUTED_ROLE)
+                cadet = self.bot.roles.get(member.guild, TGLevelRoleIDs.RECRUIT_ROLE)
 
                 await member.add_roles(muted_role)
                 await member.add_roles(cadet)
@@ -115,14 +110,10 @@ class Events(commands.Cog):
         elif member.guild.id == GuildIDs.BATTLEGROUNDS:
             channel = self.bot.get_channel(BGChannelIDs.OFF_TOPIC_CHANNEL)
             rules_channel = self.bot.get_channel(BGChannelIDs.RULES_CHANNEL)
-            traveller = discord.utils.get(
-                member.guild.roles, id=BGRoleIDs.TRAVELLER_ROLE
-            )
+            traveller = self.bot.roles.get(member.guild, BGRoleIDs.TRAVELLER_ROLE)
 
             if len(matching_user) != 0:
-                muted_role = discord.utils.get(
-                    member.guild.roles, id=BGRoleIDs.MUTED_ROLE
-                )
+                muted_role = self.bot.roles.get(member.guild, BGRoleIDs.MUTED_ROLE)
                 await member.add_roles(muted_role)
                 await member.add_roles(traveller)
                 await channel.send(
@@ -153,7 +144,7 @@ class Events(commands.Cog):
         ):
             try:
                 guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
-                vc_role = discord.utils.get(guild.roles, id=TGRoleIDs.VOICE_ROLE)
+                vc_role = self.bot.roles.get(guild, TGRoleIDs.VOICE_ROLE)
                 await member.add_roles(vc_role)
             except discord.HTTPException:
                 pass
@@ -165,7 +156,7 @@ class Events(commands.Cog):
         ):
             try:
                 guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
-                vc_role = discord.utils.get(guild.roles, id=TGRoleIDs.VOICE_ROLE)
+                vc_role = self.bot.roles.get(guild, TGRoleIDs.VOICE_ROLE)
                 await member.remove_roles(vc_role)
             except discord.HTTPException:
                 pass
@@ -174,26 +165,10 @@ class Events(commands.Cog):
     async def on_user_update(self, before: discord.User, after: discord.User) -> None:
         # For tracking the last 5 username updates.
         if before.name != after.name:
-            async with aiosqlite.connect("./db/database.db") as db:
-                await db.execute(
-                    """INSERT INTO usernames VALUES (:user_id, :old_name, :timestamp)""",
-                    {
-                        "user_id": before.id,
-                        "old_name": before.name,
-                        "timestamp": int(discord.utils.utcnow().timestamp()),
-                    },
-                )
-
-                # This will keep only the lastest 5 entries, in order to not flood the db too much.
-                # I think the timestamp + user id will be enough to identify a unique entry,
-                # not sure if you can even change your name twice in 1s, rate limit wise.
-                await db.execute(
-                    """DELETE FROM usernames WHERE user_id = :user_id AND timestamp NOT IN
-                    (SELECT timestamp FROM usernames WHERE user_id = :user_id ORDER BY timestamp DESC LIMIT 5)""",
-                    {"user_id": before.id},
-                )
-
-                await db.commit()
+            # This will keep only the lastest 5 entries.
+            await self.bot.repo.names.add_username(
+                before.id, before.name, int(discord.utils.utcnow().timestamp())
+            )
 
     @commands.Cog.listener()
     async def on_member_update(
@@ -201,24 +176,12 @@ class Events(commands.Cog):
     ) -> None:
         # For tracking the last 5 nickname updates.
         if before.display_name not in [after.display_name, before.name]:
-            async with aiosqlite.connect("./db/database.db") as db:
-                await db.execute(
-                    """INSERT INTO nicknames VALUES (:user_id, :old_name, :guild_id, :timestamp)""",
-                    {
-                        "user_id": before.id,
-                        "old_name": before.display_name,
-                        "guild_id": before.guild.id,
-                        "timestamp": int(discord.utils.utcnow().timestamp()),
-                    },
-                )
-
-                await db.execute(
-                    """DELETE FROM nicknames WHERE user_id = :user_id AND timestamp NOT IN
-                    (SELECT timestamp FROM nicknames WHERE user_id = :user_id ORDER BY timestamp DESC LIMIT 5)""",
-                    {"user_id": before.id},
-                )
-
-                await db.commit()
+            await self.bot.repo.names.add_nickname(
+                before.id,
+                before.display_name,
+                before.guild.id,
+                int(discord.utils.utcnow().timestamp()),
+            )
 
         # For announcing boosts/premium memberships.
         if len(before.roles) < len(after.roles):
@@ -241,9 +204,8 @@ class Events(commands.Cog):
             old_role = next(role for role in before.roles if role not in after.roles)
 
             if old_role.id == TGRoleIDs.BOOSTER_ROLE:
-                for role in TGRoleIDs.COLOUR_ROLES:
+                for removerole in self.bot.roles.group(after.guild, "colour"):
                     try:
-                        removerole = discord.utils.get(after.guild.roles, id=role)
                         if removerole in after.roles:
                             await after.remove_roles(removerole)
                     except discord.HTTPException:
@@ -260,8 +222,8 @@ class Events(commands.Cog):
                 and not after.pending
                 and before.guild.id == GuildIDs.TRAINING_GROUNDS
             ):
-                cadetrole = discord.utils.get(
-                    before.guild.roles, id=TGLevelRoleIDs.RECRUIT_ROLE
+                cadetrole = self.bot.roles.get(
+                    before.guild, TGLevelRoleIDs.RECRUIT_ROLE
                 )
                 await after.add_roles(cadetrole)
         except AttributeError:
@@ -282,11 +244,11 @@ class Events(commands.Cog):
                 command.qualified_name for command in self.bot.walk_commands()
             ]
 
-            async with aiosqlite.connect("./db/database.db") as db:
-                all_macros = await db.execute_fetchall("""SELECT name FROM macros""")
-
             # Appending all macro names to the list to get those too.
-            command_list.extend(m[0] for m in all_macros)
+            if macros_cog := self.bot.get_cog("Macros"):
+                command_list.extend(macros_cog.macros)
+            else:
+                command_list.extend(await self.bot.repo.macros.get_names())
 
             if ctx.invoked_with in command_list:
                 return
@@ -390,12 +352,10 @@ class Events(commands.Cog):
         ):
             guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
             streamer_channel = self.bot.get_channel(TGChannelIDs.STREAM_TEAM)
-            streamer_role = discord.utils.get(guild.roles, id=TGRoleIDs.STREAMER_ROLE)
+            streamer_role = self.bot.roles.get(guild, TGRoleIDs.STREAMER_ROLE)
 
             to_channel = self.bot.get_channel(TGChannelIDs.TOURNAMENT_TEAM)
-            to_role = discord.utils.get(
-                guild.roles, id=TGRoleIDs.TOURNAMENT_OFFICIAL_ROLE
-            )
+            to_role = self.bot.roles.get(guild, TGRoleIDs.TOURNAMENT_OFFICIAL_ROLE)
 
             await streamer_channel.send(
                 f"{streamer_role.mention} Reminder that Smash Overseas begins in 1 hour, who is available to stream?"
@@ -418,12 +378,10 @@ class Events(commands.Cog):
         ):
             guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
             streamer_channel = self.bot.get_channel(TGChannelIDs.STREAM_TEAM)
-            streamer_role = discord.utils.get(guild.roles, id=TGRoleIDs.STREAMER_ROLE)
+            streamer_role = self.bot.roles.get(guild, TGRoleIDs.STREAMER_ROLE)
 
             to_channel = self.bot.get_channel(TGChannelIDs.TOURNAMENT_TEAM)
-            to_role = discord.utils.get(
-                guild.roles, id=TGRoleIDs.TOURNAMENT_OFFICIAL_ROLE
-            )
+            to_role = self.bot.roles.get(guild, TGRoleIDs.TOURNAMENT_OFFICIAL_ROLE)
 
             await streamer_channel.send(
                 f"{streamer_role.mention} Reminder that Trials of Smash begins in 1 hour, who is available to stream?"
@@ -446,8 +404,8 @@ class Events(commands.Cog):
         ):
             guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
             design_channel = self.bot.get_channel(TGChannelIDs.DESIGN_TEAM)
-            design_role = discord.utils.get(guild.roles, id=TGRoleIDs.DESIGN_TEAM_ROLE)
-            trial_role = discord.utils.get(guild.roles, id=TGRoleIDs.TRIAL_DESIGN_ROLE)
+            design_role = self.bot.roles.get(guild, TGRoleIDs.DESIGN_TEAM_ROLE)
+            trial_role = self.bot.roles.get(guild, TGRoleIDs.TRIAL_DESIGN_ROLE)
 
             await design_channel.send(
                 f"{design_role.mention} & {trial_role.mention} Reminder that it is time to get to work on SO/ToS graphics! "
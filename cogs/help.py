@@ -110,11 +110,15 @@ class Responses(discord.ui.Select):
                 description=f"""
 ```{self.prefix}reloadcogs <cogs>``` - Owner only, reloads some or all of the modules of this bot.
 ```{self.prefix}synccommands <guild>``` - Owner only, syncs application commands to one or all guilds.
+```{self.prefix}reloadfilter``` - Owner only, reloads the blacklisted words after the list changed.
+```{self.prefix}dbstats [top]``` - Owner only, lists the database statements that took up the most time.
+```{self.prefix}messagestats``` - Owner only, lists the time every stage of the message pipeline took.
 ```{self.prefix}editrole <property> <role> <value>``` - Edits a role's properties to the given value.
 ```{self.prefix}clearmmpings``` - Clears all matchmaking pings.
 ```{self.prefix}records``` - Shows ban records.
 ```{self.prefix}forcereportmatch <@winner> <@loser>``` - If someone abandons a ranked match.
-```{self.prefix}leaderboard``` - Leaderboards of ranked matchmaking.
+```{self.prefix}leaderboard``` - Leaderboards of ranked matchmaking, you can flip through the pages.
+```{self.prefix}rerate [schedule] [@member] [apply]``` - Calculates the elo of everyone again from the match history, optionally without the matches of a member. Only a preview, unless you set apply.
 ```{self.prefix}rolemenu new <message ID> <emoji> <role>``` - Adds an entry for a role menu.
 ```{self.prefix}rolemenu delete <message ID>``` - Deletes every entry for a Message with a role menu.
 ```{self.prefix}rolemenu modify <message ID> <exclusive> <role(s)>``` - Sets special permissions for a Role menu.
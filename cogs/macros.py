@@ -1,15 +1,19 @@
-import aiosqlite
+from collections import Counter
+
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 
 import utils.check
 import utils.search
 from utils.ids import GuildIDs
+from utils.pipeline import ParsedMessage, StagePriority
 
 
 class MacroModal(discord.ui.Modal, title="Create a new macro"):
-    def __init__(self) -> None:
+    def __init__(self, macros: dict[str, str]) -> None:
+        # The in-memory index of the Macros cog, so the new macro works right away.
+        self.macros = macros
         super().__init__()
 
     name = discord.ui.TextInput(
@@ -35,36 +39,23 @@ class MacroModal(discord.ui.Modal, title="Create a new macro"):
         for command in interaction.client.commands:
             command_list.extend(iter(command.aliases))
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_macro = await db.execute_fetchall(
-                """SELECT name FROM macros WHERE name = :name""", {"name": macro_name}
+        # Basic checks for invalid stuff.
+        if macro_name in command_list:
+            await interaction.response.send_message(
+                "This name is already being used for a command! Please use a different one."
             )
+            return
 
-            # Basic checks for invalid stuff.
-            if len(matching_macro) != 0:
-                await interaction.response.send_message(
-                    "This name was already taken. "
-                    "If you want to update this macro please delete it first and then create it again."
-                )
-                return
-
-            if macro_name in command_list:
-                await interaction.response.send_message(
-                    "This name is already being used for a command! Please use a different one."
-                )
-                return
-
-            await db.execute(
-                """INSERT INTO macros VALUES (:name, :payload, :uses, :author)""",
-                {
-                    "name": macro_name,
-                    "payload": self.payload.value,
-                    "uses": 0,
-                    "author": interaction.user.id,
-                },
+        if not await interaction.client.repo.macros.add(
+            macro_name, self.payload.value, interaction.user.id
+        ):
+            await interaction.response.send_message(
+                "This name was already taken. "
+                "If you want to update this macro please delete it first and then create it again."
             )
+            return
 
-            await db.commit()
+        self.macros[macro_name] = self.payload.value
 
         await interaction.response.send_message(
             f"New macro `{macro_name}` was created.\nOutput:\n`{self.payload.value}`"
@@ -72,8 +63,9 @@ class MacroModal(discord.ui.Modal, title="Create a new macro"):
 
 
 class MacroButton(discord.ui.View):
-    def __init__(self, author: discord.User) -> None:
+    def __init__(self, author: discord.User, macros: dict[str, str]) -> None:
         self.author = author
+        self.macros = macros
         super().__init__(timeout=60)
 
     @discord.ui.button(
@@ -82,7 +74,7 @@ class MacroButton(discord.ui.View):
     async def macro_button(
         self, interaction: discord.Interaction, button: discord.Button
     ):
-        await interaction.response.send_modal(MacroModal())
+        await interaction.response.send_modal(MacroModal(self.macros))
         self.stop()
 
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
@@ -96,34 +88,62 @@ class Macros(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        # Every macro name with its payload, so we dont have to ask the database on every message.
+        self.macros: dict[str, str] = {}
+        # The uses since the last time they were saved.
+        self.pending_uses: Counter[str] = Counter()
+
+    async def cog_load(self) -> None:
+        self.macros = await self.bot.repo.macros.get_payloads()
+        self.save_uses.start()
+        self.bot.message_pipeline.register(
+            "macros", self.dispatch_macro, StagePriority.MACROS
+        )
+
+    async def cog_unload(self) -> None:
+        self.bot.message_pipeline.unregister("macros")
+        self.save_uses.cancel()
+        await self.flush_uses()
+
+    async def flush_uses(self) -> None:
+        """Saves the uses counted since the last time, in one transaction."""
+        if not self.pending_uses:
+            return
+
+        uses = dict(self.pending_uses)
+        self.pending_uses.clear()
+
+        try:
+            await self.bot.repo.macros.add_uses(uses)
+        except Exception:
+            # Keeping them for the next try, together with the ones counted in the meantime.
+            # Unless the macro got deleted in the meantime.
+            self.pending_uses.update(
+                {name: count for name, count in uses.items() if name in self.macros}
+            )
+            # Not raising the error, that would stop the loop for good.
+            logger = self.bot.get_logger("bot.macros")
+            logger.exception("Could not save the macro uses, trying again later.")
+
+    async def dispatch_macro(self, parsed: ParsedMessage) -> bool:
+        """Our stage of the message pipeline, listens for the macros.
+        Returns True if the message was a macro.
+        """
+        if not parsed.has_prefix:
+            return False
+
+        if (payload := self.macros.get(parsed.first_token)) is None:
+            return False
 
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        # Listens for the macros.
-        async with aiosqlite.connect("./db/database.db") as db:
-            macro_names = await db.execute_fetchall("""SELECT name FROM macros""")
-
-            for name in macro_names:
-                # It returns tuples, so we need the first (and only) entry
-                name = name[0]
-                if (
-                    len(message.content.split()) == 1
-                    and message.content == (f"{self.bot.main_prefix}{name}")
-                    or message.content.startswith(f"{self.bot.main_prefix}{name} ")
-                ):
-                    matching_macro = await db.execute_fetchall(
-                        """SELECT payload FROM macros WHERE name = :name""",
-                        {"name": name},
-                    )
-                    payload = matching_macro[0][0]
-                    await message.channel.send(payload)
-
-                    self.bot.commands_ran += 1
-                    await db.execute(
-                        """UPDATE macros SET uses = uses + 1 WHERE name = :name""",
-                        {"name": name},
-                    )
-                    await db.commit()
+        await parsed.message.channel.send(payload)
+
+        self.bot.commands_ran += 1
+        self.pending_uses[parsed.first_token] += 1
+        return True
+
+    @tasks.loop(seconds=60)
+    async def save_uses(self) -> None:
+        await self.flush_uses()
 
     @commands.hybrid_command()
     @app_commands.guilds(*GuildIDs.ALL_GUILDS)
@@ -131,7 +151,7 @@ class Macros(commands.Cog):
     @utils.check.is_moderator()
     async def createmacro(self, ctx: commands.Context) -> None:
         """Creates a new macro with the desired name and payload."""
-        view = MacroButton(ctx.author)
+        view = MacroButton(ctx.author, self.macros)
 
         await ctx.send(view=view)
 
@@ -142,21 +162,13 @@ class Macros(commands.Cog):
     @utils.check.is_moderator()
     async def deletemacro(self, ctx: commands.Context, name: str) -> None:
         """Deletes a macro with the specified name."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            macro_names = await db.execute_fetchall(
-                """SELECT * FROM macros WHERE name = :name""", {"name": name}
-            )
-
-            # If the macro does not exist we want some kind of error message for the user.
-            if len(macro_names) == 0:
-                await ctx.send(f"The macro `{name}` was not found. Please try again.")
-                return
-
-            await db.execute(
-                """DELETE FROM macros WHERE name = :name""", {"name": name}
-            )
+        # If the macro does not exist we want some kind of error message for the user.
+        if not await self.bot.repo.macros.delete(name):
+            await ctx.send(f"The macro `{name}` was not found. Please try again.")
+            return
 
-            await db.commit()
+        self.macros.pop(name, None)
+        self.pending_uses.pop(name, None)
 
         await ctx.send(f"Deleted macro `{name}`")
 
@@ -164,10 +176,7 @@ class Macros(commands.Cog):
     async def deletemacro_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice]:
-        async with aiosqlite.connect("./db/database.db") as db:
-            macros = await db.execute_fetchall("""SELECT name FROM macros""")
-
-        return utils.search.autocomplete_choices(current, [m[0] for m in macros])
+        return utils.search.autocomplete_choices(current, list(self.macros))
 
     @commands.hybrid_command(aliases=["macros", "listmacros", "macrostats"])
     @app_commands.guilds(*GuildIDs.ALL_GUILDS)
@@ -175,36 +184,27 @@ class Macros(commands.Cog):
     async def macro(self, ctx: commands.Context, *, macro: str = None) -> None:
         """Gives you detailed information about a macro, or lists every macro saved."""
         if macro is None:
-            async with aiosqlite.connect("./db/database.db") as db:
-                macro_list = await db.execute_fetchall("""SELECT name FROM macros""")
-
-            # It returns a list of tuples, so we need to extract them.
-            macro_names = [m[0] for m in macro_list]
+            macro_names = list(self.macros)
             await ctx.send(
                 "The registered macros are:\n"
                 f"`{self.bot.main_prefix}{f', {self.bot.main_prefix}'.join(macro_names)}`"
             )
             return
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_macro = await db.execute_fetchall(
-                """SELECT * FROM macros WHERE name = :name""", {"name": macro}
-            )
+        matching_macro = await self.bot.repo.macros.get(macro)
 
         # If the macro does not exist we want some kind of error message for the user.
-        if len(matching_macro) == 0:
+        if matching_macro is None:
             await ctx.send(
                 f"I could not find this macro. List all macros with `{self.bot.main_prefix}macros`."
             )
             return
 
-        name, payload, uses, author_id = matching_macro[0]
-
         embed = discord.Embed(
             title="Macro info",
             color=0x007377,
-            description=f"**Name:** {self.bot.main_prefix}{name}\n**Uses:** {uses}\n"
-            f"**Author:**<@{author_id}>\n**Output:**\n{payload}\n",
+            description=f"**Name:** {self.bot.main_prefix}{matching_macro.name}\n**Uses:** {matching_macro.uses + self.pending_uses[matching_macro.name]}\n"
+            f"**Author:**<@{matching_macro.author}>\n**Output:**\n{matching_macro.payload}\n",
         )
 
         await ctx.send(embed=embed)
@@ -213,10 +213,7 @@ class Macros(commands.Cog):
     async def macro_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice]:
-        async with aiosqlite.connect("./db/database.db") as db:
-            macros = await db.execute_fetchall("""SELECT name FROM macros""")
-
-        return utils.search.autocomplete_choices(current, [m[0] for m in macros])
+        return utils.search.autocomplete_choices(current, list(self.macros))
 
     @createmacro.error
     async def createmacro_error(
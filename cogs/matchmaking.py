@@ -1,11 +1,9 @@
-import asyncio
-import json
-
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 from utils.ids import GuildIDs, TGArenaChannelIDs, TGMatchmakingRoleIDs
+from utils.pings import PING_TTL, MatchmakingPing, format_pings
 
 
 class Matchmaking(commands.Cog):
@@ -14,61 +12,36 @@ class Matchmaking(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
-    def store_ping(self, ctx: commands.Context, mm_type: str, timestamp: float) -> None:
-        """Saves a Matchmaking Ping of any unranked type in the according file."""
-
-        with open(rf"./json/{mm_type}.json", "r", encoding="utf-8") as f:
-            user_pings = json.load(f)
-
-        user_pings[f"{ctx.author.id}"] = {}
-        user_pings[f"{ctx.author.id}"] = {"channel": ctx.channel.id, "time": timestamp}
+    async def cog_load(self) -> None:
+        self.bot.scheduler.register_handler("mm_ping", self.expire_pings)
 
-        with open(rf"./json/{mm_type}.json", "w", encoding="utf-8") as f:
-            json.dump(user_pings, f, indent=4)
+    async def cog_unload(self) -> None:
+        self.bot.scheduler.unregister_handler("mm_ping")
 
-    def delete_ping(self, ctx: commands.Context, mm_type: str) -> None:
-        """Deletes a Matchmaking Ping of any unranked type from the according file."""
-
-        with open(rf"./json/{mm_type}.json", "r", encoding="utf-8") as f:
-            user_pings = json.load(f)
+    def store_ping(self, ctx: commands.Context, mm_type: str, timestamp: float) -> None:
+        """Saves a Matchmaking Ping of any unranked type, and schedules its deletion."""
+        self.bot.mm_pings.add(
+            mm_type, MatchmakingPing(ctx.author.id, ctx.channel.id, timestamp, None)
+        )
+        self.bot.scheduler.schedule(
+            "mm_ping",
+            f"{mm_type}:{ctx.author.id}",
+            timestamp + PING_TTL,
+            {"mm_type": mm_type, "user_id": ctx.author.id, "timestamp": timestamp},
+        )
 
-        try:
-            del user_pings[f"{ctx.message.author.id}"]
-        except KeyError:
-            logger = self.bot.get_logger("bot.mm")
-            logger.warning(
-                f"Tried to delete a {mm_type} ping by {str(ctx.message.author)} but the ping was already deleted."
+    async def expire_pings(self, payloads: list[dict]) -> None:
+        """Deletes the Matchmaking Pings whose 30 Minutes are up, all at once.
+        If a user has pinged again since then, the newer ping stays.
+        """
+        for payload in payloads:
+            self.bot.mm_pings.remove(
+                payload["mm_type"], payload["user_id"], payload["timestamp"]
             )
 
-        with open(rf"./json/{mm_type}.json", "w", encoding="utf-8") as f:
-            json.dump(user_pings, f, indent=4)
-
     def get_recent_pings(self, mm_type: str, timestamp: float) -> str:
-        """Gets a list with every Ping saved.
-        As long as the ping is not older than 30 Minutes.
-        """
-
-        with open(rf"./json/{mm_type}.json", "r", encoding="utf-8") as f:
-            user_pings = json.load(f)
-
-        list_of_searches = []
-
-        for ping in user_pings:
-            ping_channel = user_pings[f"{ping}"]["channel"]
-            ping_timestamp = user_pings[f"{ping}"]["time"]
-
-            difference = timestamp - ping_timestamp
-
-            minutes = round(difference / 60)
-
-            if minutes < 31:
-                list_of_searches.append(
-                    f"<@!{ping}>, in <#{ping_channel}>, {minutes} minutes ago\n"
-                )
-
-        list_of_searches.reverse()
-
-        return "".join(list_of_searches) or "Looks like no one has pinged recently :("
+        """Gets a list with every Ping of the last 30 Minutes, newest first."""
+        return format_pings(self.bot.mm_pings.recent(mm_type, timestamp), timestamp)
 
     @commands.hybrid_command(
         aliases=["matchmaking", "matchmakingsingles", "mmsingles", "Singles"]
@@ -113,10 +86,6 @@ class Matchmaking(commands.Cog):
                 f"Hi there, {ctx.author.mention}! Please use this thread for communicating with your opponent."
             )
 
-            await asyncio.sleep(1800)
-
-            self.delete_ping(ctx, "singles")
-
         elif ctx.message.channel.id in TGArenaChannelIDs.PRIVATE_ARENAS:
             searches = self.get_recent_pings("singles", timestamp)
 
@@ -211,10 +180,6 @@ class Matchmaking(commands.Cog):
                 f"Hi there, {ctx.author.mention}! Please use this thread for communicating with your opponents."
             )
 
-            await asyncio.sleep(1800)
-
-            self.delete_ping(ctx, "doubles")
-
         elif ctx.message.channel.id in TGArenaChannelIDs.PRIVATE_ARENAS:
             searches = self.get_recent_pings("doubles", timestamp)
 
@@ -316,10 +281,6 @@ class Matchmaking(commands.Cog):
                 f"Hi there, {ctx.author.mention}! Please use this thread for communicating with your opponent."
             )
 
-            await asyncio.sleep(1800)
-
-            self.delete_ping(ctx, "funnies")
-
         elif ctx.message.channel.id in TGArenaChannelIDs.PRIVATE_ARENAS:
             searches = self.get_recent_pings("funnies", timestamp)
 
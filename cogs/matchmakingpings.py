@@ -1,13 +1,10 @@
-import json
-
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 import utils.check
-from cogs.matchmaking import Matchmaking
-from cogs.ranking import Ranking
 from utils.ids import GuildIDs, TGArenaChannelIDs
+from utils.pings import format_pings
 
 
 class Pings(discord.ui.Select):
@@ -51,7 +48,9 @@ class Pings(discord.ui.Select):
         if self.values[0] == "Singles":
             timestamp = discord.utils.utcnow().timestamp()
 
-            searches = Matchmaking.get_recent_pings(self, "singles", timestamp)
+            searches = format_pings(
+                interaction.client.mm_pings.recent("singles", timestamp), timestamp
+            )
 
             singles_embed = discord.Embed(
                 title="Singles pings in the last 30 Minutes:",
@@ -64,7 +63,9 @@ class Pings(discord.ui.Select):
         elif self.values[0] == "Doubles":
             timestamp = discord.utils.utcnow().timestamp()
 
-            searches = Matchmaking.get_recent_pings(self, "doubles", timestamp)
+            searches = format_pings(
+                interaction.client.mm_pings.recent("doubles", timestamp), timestamp
+            )
 
             doubles_embed = discord.Embed(
                 title="Doubles pings in the last 30 Minutes:",
@@ -77,7 +78,9 @@ class Pings(discord.ui.Select):
         elif self.values[0] == "Funnies":
             timestamp = discord.utils.utcnow().timestamp()
 
-            searches = Matchmaking.get_recent_pings(self, "funnies", timestamp)
+            searches = format_pings(
+                interaction.client.mm_pings.recent("funnies", timestamp), timestamp
+            )
 
             funnies_embed = discord.Embed(
                 title="Funnies pings in the last 30 Minutes:",
@@ -90,7 +93,9 @@ class Pings(discord.ui.Select):
         elif self.values[0] == "Ranked":
             timestamp = discord.utils.utcnow().timestamp()
 
-            searches = Ranking.get_recent_ranked_pings(self, timestamp)
+            searches = format_pings(
+                interaction.client.mm_pings.recent("ranked", timestamp), timestamp
+            )
 
             ranked_embed = discord.Embed(
                 title="Ranked pings in the last 30 Minutes:",
@@ -118,9 +123,6 @@ class Matchmakingpings(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
-        # Clears the Matchmaking Pings on Startup.
-        self.clear_mmrequests()
-
     @commands.Cog.listener()
     async def on_thread_update(
         self, before: discord.Thread, after: discord.Thread
@@ -161,69 +163,11 @@ class Matchmakingpings(commands.Cog):
             raise error
 
     def clear_mmrequests(self) -> None:
-        """Clears every Matchmaking Ping in the Singles, Doubles, Funnies and Ranked Files."""
-        logger = self.bot.get_logger("bot.mm")
-        logger.info("Starting to delete pings in the matchmaking files...")
-
-        # Deleting singles file.
-
-        with open(r"./json/singles.json", "r", encoding="utf-8") as f:
-            singles = json.load(f)
-
-        singles_requests = list(singles)
-
-        for user in singles_requests:
-            del singles[user]
-
-        with open(r"./json/singles.json", "w", encoding="utf-8") as f:
-            json.dump(singles, f, indent=4)
-
-        logger.info("Singles file cleared!")
-
-        # Deleting doubles file.
-
-        with open(r"./json/doubles.json", "r", encoding="utf-8") as f:
-            doubles = json.load(f)
+        """Clears every Matchmaking Ping of the Singles, Doubles, Funnies and Ranked types."""
+        self.bot.mm_pings.clear()
 
-        doubles_requests = list(doubles)
-
-        for user in doubles_requests:
-            del doubles[user]
-
-        with open(r"./json/doubles.json", "w", encoding="utf-8") as f:
-            json.dump(doubles, f, indent=4)
-
-        logger.info("Doubles file cleared!")
-
-        # Deleting funnies file.
-
-        with open(r"./json/funnies.json", "r", encoding="utf-8") as f:
-            funnies = json.load(f)
-
-        funnies_requests = list(funnies)
-
-        for user in funnies_requests:
-            del funnies[user]
-
-        with open(r"./json/funnies.json", "w", encoding="utf-8") as f:
-            json.dump(funnies, f, indent=4)
-
-        logger.info("Funnies file cleared!")
-
-        # Deleting ranked file.
-
-        with open(r"./json/rankedpings.json", "r", encoding="utf-8") as f:
-            ranked = json.load(f)
-
-        ranked_requests = list(ranked)
-
-        for user in ranked_requests:
-            del ranked[user]
-
-        with open(r"./json/rankedpings.json", "w", encoding="utf-8") as f:
-            json.dump(ranked, f, indent=4)
-
-        logger.info("Ranked file cleared!")
+        logger = self.bot.get_logger("bot.mm")
+        logger.info("Cleared the matchmaking pings!")
 
 
 async def setup(bot) -> None:
@@ -1,11 +1,12 @@
-from math import ceil
-
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
 from mee6_py_api import API
 
-from utils.ids import GuildIDs, GuildNames, TGLevelRoleIDs
+from utils.ids import GuildIDs, GuildNames
+from utils.levels import PAGE_ERRORS, LevelChanges, diff_levels, fetch_levels
+from utils.roles import update_roles
+from utils.tiers import TieredRoles, load_tier_tables
 
 mee6API = API(GuildIDs.LEADERBOARD_GUILD)
 
@@ -17,10 +18,13 @@ class Mee6api(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        # The level role of every level range, the ranges are in json/tiers.json.
+        self.level_tiers = TieredRoles(bot.roles, "level", load_tier_tables()["level"])
 
+    async def cog_load(self) -> None:
         self.update_roles.start()
 
-    def cog_unload(self) -> None:
+    async def cog_unload(self) -> None:
         self.update_roles.cancel()
 
     async def update_level_role(
@@ -29,46 +33,19 @@ class Mee6api(commands.Cog):
         """Assigns you a new role depending on your level and removes all of the other ones.
         Returns the new role.
         """
-        rolegiven = None
-
-        defaultrole = discord.utils.get(guild.roles, id=TGLevelRoleIDs.RECRUIT_ROLE)
-        level10 = discord.utils.get(guild.roles, id=TGLevelRoleIDs.LEVEL_10_ROLE)
-        level25 = discord.utils.get(guild.roles, id=TGLevelRoleIDs.LEVEL_25_ROLE)
-        level50 = discord.utils.get(guild.roles, id=TGLevelRoleIDs.LEVEL_50_ROLE)
-        level75 = discord.utils.get(guild.roles, id=TGLevelRoleIDs.LEVEL_75_ROLE)
-        level100 = discord.utils.get(guild.roles, id=TGLevelRoleIDs.LEVEL_100_ROLE)
-
-        levelroles = [defaultrole, level10, level25, level50, level75, level100]
-
-        async def assign_level_role(assign_role: discord.Role) -> discord.Role:
-            """Removes every other level role and assigns the correct one."""
+        tier = self.level_tiers.table.tier(level)
 
-            roles_to_remove = [role for role in levelroles if role is not assign_role]
-            await member.remove_roles(*roles_to_remove)
-            await member.add_roles(assign_role)
-            return assign_role
+        # Below level 10 you just keep the recruit role.
+        if tier == 0:
+            return None
 
-        if level >= 100:
-            if level100 not in member.roles:
-                rolegiven = await assign_level_role(level100)
+        if self.level_tiers.member_tier(member) == tier:
+            return None
 
-        elif level >= 75:
-            if level75 not in member.roles:
-                rolegiven = await assign_level_role(level75)
+        role = self.level_tiers.role(guild, level)
 
-        elif level >= 50:
-            if level50 not in member.roles:
-                rolegiven = await assign_level_role(level50)
-
-        elif level >= 25:
-            if level25 not in member.roles:
-                rolegiven = await assign_level_role(level25)
-
-        elif level >= 10:
-            if level10 not in member.roles:
-                rolegiven = await assign_level_role(level10)
-
-        return rolegiven
+        await update_roles(member, add=[role], remove=self.level_tiers.role_ids)
+        return role
 
     @commands.hybrid_command(
         aliases=["updatelvl", "updaterank"], cooldown_after_parsing=True
@@ -104,6 +81,7 @@ class Mee6api(commands.Cog):
         userlevel = await mee6API.levels.get_user_level(member.id, dont_use_cache=True)
 
         rolegiven = await self.update_level_role(member, userlevel, ctx.guild)
+        await self.bot.repo.levels.save({member.id: userlevel})
 
         if rolegiven is None:
             await botmessage.edit(
@@ -140,35 +118,69 @@ class Mee6api(commands.Cog):
         else:
             raise error
 
+    async def sync_level_roles(
+        self, guild: discord.Guild, api: API = mee6API
+    ) -> LevelChanges:
+        """Updates the level roles of the members that moved to a new tier since the last sync,
+        and of the members whose roles do not match their level anymore.
+        Returns the levels that changed.
+        """
+        logger = self.bot.get_logger("bot.level")
+
+        synced = await self.bot.repo.levels.get_all()
+
+        try:
+            levels = await fetch_levels(
+                api.levels.get_leaderboard_page, self.level_tiers.table.thresholds[0]
+            )
+        except PAGE_ERRORS as exc:
+            # With a page missing we cannot tell who changed, so we stick to the levels of the last sync.
+            # The roles that do not match those still get fixed.
+            logger.warning(
+                f"Could not get the whole leaderboard, keeping the levels of the last sync: {exc!r}"
+            )
+            levels = {}
+
+        # The member cache is complete, since we have the members intent.
+        changes = diff_levels(
+            synced,
+            levels,
+            self.level_tiers.table,
+            {
+                guild_member.id: self.level_tiers.member_tier(guild_member)
+                for guild_member in guild.members
+            },
+        )
+
+        for user_id in changes.tier_changes | changes.repaired:
+            member = guild.get_member(user_id)
+            level = changes.levels.get(user_id, synced.get(user_id))
+            try:
+                await self.update_level_role(member, level, guild)
+            except discord.HTTPException as exc:
+                logger.warning(f"Could not update the level role of {member}: {exc}")
+                # Not saving the new level, so we try again next time.
+                changes.levels.pop(user_id, None)
+
+        await self.bot.repo.levels.save(changes.levels)
+        return changes
+
     @tasks.loop(hours=23)
     async def update_roles(self) -> None:
-        """Updates the Level Roles of every User in the Server automatically, every 23 hours.
-        Pretty much the same as the Command above, with a few minor tweaks.
-        """
+        """Updates the Level Roles of every User in the Server automatically, every 23 hours."""
 
         logger = self.bot.get_logger("bot.level")
         logger.info("Starting to update level roles...")
 
-        guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
-
-        all_guild_member_ids = [guild_member.id for guild_member in guild.members]
-
-        # Gets the correct amount of pages.
-        page_number = ceil(len(guild.members) / 100)
-        for i in range(page_number):
-            leaderboard_page = await mee6API.levels.get_leaderboard_page(i)
-            for user in leaderboard_page["players"]:
-                # Need to fetch the member, since get_member is unreliable.
-                # We only do this for members in the server and above level 10 though,
-                # otherwise this would take ages.
-                if int(user["id"]) in all_guild_member_ids and user["level"] >= 10:
-                    # We first try to find the member in the cache, if thats not working we have to fetch it.
-                    # Fetching members is a pretty slow process if you have a lot of members.
-                    if not (member := guild.get_member(user["id"])):
-                        member = await guild.fetch_member(user["id"])
-                    await self.update_level_role(member, user["level"], guild)
-
-        logger.info("Successfully updated level roles!")
+        changes = await self.sync_level_roles(
+            self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
+        )
+
+        logger.info(
+            f"Successfully updated level roles! {len(changes.levels)} level(s) changed, "
+            f"{len(changes.tier_changes)} member(s) moved to a new tier, "
+            f"{len(changes.repaired)} member(s) had their role fixed."
+        )
 
     @update_roles.before_loop
     async def before_update_roles(self) -> None:
@@ -1,20 +1,16 @@
-import re
-import string
-
 import discord
 from discord.ext import commands
 
 from cogs.warn import Warn
 from utils.ids import AdminVars, GuildIDs, TGChannelIDs, TGRoleIDs
-
-with open(r"./files/badwords.txt", encoding="utf-8") as file:
-    file = file.read().split()
+from utils.pipeline import ParsedMessage, StagePriority
+from utils.wordfilter import WordFilter
 
 
 class MessageFilter(commands.Cog):
     """Contains the message filters.
     One is the very simple check for invite links,
-    the other is the bad word filtering using regex,
+    the other is the bad word filtering using the word list,
     the latter then warns the user automatically.
 
     This really is not used anymore, since Discord rolled out an update with
@@ -23,103 +19,124 @@ class MessageFilter(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
-
-    @commands.Cog.listener()
-    async def on_message(self, message: discord.Message) -> None:
-        # Dont want any recursive stuff to happen,
-        # so any messages from tabuu 3.0 wont get checked, just in case.
-        if message.author == self.bot.user:
+        self.word_filter = WordFilter.from_file()
+
+    async def cog_load(self) -> None:
+        # Runs before the macros and commands, so a filtered message never reaches them.
+        self.bot.message_pipeline.register(
+            "filter", self.filter_message, StagePriority.FILTER
+        )
+
+    async def cog_unload(self) -> None:
+        self.bot.message_pipeline.unregister("filter")
+
+    def reload_words(self) -> int:
+        """Reads the badwords.txt file again and rebuilds the filter.
+        Returns the amount of words in the new filter.
+        """
+        self.word_filter = WordFilter.from_file()
+        return len(self.word_filter.words)
+
+    @commands.command(aliases=["reloadbadwords"])
+    @commands.is_owner()
+    async def reloadfilter(self, ctx: commands.Context) -> None:
+        """Reloads the blacklisted words after the badwords.txt file changed.
+        Can only be used by the owner of the bot.
+        """
+        try:
+            words = self.reload_words()
+        except OSError as exc:
+            await ctx.send(f"Could not read the word list, keeping the old one: {exc}")
             return
 
-        # Wont check dm's either.
-        if not message.guild:
-            return
+        await ctx.send(f"Reloaded the word filter with {words} word(s).")
+
+    async def filter_message(self, parsed: ParsedMessage) -> bool:
+        """Our stage of the message pipeline.
+        Returns True if the message got deleted, so that nothing else reacts to it.
+        """
+        message = parsed.message
+        deleted = False
+
+        # Wont check dm's.
+        if parsed.guild_id is None:
+            return False
 
         # Searches for invite links, no need for regex as there are a million ways to disguise invite links anyways.
         # This is just a basic filter which is not designed to stop 100% of invite links coming in
         if (
             (
-                "discord.gg" in message.content
-                or "discordapp.com/invite" in message.content
+                "discord.gg" in parsed.content
+                or "discordapp.com/invite" in parsed.content
             )
-            and message.guild.id == GuildIDs.TRAINING_GROUNDS
+            and parsed.guild_id == GuildIDs.TRAINING_GROUNDS
             and isinstance(message.author, discord.Member)
         ):
-            guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
-            mod_role = discord.utils.get(guild.roles, id=TGRoleIDs.MOD_ROLE)
-            promoter_role = discord.utils.get(guild.roles, id=TGRoleIDs.PROMOTER_ROLE)
             if (
-                mod_role not in message.author.roles
-                and promoter_role not in message.author.roles
-                and message.channel.id not in TGChannelIDs.INVITE_LINK_WHITELIST
+                TGRoleIDs.MOD_ROLE not in parsed.role_ids
+                and TGRoleIDs.PROMOTER_ROLE not in parsed.role_ids
+                and parsed.channel_id not in TGChannelIDs.INVITE_LINK_WHITELIST
             ):
                 await message.delete()
                 await message.channel.send(
                     f"Please don't send invite links here {message.author.mention}"
                 )
-
-        # Searches for bad words using regex.
-        # string.digits+string.whitespace+string.punctuation
-        # add the above for very strict ruling, might end up with false positives.
-        separators = ()
-        # Add/remove these depending on strictness, do +'/'+'-' and so on for urls in the future maybe.
-        excluded = string.ascii_letters + string.digits
+                # Still has to go through the word filter below, the invite alone does not get you warned.
+                deleted = True
 
         # Checks if a message contains one of the words in the badwords.txt file.
-        for word in file:
-            formatted_word = f"[{separators}]*".join(list(word))
-            regex_true = re.compile(rf"{formatted_word}", re.IGNORECASE)
-            regex_false = re.compile(
-                rf"([{excluded}]+{word})|({word}[{excluded}]+)", re.IGNORECASE
-            )
+        # The separators and excluded characters are set in utils/wordfilter.py.
+        if self.word_filter.match(parsed.content) is None:
+            return deleted
 
-            # Checks if a word matches, and then double checks again.
-            if (
-                regex_true.search(message.content) is not None
-                and regex_false.search(message.content) is None
-            ):
+        # Adds the warning.
+        reason = "Automatic warning for using a blacklisted word:\n" + message.content
 
-                # Adds the warning.
-                reason = (
-                    "Automatic warning for using a blacklisted word:\n"
-                    + message.content
-                )
+        if len(reason[1000:]) > 0:
+            reason = f"{reason[:997]}..."
 
-                if len(reason[1000:]) > 0:
-                    reason = f"{reason[:997]}..."
+        await Warn.add_warn(self, message.guild.me, message.author, reason)
+        await message.channel.send(
+            f"{message.author.mention} has been automatically warned for using a blacklisted word!"
+        )
 
-                await Warn.add_warn(self, message.guild.me, message.author, reason)
-                await message.channel.send(
-                    f"{message.author.mention} has been automatically warned for using a blacklisted word!"
+        if not deleted:
+            try:
+                await message.delete()
+            except discord.HTTPException as exc:
+                logger = self.bot.get_logger("bot.autowarn")
+                logger.warning(
+                    f"Tried to delete a message for containing a blacklisted word, but it failed: {exc}"
                 )
 
-                try:
-                    await message.delete()
-                except discord.HTTPException as exc:
-                    logger = self.bot.get_logger("bot.autowarn")
-                    logger.warning(
-                        f"Tried to delete a message for containing a blacklisted word, but it failed: {exc}"
-                    )
-
-                try:
-                    await message.author.send(
-                        f"You have been automatically warned in the {message.guild.name} Server "
-                        "for sending a message containing a blacklisted word.\n"
-                        f"If you would like to discuss your punishment, please contact {AdminVars.GROUNDS_GENERALS}."
-                    )
-                except discord.HTTPException as exc:
-                    logger = self.bot.get_logger("bot.autowarn")
-                    logger.warning(
-                        f"Tried to message automatic warn reason to {str(message.author)}, but it failed: {exc}"
-                    )
-
-                # This function here checks the warn count on each user
-                # and if it reaches a threshold it will mute/kick/ban the user.
-                await Warn.check_warn_count(
-                    self, message.guild, message.channel, message.author
-                )
+        try:
+            await message.author.send(
+                f"You have been automatically warned in the {message.guild.name} Server "
+                "for sending a message containing a blacklisted word.\n"
+                f"If you would like to discuss your punishment, please contact {AdminVars.GROUNDS_GENERALS}."
+            )
+        except discord.HTTPException as exc:
+            logger = self.bot.get_logger("bot.autowarn")
+            logger.warning(
+                f"Tried to message automatic warn reason to {str(message.author)}, but it failed: {exc}"
+            )
 
-                break
+        # This function here checks the warn count on each user
+        # and if it reaches a threshold it will mute/kick/ban the user.
+        await Warn.check_warn_count(
+            self, message.guild, message.channel, message.author
+        )
+
+        return True
+
+    @reloadfilter.error
+    async def reloadfilter_error(
+        self, ctx: commands.Context, error: commands.CommandError
+    ) -> None:
+        if isinstance(error, commands.NotOwner):
+            await ctx.send("You are not the owner of this bot!")
+        else:
+            raise error
 
 
 async def setup(bot) -> None:
@@ -128,7 +128,7 @@ async def report_message(
     """
     guild = interaction.client.get_guild(GuildIDs.TRAINING_GROUNDS)
     modmail_channel = guild.get_channel(TGChannelIDs.MODMAIL_CHANNEL)
-    mod_role = discord.utils.get(guild.roles, id=TGRoleIDs.MOD_ROLE)
+    mod_role = interaction.client.roles.get(guild, TGRoleIDs.MOD_ROLE)
 
     # The code below is more or less copied from logging deleted messages
     if not message.content:
@@ -201,7 +201,7 @@ class Modmail(commands.Cog):
         if str(ctx.channel.type) == "private":
             guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
             modmail_channel = self.bot.get_channel(TGChannelIDs.MODMAIL_CHANNEL)
-            mod_role = discord.utils.get(guild.roles, id=TGRoleIDs.MOD_ROLE)
+            mod_role = self.bot.roles.get(guild, TGRoleIDs.MOD_ROLE)
 
             atm = ""
             if ctx.message.attachments:
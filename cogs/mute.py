@@ -2,7 +2,6 @@ import asyncio
 from datetime import datetime, timedelta
 from typing import Optional
 
-import aiosqlite
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -35,7 +34,7 @@ class Mute(commands.Cog):
         # Checks if the user is already flagged as muted in the file.
         # If not, goes ahead and adds the mute.
         # No reason to have someone in there multiple times.
-        async with aiosqlite.connect("./db/database.db") as db:
+        async with self.bot.db.write() as db:
             matching_user = await db.execute_fetchall(
                 """SELECT * FROM muted WHERE user_id = :user_id""",
                 {"user_id": member.id},
@@ -47,14 +46,10 @@ class Mute(commands.Cog):
                     {"user_id": member.id, "muted": True},
                 )
 
-                await db.commit()
-
         # Tries to add the muted roles in each server.
         for guild_id in GuildIDs.MOD_GUILDS:
             guild = self.bot.get_guild(guild_id)
-            muted_role = discord.utils.get(
-                guild.roles, id=self.get_muted_role(guild_id)
-            )
+            muted_role = self.bot.roles.get(guild, self.get_muted_role(guild_id))
             guild_member = guild.get_member(member.id)
             if muted_role and guild_member:
                 try:
@@ -70,20 +65,16 @@ class Mute(commands.Cog):
         Removes the muted entry from the database
         and tries to remove the role in both servers.
         """
-        async with aiosqlite.connect("./db/database.db") as db:
+        async with self.bot.db.write() as db:
             await db.execute(
                 """DELETE FROM muted WHERE user_id = :user_id""",
                 {"user_id": member.id},
             )
 
-            await db.commit()
-
         # Tries to remove the muted roles in each server.
         for guild_id in GuildIDs.MOD_GUILDS:
             guild = self.bot.get_guild(guild_id)
-            muted_role = discord.utils.get(
-                guild.roles, id=self.get_muted_role(guild_id)
-            )
+            muted_role = self.bot.roles.get(guild, self.get_muted_role(guild_id))
             guild_member = guild.get_member(member.id)
             if muted_role and guild_member:
                 try:
@@ -135,7 +126,7 @@ class Mute(commands.Cog):
     ) -> None:
         """Mutes a member in all servers indefinitely.
         Also tries to DM the member the reason for the mute."""
-        async with aiosqlite.connect("./db/database.db") as db:
+        async with self.bot.db.read() as db:
             matching_user = await db.execute_fetchall(
                 """SELECT * FROM muted WHERE user_id = :user_id""",
                 {"user_id": member.id},
@@ -168,7 +159,7 @@ class Mute(commands.Cog):
     @utils.check.is_moderator()
     async def unmute(self, ctx: commands.Context, member: discord.Member) -> None:
         """Unmutes a member in all servers and tries to notify them via DM."""
-        async with aiosqlite.connect("./db/database.db") as db:
+        async with self.bot.db.read() as db:
             matching_user = await db.execute_fetchall(
                 """SELECT * FROM muted WHERE user_id = :user_id""",
                 {"user_id": member.id},
@@ -221,7 +212,7 @@ class Mute(commands.Cog):
             return
 
         # Now this is basically just "%mute, wait specified time, %unmute" but automated into one command.
-        async with aiosqlite.connect("./db/database.db") as db:
+        async with self.bot.db.read() as db:
             matching_user = await db.execute_fetchall(
                 """SELECT * FROM muted WHERE user_id = :user_id""",
                 {"user_id": member.id},
@@ -250,7 +241,7 @@ class Mute(commands.Cog):
         await asyncio.sleep(seconds)
 
         # Need to refresh the contents of the database.
-        async with aiosqlite.connect("./db/database.db") as db:
+        async with self.bot.db.read() as db:
             matching_user = await db.execute_fetchall(
                 """SELECT * FROM muted WHERE user_id = :user_id""",
                 {"user_id": member.id},
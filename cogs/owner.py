@@ -101,6 +101,67 @@ class Owner(commands.Cog):
 
         await ctx.send(embed=embed)
 
+    @commands.command(aliases=["querystats", "slowqueries"])
+    @commands.is_owner()
+    async def dbstats(self, ctx: commands.Context, top: int = 10) -> None:
+        """Lists the database statements that took up the most time since the bot started.
+        Can only be used by the owner of the bot.
+        """
+        # Embeds can have up to 25 fields, but they also have a 6000 character limit.
+        statements = self.bot.db.stats.top(max(1, min(top, 15)))
+
+        embed = discord.Embed(
+            title=f"Top {len(statements)} statements by total time",
+            colour=discord.Colour.blue(),
+        )
+
+        for i, statement in enumerate(statements, start=1):
+            sql = (
+                statement.sql
+                if len(statement.sql) <= 200
+                else f"{statement.sql[:197]}..."
+            )
+
+            embed.add_field(
+                name=f"#{i} - {round(statement.total_time, 1)}ms total, {statement.calls} call(s)",
+                value=f"p50: {round(statement.percentile(50), 2)}ms | "
+                f"p95: {round(statement.percentile(95), 2)}ms | "
+                f"p99: {round(statement.percentile(99), 2)}ms | "
+                f"max: {round(statement.max_time, 2)}ms\n"
+                f"```sql\n{sql}```",
+                inline=False,
+            )
+
+        if not statements:
+            embed.description = "No statements recorded yet."
+
+        await ctx.send(embed=embed)
+
+    @commands.command(aliases=["pipelinestats", "stagestats"])
+    @commands.is_owner()
+    async def messagestats(self, ctx: commands.Context) -> None:
+        """Lists the time every stage of the message pipeline took since the bot started.
+        Can only be used by the owner of the bot.
+        """
+        pipeline = self.bot.message_pipeline
+
+        embed = discord.Embed(
+            title=f"Message pipeline - {pipeline.messages} message(s)",
+            colour=discord.Colour.blue(),
+        )
+
+        for stage in pipeline.stages:
+            embed.add_field(
+                name=f"{stage.name} (priority {stage.priority})",
+                value=f"{stage.calls} call(s), stopped {stage.stops} message(s)\n"
+                f"avg: {round(stage.average_time, 2)}ms | "
+                f"max: {round(stage.max_time, 2)}ms | "
+                f"total: {round(stage.total_time, 1)}ms",
+                inline=False,
+            )
+
+        await ctx.send(embed=embed)
+
     @reloadcogs.error
     async def reloadcogs_error(
         self, ctx: commands.Context, error: commands.CommandError
@@ -110,6 +171,26 @@ class Owner(commands.Cog):
         else:
             raise error
 
+    @dbstats.error
+    async def dbstats_error(
+        self, ctx: commands.Context, error: commands.CommandError
+    ) -> None:
+        if isinstance(error, commands.NotOwner):
+            await ctx.send("You are not the owner of this bot!")
+        elif isinstance(error, commands.BadArgument):
+            await ctx.send("Please input a valid number of statements.")
+        else:
+            raise error
+
+    @messagestats.error
+    async def messagestats_error(
+        self, ctx: commands.Context, error: commands.CommandError
+    ) -> None:
+        if isinstance(error, commands.NotOwner):
+            await ctx.send("You are not the owner of this bot!")
+        else:
+            raise error
+
     @synccommands.error
     async def synccommands_error(
         self, ctx: commands.Context, error: commands.CommandError
@@ -1,12 +1,12 @@
-import json
+from typing import Union
 
-import aiosqlite
 import discord
 from discord import app_commands
-from discord.ext import commands
-from stringmatch import Match
+from discord.ext import commands, tasks
 
 import utils.check
+from utils.characters import character_registry
+from utils.db.ranking import DEFAULT_ELO
 from utils.ids import Emojis, GuildIDs
 
 
@@ -16,6 +16,19 @@ class Profile(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
+    async def cog_load(self) -> None:
+        self.reload_characters.start()
+
+    async def cog_unload(self) -> None:
+        self.reload_characters.cancel()
+
+    @tasks.loop(minutes=1)
+    async def reload_characters(self) -> None:
+        """Picks up changes to the characters file, without a restart."""
+        if character_registry.reload():
+            logger = self.bot.get_logger("bot.profile")
+            logger.info("Reloaded the characters file.")
+
     def match_character(self, profile_input: str) -> list[str]:
         """Matches the input to one or multiple characters and returns the corresponding emoji.
         Separates the input by commas.
@@ -28,31 +41,9 @@ class Profile(commands.Cog):
                 <:DarkSamus:929068123020202004>,
             ]
         """
-        with open(r"./files/characters.json", "r", encoding="utf-8") as f:
-            characters = json.load(f)
-
-        output_characters = []
-
-        if profile_input is None:
-            return output_characters
-
-        profile_input = profile_input.lower()
-        input_characters = profile_input.split(",")
-
-        for i_char in input_characters:
-            # This strips leading and trailing whitespaces.
-            i_char = i_char.strip()
-
-            for match_char in characters["Characters"]:
-                # 2 characters (pt, aegis) have more than 1 id, so the ids need to be in a list.
-                if (
-                    i_char == match_char["name"]
-                    or i_char in match_char["id"]
-                    or i_char in match_char["aliases"]
-                ) and match_char["emoji"] not in output_characters:
-                    output_characters.append(match_char["emoji"])
-
-        return output_characters
+        return [
+            character.emoji for character in character_registry.match(profile_input)
+        ]
 
     def get_badges(self, user: discord.User) -> list[str]:
         """Gets you all of the badges of a member."""
@@ -76,45 +67,34 @@ class Profile(commands.Cog):
 
         return badges
 
-    async def make_new_profile(self, user: discord.User) -> None:
-        """Creates a new profile for the user, if the user does not already have a profile set up."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_profile = await db.execute_fetchall(
-                """SELECT * FROM profile WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
+    async def update_profile(
+        self, user: discord.User, field: str, value: Union[str, int]
+    ) -> None:
+        """Updates one field of the profile of a user.
+        Creates a new profile first, if the user does not already have a profile set up.
+        """
+        await self.bot.repo.profile.set_field(user.id, str(user), field, value)
 
-            if len(matching_profile) != 0:
-                return
-
-            await db.execute(
-                """INSERT INTO profile VALUES (:user_id, :tag, :region, :mains, :secondaries, :pockets, :note, :colour)""",
-                {
-                    "user_id": user.id,
-                    "tag": f"{str(user)}",
-                    "region": "",
-                    "mains": "",
-                    "secondaries": "",
-                    "pockets": "",
-                    "note": "",
-                    "colour": 0,
-                },
-            )
+    async def get_player_names(self, user_ids: list[int]) -> list[str]:
+        """Gets you the escaped names of the users."""
+        names = []
+
+        for user_id in user_ids:
+            # First we see if the user is in the cache.
+            user = self.bot.get_user(user_id)
+            # If not we have to fetch the user, this can take some time.
+            if not user:
+                user = await self.bot.fetch_user(user_id)
+            names.append(discord.utils.escape_markdown(str(user)))
 
-            await db.commit()
+        return names
 
     def character_autocomplete(self, current: str) -> list[app_commands.Choice]:
         """Autocompletion for the Smash characters.
         We are using this for matching mains, secondaries and pockets.
         """
-        with open(r"./files/characters.json", "r", encoding="utf-8") as f:
-            characters = json.load(f)
-
         existing_chars = None
         choices = []
-        character_names = [
-            character["name"].title() for character in characters["Characters"]
-        ]
 
         # We only wanna match the current char, so we split the input.
         if "," in current:
@@ -125,11 +105,7 @@ class Profile(commands.Cog):
 
         # We dont use the autocomplete function here from utils.search,
         # cause we need some customisation here.
-        match = Match(ignore_case=True, include_partial=True, latinise=True)
-
-        match_list = match.get_best_matches(
-            current_char, character_names, score=40, limit=25
-        )
+        match_list = character_registry.autocomplete(current_char)
 
         # We append the existing chars to the current choices,
         # so you can select multiple characters at once and the autocomplete still works.
@@ -158,43 +134,38 @@ class Profile(commands.Cog):
         if user is None:
             user = ctx.author
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_user = await db.execute_fetchall(
-                """SELECT * FROM profile WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
-            matching_user_elo = await db.execute_fetchall(
-                """SELECT elo FROM ranking WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
+        matching_user = await self.bot.repo.profile.get_with_elo(user.id)
 
-        if len(matching_user) == 0:
+        if matching_user is None:
             await ctx.send("This user did not set up their profile yet.")
             return
 
-        (_, tag, region, mains, secondaries, pockets, note, colour) = matching_user[0]
+        profile, elo = matching_user
 
-        elo = 1000 if len(matching_user_elo) == 0 else matching_user_elo[0][0]
+        if elo is None:
+            elo = DEFAULT_ELO
         badges = " ".join(self.get_badges(user))
 
-        embed = discord.Embed(title=f"Smash profile of {str(user)}", colour=colour)
+        embed = discord.Embed(
+            title=f"Smash profile of {str(user)}", colour=profile.colour
+        )
         embed.set_thumbnail(url=user.display_avatar.url)
 
-        embed.add_field(name="Tag:", value=tag, inline=True)
+        embed.add_field(name="Tag:", value=profile.tag, inline=True)
 
-        if region:
-            embed.add_field(name="Region:", value=region, inline=True)
+        if profile.region:
+            embed.add_field(name="Region:", value=profile.region, inline=True)
 
         embed.add_field(name="Elo score:", value=elo, inline=True)
 
-        if mains:
-            embed.add_field(name="Mains:", value=mains, inline=True)
-        if secondaries:
-            embed.add_field(name="Secondaries:", value=secondaries, inline=True)
-        if pockets:
-            embed.add_field(name="Pockets:", value=pockets, inline=True)
-        if note:
-            embed.add_field(name="Note:", value=note, inline=True)
+        if profile.mains:
+            embed.add_field(name="Mains:", value=profile.mains, inline=True)
+        if profile.secondaries:
+            embed.add_field(name="Secondaries:", value=profile.secondaries, inline=True)
+        if profile.pockets:
+            embed.add_field(name="Pockets:", value=profile.pockets, inline=True)
+        if profile.note:
+            embed.add_field(name="Note:", value=profile.note, inline=True)
         if badges:
             embed.add_field(name="Emblems:", value=badges, inline=True)
 
@@ -204,22 +175,9 @@ class Profile(commands.Cog):
     @app_commands.guilds(*GuildIDs.ALL_GUILDS)
     async def deleteprofile(self, ctx: commands.Context) -> None:
         """Deletes your profile."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_user = await db.execute_fetchall(
-                """SELECT * FROM profile WHERE user_id = :user_id""",
-                {"user_id": ctx.author.id},
-            )
-
-            if len(matching_user) == 0:
-                await ctx.send("You have no profile saved.")
-                return
-
-            await db.execute(
-                """DELETE FROM profile WHERE user_id = :user_id""",
-                {"user_id": ctx.author.id},
-            )
-
-            await db.commit()
+        if not await self.bot.repo.profile.delete(ctx.author.id):
+            await ctx.send("You have no profile saved.")
+            return
 
         await ctx.send(f"Successfully deleted your profile, {ctx.author.mention}.")
 
@@ -231,22 +189,9 @@ class Profile(commands.Cog):
         self, ctx: commands.Context, user: discord.User
     ) -> None:
         """Deletes the profile of another user, just in case."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_user = await db.execute_fetchall(
-                """SELECT * FROM profile WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
-
-            if len(matching_user) == 0:
-                await ctx.send("This user has no profile saved.")
-                return
-
-            await db.execute(
-                """DELETE FROM profile WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
-
-            await db.commit()
+        if not await self.bot.repo.profile.delete(user.id):
+            await ctx.send("This user has no profile saved.")
+            return
 
         await ctx.send(
             f"{ctx.author.mention}, I have successfully deleted the profile of {discord.utils.escape_markdown(str(user))}."
@@ -263,15 +208,7 @@ class Profile(commands.Cog):
         # Only getting the first 7 chars, think thats a very generous cutoff.
         chars = " ".join(self.match_character(mains)[:7])
 
-        await self.make_new_profile(ctx.author)
-
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """UPDATE profile SET mains = :chars WHERE user_id = :user_id""",
-                {"chars": chars, "user_id": ctx.author.id},
-            )
-
-            await db.commit()
+        await self.update_profile(ctx.author, "mains", chars)
 
         if mains is None:
             await ctx.send(f"{ctx.author.mention}, I have deleted your mains.")
@@ -298,15 +235,7 @@ class Profile(commands.Cog):
         """
         chars = " ".join(self.match_character(secondaries)[:7])
 
-        await self.make_new_profile(ctx.author)
-
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """UPDATE profile SET secondaries = :chars WHERE user_id = :user_id""",
-                {"chars": chars, "user_id": ctx.author.id},
-            )
-
-            await db.commit()
+        await self.update_profile(ctx.author, "secondaries", chars)
 
         if secondaries is None:
             await ctx.send(f"{ctx.author.mention}, I have deleted your secondaries.")
@@ -335,15 +264,7 @@ class Profile(commands.Cog):
         # There could be a max of around 25 per embed field however.
         chars = " ".join(self.match_character(pockets)[:10])
 
-        await self.make_new_profile(ctx.author)
-
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """UPDATE profile SET pockets = :chars WHERE user_id = :user_id""",
-                {"chars": chars, "user_id": ctx.author.id},
-            )
-
-            await db.commit()
+        await self.update_profile(ctx.author, "pockets", chars)
 
         if pockets is None:
             await ctx.send(f"{ctx.author.mention}, I have deleted your pockets.")
@@ -370,15 +291,7 @@ class Profile(commands.Cog):
         # Think 30 chars for a tag is very fair.
         tag = tag[:30]
 
-        await self.make_new_profile(ctx.author)
-
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """UPDATE profile SET tag = :tag WHERE user_id = :user_id""",
-                {"tag": tag, "user_id": ctx.author.id},
-            )
-
-            await db.commit()
+        await self.update_profile(ctx.author, "tag", tag)
 
         await ctx.send(
             f"{ctx.author.mention}, I have set your tag to: `{discord.utils.remove_markdown(tag)}`"
@@ -486,15 +399,7 @@ class Profile(commands.Cog):
             )
             return
 
-        await self.make_new_profile(ctx.author)
-
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """UPDATE profile SET region = :region WHERE user_id = :user_id""",
-                {"region": region, "user_id": ctx.author.id},
-            )
-
-            await db.commit()
+        await self.update_profile(ctx.author, "region", region)
 
         if region == "":
             await ctx.send(f"{ctx.author.mention}, I have deleted your region.")
@@ -531,15 +436,7 @@ class Profile(commands.Cog):
         # For a note, 150 chars seem enough to me.
         note = note[:150]
 
-        await self.make_new_profile(ctx.author)
-
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """UPDATE profile SET note = :note WHERE user_id = :user_id""",
-                {"note": note, "user_id": ctx.author.id},
-            )
-
-            await db.commit()
+        await self.update_profile(ctx.author, "note", note)
 
         if note == "":
             await ctx.send(f"{ctx.author.mention}, I have deleted your note.")
@@ -574,15 +471,7 @@ class Profile(commands.Cog):
             )
             return
 
-        await self.make_new_profile(ctx.author)
-
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """UPDATE profile SET colour = :colour WHERE user_id = :user_id""",
-                {"colour": hex_colour, "user_id": ctx.author.id},
-            )
-
-            await db.commit()
+        await self.update_profile(ctx.author, "colour", hex_colour)
 
         await ctx.send(f"{ctx.author.mention}, I have set your colour to: `{colour}`")
 
@@ -603,24 +492,13 @@ class Profile(commands.Cog):
             await ctx.send("Please input a valid character!")
             return
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            # We look for the players that have registered the character in their profile.
-            # We sort it by the length of the mains, which does roughly correlate to the amount of mains.
-            # So that a solo-main will show up near the top.
-            matching_mains = await db.execute_fetchall(
-                """SELECT user_id FROM profile WHERE INSTR(mains, :character) ORDER BY length(mains)""",
-                {"character": matching_character},
-            )
-
-            matching_secondaries = await db.execute_fetchall(
-                """SELECT user_id FROM profile WHERE INSTR(secondaries, :character) ORDER BY length(secondaries)""",
-                {"character": matching_character},
-            )
-
-            matching_pockets = await db.execute_fetchall(
-                """SELECT user_id FROM profile WHERE INSTR(pockets, :character) ORDER BY length(pockets)""",
-                {"character": matching_character},
-            )
+        # We look for the players that have registered the character in their profile,
+        # all three lists come back from a single query.
+        (
+            matching_mains,
+            matching_secondaries,
+            matching_pockets,
+        ) = await self.bot.repo.profile.find_players(matching_character)
 
         try:
             emoji_converter = commands.PartialEmojiConverter()
@@ -639,29 +517,10 @@ class Profile(commands.Cog):
                 title=f"{matching_character} Players:", colour=0x007377
             )
 
-        mains_list = []
         # We have to cap it off at some point, I think 50 sounds pretty reasonable for our server.
-        for player in matching_mains[:50]:
-            # First we see if the user is in the cache.
-            user = self.bot.get_user(player[0])
-            # If not we have to fetch the user, this can take some time.
-            if not user:
-                user = await self.bot.fetch_user(player[0])
-            mains_list.append(discord.utils.escape_markdown(str(user)))
-
-        secondaries_list = []
-        for player in matching_secondaries[:50]:
-            user = self.bot.get_user(player[0])
-            if not user:
-                user = await self.bot.fetch_user(player[0])
-            secondaries_list.append(discord.utils.escape_markdown(str(user)))
-
-        pockets_list = []
-        for player in matching_pockets[:50]:
-            user = self.bot.get_user(player[0])
-            if not user:
-                user = await self.bot.fetch_user(player[0])
-            pockets_list.append(discord.utils.escape_markdown(str(user)))
+        mains_list = await self.get_player_names(matching_mains[:50])
+        secondaries_list = await self.get_player_names(matching_secondaries[:50])
+        pockets_list = await self.get_player_names(matching_pockets[:50])
 
         embed.add_field(
             name="Mains:",
@@ -1,198 +1,127 @@
 import asyncio
-import json
+from typing import Literal, Union
 
-import aiosqlite
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 import utils.check
-from utils.ids import (
-    Emojis,
-    GuildIDs,
-    GuildNames,
-    TGArenaChannelIDs,
-    TGMatchmakingRoleIDs,
-)
+from utils.db.ranking import DEFAULT_ELO, RECENT_MATCHES, RankedMatchRow
+from utils.elo import K_SCHEDULES, replay
+from utils.ids import Emojis, GuildIDs, GuildNames, TGArenaChannelIDs
+from utils.leaderboard import PAGE_SIZE, Leaderboard, LeaderboardEntry
+from utils.pings import PING_TTL, MatchmakingPing, format_pings
+from utils.roles import update_roles
+from utils.tiers import TieredRoles, load_tier_tables
 
 
-class Ranking(commands.Cog):
-    """Contains the ranked portion of our matchmaking system."""
+class LeaderboardView(discord.ui.View):
+    """Flips through the pages of the leaderboard."""
 
-    def __init__(self, bot: commands.Bot) -> None:
-        self.bot = bot
+    def __init__(
+        self,
+        cog: "Ranking",
+        author: Union[discord.User, discord.Member],
+        entries: list[LeaderboardEntry],
+    ) -> None:
+        super().__init__(timeout=120)
+        self.cog = cog
+        self.author = author
+        self.entries = entries
+        self.update_buttons()
 
-    async def get_ranked_role(
-        self, member: discord.Member, guild: discord.Guild
-    ) -> discord.Role:
-        """Retrieves the ranked role of a member."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_player = await db.execute_fetchall(
-                """SELECT elo FROM ranking WHERE user_id = :user_id""",
-                {"user_id": member.id},
-            )
+    def update_buttons(self) -> None:
+        leaderboard = self.cog.leaderboard
 
-        # If the player is not in the database,
-        # this gets the default role.
-        if len(matching_player) == 0:
-            pingrole = discord.utils.get(
-                guild.roles, id=TGMatchmakingRoleIDs.ELO_1050_ROLE
-            )
-        else:
-            elo = matching_player[0][0]
+        self.previous.disabled = not self.entries or not leaderboard.page_before(
+            self.entries[0].cursor, 1
+        )
+        self.next.disabled = not self.entries or not leaderboard.page_after(
+            self.entries[-1].cursor, 1
+        )
 
-            if elo >= 1300:
-                pingrole = discord.utils.get(
-                    guild.roles, id=TGMatchmakingRoleIDs.ELO_MAX_ROLE
-                )
-            elif elo >= 1200:
-                pingrole = discord.utils.get(
-                    guild.roles, id=TGMatchmakingRoleIDs.ELO_1300_ROLE
-                )
-            elif elo >= 1050:
-                pingrole = discord.utils.get(
-                    guild.roles, id=TGMatchmakingRoleIDs.ELO_1200_ROLE
-                )
-            elif elo >= 950:
-                pingrole = discord.utils.get(
-                    guild.roles, id=TGMatchmakingRoleIDs.ELO_1050_ROLE
-                )
-            elif elo >= 800:
-                pingrole = discord.utils.get(
-                    guild.roles, id=TGMatchmakingRoleIDs.ELO_950_ROLE
-                )
-            else:
-                pingrole = discord.utils.get(
-                    guild.roles, id=TGMatchmakingRoleIDs.ELO_800_ROLE
-                )
+    async def show(
+        self, interaction: discord.Interaction, entries: list[LeaderboardEntry]
+    ) -> None:
+        # If the page ran empty in the meantime, we just stay where we are.
+        if entries:
+            self.entries = entries
+        self.update_buttons()
 
-        return pingrole
+        embed = await self.cog.leaderboard_embed(self.entries, interaction.guild)
+        await interaction.response.edit_message(embed=embed, view=self)
 
-    def get_all_ranked_roles(self, guild: discord.Guild) -> list[discord.Role]:
-        """Gets you every ranked role."""
-        elo800role = discord.utils.get(
-            guild.roles, id=TGMatchmakingRoleIDs.ELO_800_ROLE
-        )
-        elo950role = discord.utils.get(
-            guild.roles, id=TGMatchmakingRoleIDs.ELO_950_ROLE
-        )
-        elo1050role = discord.utils.get(
-            guild.roles, id=TGMatchmakingRoleIDs.ELO_1050_ROLE
-        )
-        elo1200role = discord.utils.get(
-            guild.roles, id=TGMatchmakingRoleIDs.ELO_1200_ROLE
-        )
-        elo1300role = discord.utils.get(
-            guild.roles, id=TGMatchmakingRoleIDs.ELO_1300_ROLE
+    @discord.ui.button(emoji="⬅️", style=discord.ButtonStyle.blurple)
+    async def previous(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ) -> None:
+        await self.show(
+            interaction, self.cog.leaderboard.page_before(self.entries[0].cursor)
         )
-        elomaxrole = discord.utils.get(
-            guild.roles, id=TGMatchmakingRoleIDs.ELO_MAX_ROLE
+
+    @discord.ui.button(emoji="➡️", style=discord.ButtonStyle.blurple)
+    async def next(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ) -> None:
+        await self.show(
+            interaction, self.cog.leaderboard.page_after(self.entries[-1].cursor)
         )
-        return [
-            elo800role,
-            elo950role,
-            elo1050role,
-            elo1200role,
-            elo1300role,
-            elomaxrole,
-        ]
 
-    def get_adjacent_roles(
-        self, guild: discord.Guild, role: discord.Role
-    ) -> list[discord.Role]:
-        """Gets you your ranked role, as well as the ones above and below yours."""
-        elo_roles = self.get_all_ranked_roles(guild)
-        adjacent_roles = []
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user == self.author
 
-        index = elo_roles.index(role)
 
-        try:
-            adjacent_roles.append(elo_roles[index - 1])
-        except IndexError:
-            pass
+class Ranking(commands.Cog):
+    """Contains the ranked portion of our matchmaking system."""
+
+    def __init__(self, bot: commands.Bot) -> None:
+        self.bot = bot
+        # Every player sorted by elo, kept up to date after every match.
+        self.leaderboard = Leaderboard()
+        # The elo role of every elo range, the ranges are in json/tiers.json.
+        self.elo_tiers = TieredRoles(bot.roles, "elo", load_tier_tables()["elo"])
+
+    async def cog_load(self) -> None:
+        self.leaderboard = Leaderboard(
+            (await self.bot.repo.ranking.get_all_elos()).items()
+        )
+        self.bot.scheduler.register_handler("ranked_ping", self.expire_ranked_pings)
 
-        adjacent_roles.append(elo_roles[index])
+    async def cog_unload(self) -> None:
+        self.bot.scheduler.unregister_handler("ranked_ping")
 
-        try:
-            adjacent_roles.append(elo_roles[index + 1])
-        except IndexError:
-            pass
+    async def get_ranked_elo(self, member: discord.Member) -> int:
+        """Retrieves the elo of a member, players that are not in the database get the default elo."""
+        elo = await self.bot.repo.ranking.get_elo(member.id)
+        return DEFAULT_ELO if elo is None else elo
 
-        return adjacent_roles
+    async def get_ranked_role(
+        self, member: discord.Member, guild: discord.Guild
+    ) -> discord.Role:
+        """Retrieves the ranked role of a member."""
+        return self.elo_tiers.role(guild, await self.get_ranked_elo(member))
 
     async def remove_ranked_roles(
         self, member: discord.Member, guild: discord.Guild
     ) -> None:
         """Removes every ranked role a user has."""
-        elo_roles = self.get_all_ranked_roles(guild)
-        await member.remove_roles(*elo_roles)
+        await update_roles(member, remove=self.elo_tiers.role_ids)
 
     async def update_ranked_role(
         self, member: discord.Member, guild: discord.Guild, threshold: int = 5
     ) -> None:
         """This function updates the ranked roles of a member.
         The role change only triggers if the user does not have their current elo role,
-        so its fine to remove ALL others first and then give the new one out.
+        then we swap out the old one for the new one.
         Also we only start to give these out at 5 games played automatically,
         or after 1 game if you want it using %rankstats.
         """
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_player = await db.execute_fetchall(
-                """SELECT wins, losses FROM ranking WHERE user_id = :user_id""",
-                {"user_id": member.id},
-            )
-
-        if len(matching_player) == 0:
-            wins = 0
-            losses = 0
-        else:
-            wins = matching_player[0][0]
-            losses = matching_player[0][1]
+        wins, losses = await self.bot.repo.ranking.get_record(member.id)
 
         if wins + losses >= threshold:
             role = await self.get_ranked_role(member, guild)
             if role not in member.roles:
-                await self.remove_ranked_roles(member, guild)
-                await member.add_roles(role)
-
-    async def create_ranked_profile(self, member: discord.Member) -> None:
-        """Creates an entry in the ranked file for a user,
-        if the user is not already in there.
-        """
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_player = await db.execute_fetchall(
-                """SELECT * FROM ranking WHERE user_id = :user_id""",
-                {"user_id": member.id},
-            )
-
-            if len(matching_player) == 0:
-                wins = 0
-                losses = 0
-                elo = 1000
-                matches = ""
-
-                await db.execute(
-                    """INSERT INTO ranking VALUES (:user_id, :wins, :losses, :elo, :matches)""",
-                    {
-                        "user_id": member.id,
-                        "wins": wins,
-                        "losses": losses,
-                        "elo": elo,
-                        "matches": matches,
-                    },
-                )
-
-                await db.commit()
-
-    async def get_elo(self, member: discord.Member) -> int:
-        """Gets the elo of a given member."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_member = await db.execute_fetchall(
-                """SELECT elo FROM ranking WHERE user_id = :winner_id""",
-                {"winner_id": member.id},
-            )
-
-        return matching_member[0][0]
+                await update_roles(member, add=[role], remove=self.elo_tiers.role_ids)
 
     def calculate_elo(
         self, winner_elo: int, loser_elo: int, k: int = 32
@@ -211,94 +140,48 @@ class Ranking(commands.Cog):
 
         return new_winner_elo, new_loser_elo, difference
 
-    async def update_ranked_stats(
-        self,
-        winner: discord.Member,
-        winnerelo: int,
-        loser: discord.Member,
-        loserelo: int,
-    ) -> None:
-        """Updates the stats of both players after a match."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """UPDATE ranking SET
-                wins = wins + 1,
-                matches = matches || "W",
-                elo = :winnerelo
-                WHERE user_id = :winner_id""",
-                {"winnerelo": winnerelo, "winner_id": winner.id},
-            )
-            await db.execute(
-                """UPDATE ranking SET
-                losses = losses + 1,
-                matches = matches || "L",
-                elo = :loserelo
-                WHERE user_id = :loser_id""",
-                {"loserelo": loserelo, "loser_id": loser.id},
-            )
+    async def report_match(
+        self, winner: discord.Member, loser: discord.Member
+    ) -> RankedMatchRow:
+        """Saves the result of a match, creating the ranked profiles of new players on the way.
+        Returns the match, with the elo values of both players before and after.
+        """
+        # We need to wait for this, since the ranked roles get updated right after.
+        match = await self.bot.repo.ranking.report_match(
+            winner.id,
+            loser.id,
+            lambda winner_elo, loser_elo: self.calculate_elo(winner_elo, loser_elo)[:2],
+        )
+
+        self.leaderboard.update(winner.id, match.winner_elo_after)
+        self.leaderboard.update(loser.id, match.loser_elo_after)
 
-            await db.commit()
+        return match
 
     def store_ranked_ping(
         self, ctx: commands.Context, role: discord.Role, timestamp: float
     ) -> None:
-        """Stores your ranked ping."""
-        with open(r"./json/rankedpings.json", "r", encoding="utf-8") as f:
-            rankedusers = json.load(f)
-
-        rankedusers[f"{ctx.author.id}"] = {}
-        rankedusers[f"{ctx.author.id}"] = {
-            "rank": role.id,
-            "channel": ctx.channel.id,
-            "time": timestamp,
-        }
-
-        with open(r"./json/rankedpings.json", "w", encoding="utf-8") as f:
-            json.dump(rankedusers, f, indent=4)
-
-    def delete_ranked_ping(self, ctx: commands.Context) -> None:
-        """Deletes your ranked ping."""
-        with open(r"./json/rankedpings.json", "r", encoding="utf-8") as f:
-            rankedusers = json.load(f)
-
-        try:
-            del rankedusers[f"{ctx.message.author.id}"]
-        except KeyError:
-            logger = self.bot.get_logger("bot.mm")
-            logger.warning(
-                f"Tried to delete a ranked ping by {str(ctx.message.author)} but the ping was already deleted."
-            )
-
-        with open(r"./json/rankedpings.json", "w", encoding="utf-8") as f:
-            json.dump(rankedusers, f, indent=4)
+        """Stores your ranked ping, together with your elo role, and schedules its deletion."""
+        self.bot.mm_pings.add(
+            "ranked", MatchmakingPing(ctx.author.id, ctx.channel.id, timestamp, role.id)
+        )
+        self.bot.scheduler.schedule(
+            "ranked_ping",
+            str(ctx.author.id),
+            timestamp + PING_TTL,
+            {"user_id": ctx.author.id, "timestamp": timestamp},
+        )
 
-    def get_recent_ranked_pings(self, timestamp: float) -> str:
-        """Gets a list with all the recent ranked pings.
-        We need a different approach than unranked here because we also store the rank role here.
-        This is its own function because we need to export it.
+    async def expire_ranked_pings(self, payloads: list[dict]) -> None:
+        """Deletes the ranked pings whose 30 Minutes are up, all at once.
+        If a user has pinged again since then, the newer ping stays.
         """
-        with open(r"./json/rankedpings.json", "r", encoding="utf-8") as f:
-            user_pings = json.load(f)
-
-        list_of_searches = []
-
-        for ping in user_pings:
-            ping_rank = user_pings[f"{ping}"]["rank"]
-            ping_channel = user_pings[f"{ping}"]["channel"]
-            ping_timestamp = user_pings[f"{ping}"]["time"]
-
-            difference = timestamp - ping_timestamp
-
-            minutes = round(difference / 60)
-
-            if minutes < 31:
-                list_of_searches.append(
-                    f"<@&{ping_rank}> | <@!{ping}>, in <#{ping_channel}>, {minutes} minutes ago\n"
-                )
-
-        list_of_searches.reverse()
+        for payload in payloads:
+            self.bot.mm_pings.remove("ranked", payload["user_id"], payload["timestamp"])
 
-        return "".join(list_of_searches) or "Looks like no one has pinged recently :("
+    def get_recent_ranked_pings(self, timestamp: float) -> str:
+        """Gets a list with all the recent ranked pings, newest first."""
+        return format_pings(self.bot.mm_pings.recent("ranked", timestamp), timestamp)
 
     @commands.hybrid_command(aliases=["rankedmm", "rankedmatchmaking", "rankedsingles"])
     @commands.cooldown(1, 120, commands.BucketType.user)
@@ -315,7 +198,8 @@ class Ranking(commands.Cog):
 
         timestamp = discord.utils.utcnow().timestamp()
 
-        elo_role = await self.get_ranked_role(ctx.author, ctx.guild)
+        elo = await self.get_ranked_elo(ctx.author)
+        elo_role = self.elo_tiers.role(ctx.guild, elo)
 
         self.store_ranked_ping(ctx, elo_role, timestamp)
 
@@ -323,7 +207,7 @@ class Ranking(commands.Cog):
         searches = self.get_recent_ranked_pings(timestamp)
 
         # Gathers all the roles we are gonna ping.
-        pingroles = self.get_adjacent_roles(ctx.guild, elo_role)
+        pingroles = self.elo_tiers.adjacent_roles(ctx.guild, elo)
 
         pings = ""
 
@@ -352,11 +236,6 @@ class Ranking(commands.Cog):
             "Please use this thread for communicating with your opponent and for reporting matches."
         )
 
-        # Waits 30 mins and deletes the ping afterwards.
-        await asyncio.sleep(1800)
-
-        self.delete_ranked_ping(ctx)
-
     @commands.hybrid_command(aliases=["reportgame"], cooldown_after_parsing=True)
     @commands.cooldown(1, 41, commands.BucketType.user)
     @commands.guild_only()
@@ -413,25 +292,17 @@ class Ranking(commands.Cog):
             )
             return
 
-        await self.create_ranked_profile(ctx.author)
-        await self.create_ranked_profile(user)
-
-        winner_elo = await self.get_elo(ctx.author)
-        loser_elo = await self.get_elo(user)
-
-        winnerupdate, loserupdate, difference = self.calculate_elo(
-            winner_elo, loser_elo
-        )
-
-        await self.update_ranked_stats(ctx.author, winnerupdate, user, loserupdate)
+        match = await self.report_match(ctx.author, user)
 
         await self.update_ranked_role(ctx.author, ctx.guild, 5)
         await self.update_ranked_role(user, ctx.guild, 5)
 
         await ctx.send(
             f"Game successfully reported!\n{ctx.author.mention} won!\n"
-            f"Updated Elo score: {ctx.author.mention} = {winnerupdate} (+{difference}) | "
-            f"{user.mention} = {loserupdate} (-{difference})"
+            f"Updated Elo score: {ctx.author.mention} = {match.winner_elo_after} "
+            f"(+{match.winner_elo_after - match.winner_elo_before}) | "
+            f"{user.mention} = {match.loser_elo_after} "
+            f"(-{match.loser_elo_before - match.loser_elo_after})"
         )
 
     @commands.hybrid_command(aliases=["forcereportgame"], cooldown_after_parsing=True)
@@ -472,25 +343,17 @@ class Ranking(commands.Cog):
             )
             return
 
-        await self.create_ranked_profile(winner)
-        await self.create_ranked_profile(loser)
-
-        winner_elo = await self.get_elo(winner)
-        loser_elo = await self.get_elo(loser)
-
-        winnerupdate, loserupdate, difference = self.calculate_elo(
-            winner_elo, loser_elo
-        )
-
-        await self.update_ranked_stats(winner, winnerupdate, loser, loserupdate)
+        match = await self.report_match(winner, loser)
 
         await self.update_ranked_role(winner, ctx.guild, 5)
         await self.update_ranked_role(loser, ctx.guild, 5)
 
         await ctx.send(
             f"Game successfully reported!\n{winner.mention} won!\n"
-            f"Updated Elo score: {winner.mention} = {winnerupdate} (+{difference}) | "
-            f"{loser.mention} = {loserupdate} (-{difference})\n"
+            f"Updated Elo score: {winner.mention} = {match.winner_elo_after} "
+            f"(+{match.winner_elo_after - match.winner_elo_before}) | "
+            f"{loser.mention} = {match.loser_elo_after} "
+            f"(-{match.loser_elo_before - match.loser_elo_after})\n"
             f"Game was forcefully reported by: {ctx.author.mention}"
         )
 
@@ -508,28 +371,42 @@ class Ranking(commands.Cog):
             member = ctx.author
             selfcheck = True
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_member = await db.execute_fetchall(
-                """SELECT * FROM ranking WHERE user_id = :user_id""",
-                {"user_id": member.id},
-            )
+        player = await self.bot.repo.ranking.get(member.id)
 
-        _, wins, losses, elo, matches = matching_member[0]
+        if player is None:
+            await ctx.send("This user has not played any ranked matches yet.")
+            return
 
-        # Gets the last 5 games played and reverses that string.
-        last5games = matches[-5:]
-        gamelist = last5games[::-1]
+        # Gets the last 5 games played, newest first, and subs in the emojis.
+        recent_matches = await self.bot.repo.ranking.get_recent_matches(member.id)
+        results = [
+            "W" if match.winner_id == member.id else "L" for match in recent_matches
+        ]
 
-        # Subs in the emojis.
-        gamelist = gamelist.replace("W", Emojis.WIN_EMOJI)
-        gamelist = gamelist.replace("L", Emojis.LOSE_EMOJI)
+        # If there are not enough, the rest comes from the results before we saved every match.
+        if len(results) < RECENT_MATCHES:
+            legacy_results = await self.bot.repo.ranking.get_legacy_results(member.id)
+            missing = RECENT_MATCHES - len(results)
+            results.extend(legacy_results[::-1][:missing])
+
+        gamelist = "".join(
+            Emojis.WIN_EMOJI if result == "W" else Emojis.LOSE_EMOJI
+            for result in results
+        )
 
         embed = discord.Embed(title=f"Ranked stats of {str(member)}", colour=0x3498DB)
         embed.set_thumbnail(url=member.display_avatar.url)
-        embed.add_field(name="Elo score", value=elo, inline=True)
-        embed.add_field(name="Wins", value=wins, inline=True)
-        embed.add_field(name="Losses", value=losses, inline=True)
-        embed.add_field(name="Last Matches", value=gamelist, inline=True)
+        embed.add_field(name="Elo score", value=player.elo, inline=True)
+        embed.add_field(
+            name="Rank",
+            value=f"#{self.leaderboard.rank(member.id)} of {len(self.leaderboard)}",
+            inline=True,
+        )
+        embed.add_field(name="Wins", value=player.wins, inline=True)
+        embed.add_field(name="Losses", value=player.losses, inline=True)
+        embed.add_field(
+            name="Last Matches", value=gamelist or "No matches yet", inline=True
+        )
         if (
             selfcheck is True
             and ctx.guild is not None
@@ -574,29 +451,128 @@ class Ranking(commands.Cog):
     @app_commands.default_permissions(administrator=True)
     @utils.check.is_moderator()
     async def leaderboard(self, ctx: commands.Context) -> None:
-        """The Top 10 Players of our Ranked Matchmaking."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            all_users = await db.execute_fetchall(
-                """SELECT * FROM ranking ORDER BY elo DESC"""
+        """The Players of our Ranked Matchmaking, sorted by elo.
+        Starts off with the top 10, you can look through the rest with the buttons.
+        """
+        entries = self.leaderboard.top(PAGE_SIZE)
+
+        embed = await self.leaderboard_embed(entries, ctx.guild)
+        await ctx.send(embed=embed, view=LeaderboardView(self, ctx.author, entries))
+
+    @commands.hybrid_command(aliases=["replayelo", "rerank"])
+    @app_commands.guilds(*GuildIDs.ALL_GUILDS)
+    @app_commands.describe(
+        schedule="How fast the elo changes, depending on the games someone played.",
+        void="The member whose matches should be thrown out.",
+        apply="If the new values should be saved, otherwise you just get a preview.",
+    )
+    @app_commands.default_permissions(administrator=True)
+    @utils.check.is_moderator()
+    async def rerate(
+        self,
+        ctx: commands.Context,
+        schedule: Literal["classic", "provisional", "veteran"] = "classic",
+        void: discord.User = None,
+        apply: bool = False,
+    ) -> None:
+        """Calculates the elo of every player again, from the whole ranked match history.
+        You can throw out the matches of a member, and try out different K-factors.
+        Only shows you what would change, unless you set apply.
+        """
+        await ctx.typing()
+
+        history = await self.bot.repo.ranking.get_match_history()
+        baseline = await self.bot.repo.ranking.get_baseline()
+        current = await self.bot.repo.ranking.get_all_elos()
+
+        result = await asyncio.to_thread(
+            replay,
+            history,
+            current,
+            K_SCHEDULES[schedule],
+            [void.id] if void else (),
+            baseline,
+        )
+        changes = result.diff(current)
+
+        embed_description = [
+            f"<@!{user_id}> | {old_elo} -> {new_elo} ({new_elo - old_elo:+})\n"
+            for user_id, old_elo, new_elo in changes[:10]
+        ]
+
+        embed = discord.Embed(
+            title=f"Replayed {len(result.matches)} ranked matches with the {schedule} K-factors",
+            description="**Biggest changes:**\n"
+            + ("".join(embed_description) or "None"),
+            colour=discord.Colour.blue(),
+        )
+        embed.add_field(name="Players changed", value=len(changes), inline=True)
+        embed.add_field(name="Matches voided", value=len(result.voided), inline=True)
+        # The ones from before we saved every match, they start from their old elo.
+        embed.add_field(
+            name="Players with an old record", value=len(baseline), inline=True
+        )
+        embed.add_field(
+            name="Time taken", value=f"{result.elapsed * 1000:.0f}ms", inline=True
+        )
+
+        if apply:
+            # Only goes through if nobody reported a match since we read the history.
+            saved = await self.bot.repo.ranking.apply_replay(
+                {
+                    user_id: (player.elo, player.wins, player.losses)
+                    for user_id, player in result.players.items()
+                },
+                result.matches,
+                result.voided,
+                history[-1].match_id if history else None,
             )
 
+            if saved:
+                self.leaderboard = Leaderboard(
+                    (user_id, player.elo)
+                    for user_id, player in result.players.items()
+                    if user_id in current
+                )
+                embed.set_footer(
+                    text="The new values are saved. Ranked roles update after the next match of each player."
+                )
+            else:
+                embed.set_footer(
+                    text="A match got reported in the meantime, so nothing was saved. Please try again."
+                )
+        else:
+            embed.set_footer(text="Just a preview, nothing was saved.")
+
+        await ctx.send(embed=embed)
+
+    async def leaderboard_embed(
+        self, entries: list[LeaderboardEntry], guild: discord.Guild
+    ) -> discord.Embed:
+        """Builds the embed for a page of the leaderboard."""
+        # Only the players on this page, the elo we have already.
+        players = await self.bot.repo.ranking.get_many(
+            entry.user_id for entry in entries
+        )
+
         embed_description = []
-        # Only gets the top 10.
-        for rank, user in enumerate(all_users[:10], start=1):
-            user_id, wins, losses, elo, _ = user
+        for entry in entries:
+            player = players.get(entry.user_id)
+            wins, losses = (player.wins, player.losses) if player else (0, 0)
             embed_description.append(
-                f"{rank} | <@!{user_id}> | {elo} | {wins}/{losses}\n"
+                f"{entry.rank} | <@!{entry.user_id}> | {entry.elo} | {wins}/{losses}\n"
             )
         embedstats = "".join(embed_description)
 
         embed = discord.Embed(
-            title=f"Top 10 Players of {GuildNames.TRAINING_GROUNDS} Ranked Matchmaking",
+            title=f"Top Players of {GuildNames.TRAINING_GROUNDS} Ranked Matchmaking",
             description=f"**Rank | Username | Elo score | W/L**\n{embedstats}",
             colour=discord.Colour.blue(),
         )
-        embed.set_thumbnail(url=ctx.guild.icon.url)
+        embed.set_thumbnail(url=guild.icon.url)
+        embed.set_footer(text=f"{len(self.leaderboard)} players in total")
         embed.timestamp = discord.utils.utcnow()
-        await ctx.send(embed=embed)
+        return embed
 
     @reportmatch.error
     async def reportmatch_error(
@@ -637,6 +613,22 @@ class Ranking(commands.Cog):
         else:
             raise error
 
+    @rerate.error
+    async def rerate_error(
+        self, ctx: commands.Context, error: commands.CommandError
+    ) -> None:
+        if isinstance(error, commands.MissingPermissions):
+            await ctx.send("Nice try, but you don't have the permissions to do that!")
+        elif isinstance(error, commands.UserNotFound):
+            await ctx.send("I couldn't find this member, please try again.")
+        elif isinstance(error, commands.BadArgument):
+            await ctx.send(
+                "Please choose one of these schedules: "
+                f"{', '.join(f'`{schedule}`' for schedule in K_SCHEDULES)}."
+            )
+        else:
+            raise error
+
     @rankstats.error
     async def rankstats_error(
         self, ctx: commands.Context, error: commands.CommandError
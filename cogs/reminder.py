@@ -1,15 +1,33 @@
 import asyncio
 import datetime
-import random
+from typing import Optional
 
-import aiosqlite
+import aiohttp
 import discord
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 
+from utils.db.reminders import ReminderRow
 from utils.ids import GuildIDs
+from utils.locks import KeyedLock
 from utils.time import convert_time
 
+# How many channels we send reminders to at the same time.
+MAX_DELIVERIES = 5
+# How often we try to send a reminder before we leave it for later.
+DELIVERY_ATTEMPTS = 3
+# How long we wait after the first failed try, doubles after every try, in seconds.
+RETRY_BACKOFF = 2
+# When we try again after every try failed, in seconds.
+RETRY_LATER = 300
+
+# Errors where it makes sense to try again, Discord being down or our connection dropping.
+TRANSIENT_ERRORS = (
+    discord.DiscordServerError,
+    aiohttp.ClientError,
+    asyncio.TimeoutError,
+)
+
 
 class Reminder(commands.Cog):
     """Contains the reminder functions and everything associated with them."""
@@ -17,39 +35,125 @@ class Reminder(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
-        self.reminder_loop.start()
-
-    def cog_unload(self) -> None:
-        self.reminder_loop.cancel()
+        self.delivery_slots: Optional[asyncio.Semaphore] = None
+        # Reminders in the same channel get sent one after another, in order.
+        self.channel_locks = KeyedLock()
+        self.deliveries: set[asyncio.Task] = set()
+
+    async def cog_load(self) -> None:
+        self.delivery_slots = asyncio.Semaphore(MAX_DELIVERIES)
+        self.bot.scheduler.register_handler("reminder", self.send_reminders)
+
+        # Every pending reminder goes on the scheduler,
+        # the ones that expired while we were offline fire right away, all in one batch.
+        for reminder in await self.bot.repo.reminders.get_all():
+            self.schedule_reminder(reminder)
+
+    async def cog_unload(self) -> None:
+        self.bot.scheduler.unregister_handler("reminder")
+        self.bot.scheduler.cancel_kind("reminder")
+
+        # Whatever did not get sent yet is still in the database, and gets sent after loading again.
+        for task in self.deliveries:
+            task.cancel()
+
+    def schedule_reminder(self, reminder: ReminderRow, when: int = None) -> None:
+        # The reminders are saved in the database already, so the scheduler does not need to save them.
+        self.bot.scheduler.schedule(
+            "reminder",
+            f"{reminder.user_id}:{reminder.reminder_id}",
+            reminder.date if when is None else when,
+            reminder,
+            persistent=False,
+        )
 
     async def notify_user(
         self, user_id: int, channel_id: int, message: str, read_time: str
     ) -> None:
         """Notifies the user when their reminder expires.
         First we try in the channel, then their DMs.
+        Raises one of the TRANSIENT_ERRORS if it makes sense to try again later.
         """
         logger = self.bot.get_logger("bot.reminder")
 
         try:
-            channel = await self.bot.fetch_channel(channel_id)
+            # Most of the time the channel is cached, so we dont need to ask Discord.
+            channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(
+                channel_id
+            )
             await channel.send(
                 f"<@!{user_id}>, you wanted me to remind you of `{message}`, {read_time} ago."
             )
-            # The channel could get deleted in the meantime,
-            # or something else can prevent us having access.
+        except discord.DiscordServerError:
+            raise
+        # The channel could get deleted in the meantime,
+        # or something else can prevent us having access.
         except discord.HTTPException:
             # Unfortunately we need a second try/except block because
             # people can block your bot and this would throw an error otherwise,
             # and we dont wanna interrupt the loop.
             try:
-                member = await self.bot.fetch_user(user_id)
-                await member.send(
+                user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+                await user.send(
                     f"<@!{user_id}>, you wanted me to remind you of `{message}`, "
                     f"{read_time} ago, in a deleted channel."
                 )
+            except discord.DiscordServerError:
+                raise
             except discord.HTTPException as exc:
                 logger.info(f"Could not notify user due to: {exc}")
 
+    async def deliver(self, reminder: ReminderRow) -> bool:
+        """Tries to notify the user a couple of times, waiting longer after every try.
+        Every try takes up a delivery slot, but not the waiting in between,
+        so the other channels can use the slot in the meantime.
+        Returns True once the reminder is taken care of, and False if every try failed.
+        """
+        logger = self.bot.get_logger("bot.reminder")
+
+        for attempt in range(DELIVERY_ATTEMPTS):
+            try:
+                async with self.delivery_slots:
+                    await self.notify_user(
+                        reminder.user_id,
+                        reminder.channel_id,
+                        reminder.message,
+                        reminder.read_time,
+                    )
+                return True
+            except TRANSIENT_ERRORS as exc:
+                logger.warning(
+                    f"Could not send reminder #{reminder.reminder_id} (try {attempt + 1}/{DELIVERY_ATTEMPTS}): {exc!r}"
+                )
+                if attempt + 1 < DELIVERY_ATTEMPTS:
+                    await asyncio.sleep(RETRY_BACKOFF * 2**attempt)
+
+        return False
+
+    async def deliver_channel(self, reminders: list[ReminderRow]) -> list[ReminderRow]:
+        """Sends the reminders of a single channel, in order.
+        A reminder only gets deleted once it was taken care of.
+        Returns the reminders that could not be sent.
+        """
+        failed = []
+
+        async with self.channel_locks(reminders[0].channel_id):
+            for reminder in reminders:
+                # The user could have deleted it while we were waiting for our turn.
+                saved = await self.bot.repo.reminders.get(
+                    reminder.user_id, reminder.reminder_id
+                )
+                if saved is None:
+                    continue
+
+                if await self.deliver(reminder):
+                    # These go through the write queue, so they still end up in a few transactions.
+                    await self.bot.repo.reminders.delete_many([reminder])
+                else:
+                    failed.append(reminder)
+
+        return failed
+
     @commands.hybrid_command(aliases=["remindme", "newreminder", "newremindme"])
     @app_commands.guilds(*GuildIDs.ALL_GUILDS)
     @app_commands.describe(
@@ -82,51 +186,31 @@ class Reminder(commands.Cog):
 
         reminder_message = discord.utils.remove_markdown(reminder_message)
 
-        # If the duration is fairly short, i wont bother writing it to the file,
-        # a sleep statement will do.
-        if seconds < 299:
-            message_dt = datetime.datetime.fromtimestamp(
-                discord.utils.utcnow().timestamp() + seconds
-            )
+        # Every reminder gets saved, even the short ones, so that none get lost on a restart.
+        reminder_date = int(discord.utils.utcnow().timestamp() + seconds)
 
-            await ctx.send(
-                f"{ctx.author.mention}, I will remind you about `{reminder_message}` in {reminder_time}! "
-                f"({discord.utils.format_dt(message_dt, style='f')})"
-            )
+        reminder = ReminderRow(
+            user_id=ctx.author.id,
+            # Gets a free random ID once it is saved.
+            reminder_id=0,
+            channel_id=ctx.channel.id,
+            date=reminder_date,
+            read_time=reminder_time,
+            message=reminder_message,
+        )
 
-            await asyncio.sleep(seconds)
+        await self.bot.repo.reminders.add(reminder)
+        self.schedule_reminder(reminder)
 
-            await ctx.send(
-                f"{ctx.author.mention}, you wanted me to remind you of `{reminder_message}`, {reminder_time} ago."
-            )
-        # Otherwise it will get saved in the file.
-        else:
-            reminder_id = random.randint(1000000, 9999999)
-            reminder_date = int(discord.utils.utcnow().timestamp() + seconds)
-
-            async with aiosqlite.connect("./db/database.db") as db:
-                await db.execute(
-                    """INSERT INTO reminder VALUES (:user_id, :reminder_id, :channel_id, :date, :read_time, :message)""",
-                    {
-                        "user_id": ctx.author.id,
-                        "reminder_id": reminder_id,
-                        "channel_id": ctx.channel.id,
-                        "date": reminder_date,
-                        "read_time": reminder_time,
-                        "message": reminder_message,
-                    },
-                )
-                await db.commit()
+        message_dt = datetime.datetime.fromtimestamp(
+            discord.utils.utcnow().timestamp() + seconds
+        )
 
-            message_dt = datetime.datetime.fromtimestamp(
-                discord.utils.utcnow().timestamp() + seconds
-            )
-
-            await ctx.send(
-                f"{ctx.author.mention}, I will remind you about `{reminder_message}` in {reminder_time}! "
-                f"({discord.utils.format_dt(message_dt, style='f')})\n"
-                f"View all of your active reminders with `{ctx.prefix}viewreminders`"
-            )
+        await ctx.send(
+            f"{ctx.author.mention}, I will remind you about `{reminder_message}` in {reminder_time}! "
+            f"({discord.utils.format_dt(message_dt, style='f')})\n"
+            f"View all of your active reminders with `{ctx.prefix}viewreminders`"
+        )
 
     @commands.hybrid_command(
         aliases=["reminders", "myreminders", "viewreminder", "listreminders"]
@@ -136,17 +220,12 @@ class Reminder(commands.Cog):
         """
         Displays your active reminders.
         """
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_reminders = await db.execute_fetchall(
-                """SELECT * FROM reminder WHERE user_id = :user_id""",
-                {"user_id": ctx.author.id},
-            )
+        user_reminders = await self.bot.repo.reminders.get_by_user(ctx.author.id)
 
         reminder_list = []
 
         for reminder in user_reminders:
-            # The underscores are user id, channel id and read_time.
-            (_, reminder_id, _, date, _, message) = reminder
+            date = reminder.date
 
             dt_now = discord.utils.utcnow().timestamp()
             timediff = str(datetime.timedelta(seconds=date - dt_now)).split(
@@ -158,7 +237,7 @@ class Reminder(commands.Cog):
             if (date - dt_now) <= 30:
                 timediff = "Less than a minute..."
             reminder_list.append(
-                f"**ID:** {reminder_id} - **Time remaining:** {timediff} - **Message:** `{message}`\n"
+                f"**ID:** {reminder.reminder_id} - **Time remaining:** {timediff} - **Message:** `{reminder.message}`\n"
             )
 
         if not reminder_list:
@@ -184,24 +263,25 @@ class Reminder(commands.Cog):
     async def deletereminder(self, ctx: commands.Context, reminder_id: str) -> None:
         """Deletes a reminder of yours."""
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_reminder = await db.execute_fetchall(
-                """SELECT * FROM reminder WHERE user_id = :user_id AND reminder_id = :reminder_id""",
-                {"user_id": ctx.author.id, "reminder_id": reminder_id},
-            )
+        reminder = await self.bot.repo.reminders.get(ctx.author.id, reminder_id)
+        deleted = False
 
-            if len(matching_reminder) == 0:
-                await ctx.send(
-                    "I could not find any reminder with this ID. \n"
-                    f"View all of your active reminders with `{ctx.prefix}viewreminders`"
+        if reminder is not None:
+            # If the reminder is being sent right now, we wait until it went out.
+            # Otherwise it gets deleted before its turn comes, and never goes out.
+            async with self.channel_locks(reminder.channel_id):
+                deleted = await self.bot.repo.reminders.delete(
+                    ctx.author.id, reminder_id
                 )
-                return
 
-            await db.execute(
-                """DELETE FROM reminder WHERE user_id = :user_id AND reminder_id = :reminder_id""",
-                {"user_id": ctx.author.id, "reminder_id": reminder_id},
+        if not deleted:
+            await ctx.send(
+                "I could not find any reminder with this ID. \n"
+                f"View all of your active reminders with `{ctx.prefix}viewreminders`"
             )
-            await db.commit()
+            return
+
+        self.bot.scheduler.cancel("reminder", f"{ctx.author.id}:{int(reminder_id)}")
 
         await ctx.send(f"Deleted reminder ID {reminder_id}.")
 
@@ -209,13 +289,12 @@ class Reminder(commands.Cog):
     async def deletereminder_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice]:
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_reminders = await db.execute_fetchall(
-                """SELECT reminder_id FROM reminder WHERE user_id = :user_id""",
-                {"user_id": interaction.user.id},
+        reminder_ids = [
+            str(reminder_id)
+            for reminder_id in await self.bot.repo.reminders.get_ids(
+                interaction.user.id
             )
-
-        reminder_ids = [str(reminder[0]) for reminder in user_reminders]
+        ]
 
         # We dont really need the fuzzy search here, this is all just numbers.
         choices = [
@@ -226,40 +305,43 @@ class Reminder(commands.Cog):
 
         return choices[:25]
 
-    @tasks.loop(seconds=60)
-    async def reminder_loop(self) -> None:
-        """Checks every minute if a reminder has passed.
-        If that is the case, notifies the user and deletes the reminder.
+    async def send_reminders(self, reminders: list[ReminderRow]) -> None:
+        """Gets called by the scheduler with every reminder that is due.
+        The sending happens in the background, so the scheduler can move on right away.
         """
-        logger = self.bot.get_logger("bot.reminder")
-
-        date_now = discord.utils.utcnow().timestamp()
+        task = asyncio.create_task(self.deliver_reminders(reminders))
+        self.deliveries.add(task)
+        task.add_done_callback(self.deliveries.discard)
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            expired_reminders = await db.execute_fetchall(
-                """SELECT * FROM reminder WHERE date < :date_now""",
-                {"date_now": int(date_now)},
-            )
+    async def deliver_reminders(self, reminders: list[ReminderRow]) -> None:
+        """Notifies the users, a few channels at a time, and deletes the reminders that were sent.
+        The ones that could not be sent stay saved, and we try again later.
+        """
+        # After a restart, the reminders that expired in the meantime come in before we are connected.
+        await self.bot.wait_until_ready()
 
-            for reminder in expired_reminders:
-                (user_id, reminder_id, channel_id, _, read_time, message) = reminder
+        logger = self.bot.get_logger("bot.reminder")
 
-                logger.info(
-                    f"Reminder #{reminder_id} from user {user_id} has passed. Notifying user and deleting reminder..."
-                )
+        channels: dict[int, list[ReminderRow]] = {}
+        for reminder in reminders:
+            logger.info(
+                f"Reminder #{reminder.reminder_id} from user {reminder.user_id} has passed. Notifying user..."
+            )
+            channels.setdefault(reminder.channel_id, []).append(reminder)
 
-                await self.notify_user(user_id, channel_id, message, read_time)
+        results = await asyncio.gather(
+            *(self.deliver_channel(channel) for channel in channels.values())
+        )
+        failed = [reminder for result in results for reminder in result]
 
-            await db.execute(
-                """DELETE FROM reminder WHERE date < :date_now""",
-                {"date_now": int(date_now)},
+        if failed:
+            logger.warning(
+                f"Could not send {len(failed)} reminder(s), trying again in {RETRY_LATER} seconds."
             )
 
-            await db.commit()
-
-    @reminder_loop.before_loop
-    async def before_reminder_loop(self) -> None:
-        await self.bot.wait_until_ready()
+            retry_at = int(discord.utils.utcnow().timestamp()) + RETRY_LATER
+            for reminder in failed:
+                self.schedule_reminder(reminder, retry_at)
 
     @reminder.error
     async def reminder_error(
@@ -1,10 +1,64 @@
-import aiosqlite
+from dataclasses import dataclass
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 import utils.check
+from utils.db.reactrole import ReactRoleRow
 from utils.ids import GuildIDs, TGChannelIDs
+from utils.roles import update_roles
+
+
+@dataclass
+class RoleMenu:
+    """Every entry of a role menu, prepared for the reaction listeners."""
+
+    __slots__ = (
+        "message_id",
+        "exclusive",
+        "required_roles",
+        "emoji_roles",
+        "removal_roles",
+        "role_ids",
+    )
+
+    message_id: int
+    exclusive: bool
+    # You need one of these to use the menu, empty if there is no requirement.
+    required_roles: frozenset[int]
+    # The roles you get for each emoji.
+    emoji_roles: dict[str, tuple[int, ...]]
+    # The same, but by the last 20 characters of the emoji.
+    # The remove event does not tell us if an emoji is animated or not.
+    removal_roles: dict[str, tuple[int, ...]]
+    # Every role of the menu.
+    role_ids: frozenset[int]
+
+    @classmethod
+    def from_entries(cls, entries: list[ReactRoleRow]) -> "RoleMenu":
+        emoji_roles: dict[str, tuple[int, ...]] = {}
+        removal_roles: dict[str, tuple[int, ...]] = {}
+
+        for entry in entries:
+            emoji_roles[entry.emoji] = emoji_roles.get(entry.emoji, ()) + (entry.role,)
+            removal_roles[entry.emoji[-20:]] = removal_roles.get(
+                entry.emoji[-20:], ()
+            ) + (entry.role,)
+
+        # These values *should* be the same for every entry of a message.
+        rolereq = entries[0].rolereq
+
+        return cls(
+            entries[0].message_id,
+            bool(entries[0].exclusive),
+            frozenset(int(role_id) for role_id in rolereq.split())
+            if rolereq
+            else frozenset(),
+            emoji_roles,
+            removal_roles,
+            frozenset(entry.role for entry in entries),
+        )
 
 
 class Rolemenu(commands.Cog):
@@ -14,6 +68,25 @@ class Rolemenu(commands.Cog):
 
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        # Every role menu by its message ID, so reactions on other messages dont need the database.
+        self.menus: dict[int, RoleMenu] = {}
+
+    async def cog_load(self) -> None:
+        entries: dict[int, list[ReactRoleRow]] = {}
+        for entry in await self.bot.repo.reactrole.get_all():
+            entries.setdefault(entry.message_id, []).append(entry)
+
+        self.menus = {
+            message_id: RoleMenu.from_entries(message_entries)
+            for message_id, message_entries in entries.items()
+        }
+
+    async def refresh_menu(self, message_id: int) -> None:
+        """Loads a single role menu again, after it changed."""
+        if entries := await self.bot.repo.reactrole.get_by_message(message_id):
+            self.menus[message_id] = RoleMenu.from_entries(entries)
+        else:
+            self.menus.pop(message_id, None)
 
     @commands.hybrid_group()
     @app_commands.guilds(*GuildIDs.ALL_GUILDS)
@@ -62,34 +135,11 @@ class Rolemenu(commands.Cog):
             )
             return
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            rolemenu_message = await db.execute_fetchall(
-                """SELECT exclusive, rolereq FROM reactrole WHERE message_id = :message_id""",
-                {"message_id": message},
-            )
-
-            # If a message already exists in the database,
-            # it will use these values for exclusivity and rolereq,
-            # otherwise we'll use the default values.
-            if len(rolemenu_message) == 0:
-                exclusive = False
-                rolereq = None
-            else:
-                exclusive = rolemenu_message[0][0]
-                rolereq = rolemenu_message[0][1]
-
-            await db.execute(
-                """INSERT INTO reactrole VALUES (:message_id, :exclusive, :rolereq, :emoji, :role)""",
-                {
-                    "message_id": message,
-                    "exclusive": exclusive,
-                    "rolereq": rolereq,
-                    "emoji": emoji,
-                    "role": role.id,
-                },
-            )
-
-            await db.commit()
+        # If a message already exists in the database,
+        # it will use these values for exclusivity and rolereq,
+        # otherwise we'll use the default values.
+        await self.bot.repo.reactrole.add(reactionmessage.id, emoji, role.id)
+        await self.refresh_menu(reactionmessage.id)
 
         await ctx.send(
             f"Added an entry for Message ID #{message}, Emoji {emoji}, and Role {role.name}",
@@ -139,28 +189,13 @@ class Rolemenu(commands.Cog):
             # This is just for the confirmation message.
             rolereq_name_store = "None"
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            rolemenu_entries = await db.execute_fetchall(
-                """SELECT * FROM reactrole WHERE message_id = :message_id""",
-                {"message_id": message},
-            )
-
-            if len(rolemenu_entries) == 0:
-                await ctx.send(
-                    "I didn't find an entry for this message.", ephemeral=True
-                )
-                return
-
-            await db.execute(
-                """UPDATE reactrole SET exclusive = :exclusive, rolereq = :rolereq WHERE message_id = :message_id""",
-                {
-                    "exclusive": exclusive,
-                    "rolereq": rolereq_id_store,
-                    "message_id": message,
-                },
-            )
+        if not await self.bot.repo.reactrole.update_settings(
+            message, exclusive, rolereq_id_store
+        ):
+            await ctx.send("I didn't find an entry for this message.", ephemeral=True)
+            return
 
-            await db.commit()
+        await self.refresh_menu(int(message))
 
         await ctx.send(
             f"I have set the Role requirement to {rolereq_name_store} "
@@ -172,12 +207,7 @@ class Rolemenu(commands.Cog):
     async def modifyrolemenu_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice]:
-        async with aiosqlite.connect("./db/database.db") as db:
-            message_id = await db.execute_fetchall(
-                """SELECT message_id FROM reactrole"""
-            )
-
-        message_ids = [str(id[0]) for id in list(set(message_id))]
+        message_ids = [str(m_id) for m_id in self.menus]
 
         choices = [
             app_commands.Choice(name=m_id, value=m_id)
@@ -195,22 +225,11 @@ class Rolemenu(commands.Cog):
     async def rolemenu_delete(self, ctx: commands.Context, message: str) -> None:
         """Completely deletes a role menu entry from the database."""
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            rolemenu_entries = await db.execute_fetchall(
-                """SELECT * FROM reactrole WHERE message_id = :message_id""",
-                {"message_id": message},
-            )
-
-            if len(rolemenu_entries) == 0:
-                await ctx.send("This message was not used for role menus.")
-                return
-
-            await db.execute(
-                """DELETE FROM reactrole WHERE message_id = :message_id""",
-                {"message_id": message},
-            )
+        if not await self.bot.repo.reactrole.delete_message(message):
+            await ctx.send("This message was not used for role menus.")
+            return
 
-            await db.commit()
+        self.menus.pop(int(message), None)
 
         await ctx.send(f"Deleted every entry for Message ID #{message}.")
 
@@ -218,12 +237,7 @@ class Rolemenu(commands.Cog):
     async def deleterolemenu_autocomplete(
         self, interaction: discord.Interaction, current: str
     ) -> list[app_commands.Choice]:
-        async with aiosqlite.connect("./db/database.db") as db:
-            message_id = await db.execute_fetchall(
-                """SELECT message_id FROM reactrole"""
-            )
-
-        message_ids = [str(id[0]) for id in list(set(message_id))]
+        message_ids = [str(m_id) for m_id in self.menus]
 
         choices = [
             app_commands.Choice(name=m_id, value=m_id)
@@ -239,18 +253,15 @@ class Rolemenu(commands.Cog):
     @utils.check.is_moderator()
     async def rolemenu_get(self, ctx: commands.Context) -> None:
         """Lists every currently active role menu."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            rolemenu_entries = await db.execute_fetchall(
-                """SELECT * FROM reactrole ORDER BY message_id ASC"""
-            )
+        rolemenu_entries = await self.bot.repo.reactrole.get_all()
 
         unique_messages = []
         embed_description = []
 
         for entry in rolemenu_entries:
-            (message_id, exclusive, rolereq, emoji, role) = entry
+            rolereq = entry.rolereq
             # To make it more readable.
-            exclusive = "False" if exclusive == 0 else "True"
+            exclusive = "False" if entry.exclusive == 0 else "True"
 
             # Converts the role reqs saved into mentions, if they exist.
             if rolereq is not None:
@@ -263,15 +274,15 @@ class Rolemenu(commands.Cog):
                 rolereq = role_mentions_list
 
             # If its the first message in the list, it creates the "header" too.
-            if message_id not in unique_messages:
-                unique_messages.append(message_id)
+            if entry.message_id not in unique_messages:
+                unique_messages.append(entry.message_id)
                 embed_description.append(
-                    f"\n**{message_id}:**\nExclusive: {exclusive} | Role(s) required: {rolereq}\n{emoji} = <@&{role}>"
+                    f"\n**{entry.message_id}:**\nExclusive: {exclusive} | Role(s) required: {rolereq}\n{entry.emoji} = <@&{entry.role}>"
                 )
 
             # Else it will just append.
             else:
-                embed_description.append(f"{emoji} = <@&{role}>")
+                embed_description.append(f"{entry.emoji} = <@&{entry.role}>")
 
         embed_description = "\n".join(embed_description)
 
@@ -295,6 +306,10 @@ class Rolemenu(commands.Cog):
         # The listener to actually add the correct role on a raw reaction event.
         # Also does the checking for the special properties.
 
+        # Almost every reaction is not on a role menu, those stop right here.
+        if (menu := self.menus.get(payload.message_id)) is None:
+            return
+
         # Reactions outside of the server would throw an error otherwise.
         if not payload.guild_id:
             return
@@ -302,69 +317,40 @@ class Rolemenu(commands.Cog):
         if payload.member.bot:
             return
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_entries = await db.execute_fetchall(
-                """SELECT * FROM reactrole WHERE message_id = :message_id""",
-                {"message_id": payload.message_id},
-            )
-
-        if len(matching_entries) == 0:
-            return
+        guild = self.bot.get_guild(payload.guild_id)
+        member_role_ids = {role.id for role in payload.member.roles}
+        wanted_role_ids = menu.emoji_roles.get(str(payload.emoji), ())
 
-        # These values *should* be the same for every entry of a message.
-        exclusive = matching_entries[0][1]
-        rolereq = matching_entries[0][2]
-
-        if rolereq is not None:
-            # You can have more than one required role,
-            # you dont need every though, only one of them will be enough.
+        # You can have more than one required role,
+        # you dont need every though, only one of them will be enough.
+        if menu.required_roles and menu.required_roles.isdisjoint(member_role_ids):
             roles_required = [
-                discord.utils.get(
-                    self.bot.get_guild(payload.guild_id).roles,
-                    id=int(role_required),
-                )
-                for role_required in rolereq.split()
+                guild.get_role(role_id) for role_id in menu.required_roles
             ]
 
-            if all(role not in payload.member.roles for role in roles_required):
-                # Checks if the user does not have the required roles.
-                for entry in matching_entries:
-                    (_, _, _, emoji, role) = entry
-                    # We only send a message if the entry matches.
-                    if str(payload.emoji) == emoji:
-                        wanted_role = discord.utils.get(
-                            self.bot.get_guild(payload.guild_id).roles, id=role
-                        )
-
-                        # Sends a message telling them what roles they need.
-                        try:
-                            await payload.member.send(
-                                f"The role {wanted_role.name} was not added to you "
-                                "due to not having one or more of the following roles: "
-                                f"{', '.join([missing_role.name for missing_role in roles_required])}.\n\n"
-                                f"Check <#{TGChannelIDs.RULES_CHANNEL}> for information "
-                                f"or inquire in <#{TGChannelIDs.HELP_CHANNEL}> if you cannot find the details on the required roles.",
-                            )
-                        except discord.HTTPException:
-                            pass
-                return
-
-        if exclusive == 1:
-            for entry in matching_entries:
-                (_, _, _, _, role) = entry
-                role_tbd = discord.utils.get(
-                    self.bot.get_guild(payload.guild_id).roles, id=role
-                )
-                if role_tbd in payload.member.roles:
-                    await payload.member.remove_roles(role_tbd)
-
-        for entry in matching_entries:
-            (_, _, _, emoji, role) = entry
-            if str(payload.emoji) == emoji:
-                role_tbd = discord.utils.get(
-                    self.bot.get_guild(payload.guild_id).roles, id=role
-                )
-                await payload.member.add_roles(role_tbd)
+            # We only send a message if the entry matches.
+            for role_id in wanted_role_ids:
+                wanted_role = guild.get_role(role_id)
+
+                # Sends a message telling them what roles they need.
+                try:
+                    await payload.member.send(
+                        f"The role {wanted_role.name} was not added to you "
+                        "due to not having one or more of the following roles: "
+                        f"{', '.join([missing_role.name for missing_role in roles_required])}.\n\n"
+                        f"Check <#{TGChannelIDs.RULES_CHANNEL}> for information "
+                        f"or inquire in <#{TGChannelIDs.HELP_CHANNEL}> if you cannot find the details on the required roles.",
+                    )
+                except discord.HTTPException:
+                    pass
+            return
+
+        # Exclusive menus take away every other role of the menu, all in one go.
+        await update_roles(
+            payload.member,
+            add=[guild.get_role(role_id) for role_id in wanted_role_ids],
+            remove=menu.role_ids if menu.exclusive else (),
+        )
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(
@@ -372,29 +358,28 @@ class Rolemenu(commands.Cog):
     ) -> None:
         # The listener to remove the correct role on a raw reaction remove event.
         # Does not need any additional checking.
-        async with aiosqlite.connect("./db/database.db") as db:
-            matching_entries = await db.execute_fetchall(
-                """SELECT * FROM reactrole WHERE message_id = :message_id""",
-                {"message_id": payload.message_id},
-            )
+        if (menu := self.menus.get(payload.message_id)) is None:
+            return
 
-        if len(matching_entries) == 0:
+        if not payload.guild_id:
             return
 
-        for entry in matching_entries:
-            (_, _, _, emoji, role) = entry
-            # The last 20 digits are the emoji ID, if it is custom.
-            # I have to do this because of animated emojis.
-            # And this event here doesnt recognise them properly.
-            # It doesnt send any information on whether or not the emoji is animated or not.
-            if str(payload.emoji)[-20:] == emoji[-20:]:
-                role_tbd = discord.utils.get(
-                    self.bot.get_guild(payload.guild_id).roles, id=role
-                )
-                # Also i have to get the member like this because this event listener is bs.
-                await self.bot.get_guild(payload.guild_id).get_member(
-                    payload.user_id
-                ).remove_roles(role_tbd)
+        # The last 20 digits are the emoji ID, if it is custom.
+        # I have to do this because of animated emojis.
+        # And this event here doesnt recognise them properly.
+        # It doesnt send any information on whether or not the emoji is animated or not.
+        role_ids = menu.removal_roles.get(str(payload.emoji)[-20:], ())
+        if not role_ids:
+            return
+
+        guild = self.bot.get_guild(payload.guild_id)
+        # Also i have to get the member like this because this event listener is bs.
+        member = guild.get_member(payload.user_id)
+        # Members that left the server are not in the cache anymore.
+        if member is None:
+            return
+
+        await update_roles(member, remove=role_ids)
 
     @rolemenu.error
     async def rolemenu_error(
@@ -1,7 +1,8 @@
+import asyncio
 import json
-from datetime import datetime, timezone
+from collections import OrderedDict
+from datetime import timedelta
 
-import aiosqlite
 import discord
 from discord import app_commands
 from discord.ext import commands
@@ -10,6 +11,18 @@ import utils.check
 import utils.embed
 from utils.ids import GuildIDs, TGChannelIDs
 
+STARBOARD_PATH = r"./json/starboard.json"
+
+# How long we wait before editing a starboard message,
+# so that a burst of reactions only results in a single edit.
+EDIT_DELAY = 5
+
+# How many messages we keep the reaction count of, the oldest ones get forgotten first.
+MAX_TRACKED = 1000
+
+# Dont want to update any old messages, 1 week seems fine.
+MAX_AGE = timedelta(days=7)
+
 
 class Starboard(commands.Cog):
     """Contains the Starboard commands and listeners.
@@ -19,30 +32,156 @@ class Starboard(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
 
+        self.config = {}
+        # The amount of starboard reactions on each message, kept up to date with the reaction events.
+        self.counts: OrderedDict[int, int] = OrderedDict()
+        # The original message IDs and the starboard message IDs that belong to them.
+        self.starred: dict[int, int] = {}
+        # The starboard messages we sent or fetched already, by their ID.
+        self.star_messages: OrderedDict[int, discord.Message] = OrderedDict()
+        # The edits waiting for the reactions to calm down, by the original message ID.
+        self.pending_edits: dict[int, asyncio.Task] = {}
+        # The messages we are about to post, so they dont get posted twice.
+        self.posting: set[int] = set()
+
     starboard_channel = TGChannelIDs.STARBOARD_CHANNEL
     listening_channels = TGChannelIDs.STARBOARD_LISTENING_CHANNELS
 
-    async def update_starboard_message(
-        self, reaction: discord.Reaction, message_id: int
-    ) -> None:
+    async def cog_load(self) -> None:
+        self.load_config()
+        self.starred = await self.bot.repo.starboard.get_all()
+
+    async def cog_unload(self) -> None:
+        for task in self.pending_edits.values():
+            task.cancel()
+        self.pending_edits.clear()
+
+    def load_config(self) -> None:
+        with open(STARBOARD_PATH, "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        # These prevent error messages in my console if the setup wasnt done yet.
+        self.config.setdefault("emoji", "placeholder")
+        self.config.setdefault("threshold", 100)
+
+    def save_config(self) -> None:
+        with open(STARBOARD_PATH, "w", encoding="utf-8") as f:
+            json.dump(self.config, f, indent=4)
+
+    def is_tracked(self, payload: discord.RawReactionActionEvent) -> bool:
+        """Checks if a reaction counts towards the starboard, without any API calls."""
+        if payload.channel_id not in self.listening_channels:
+            return False
+
+        if str(payload.emoji) != self.config["emoji"]:
+            return False
+
+        # The message ID already tells us when the message was sent.
+        created_at = discord.utils.snowflake_time(payload.message_id)
+        return discord.utils.utcnow() - created_at <= MAX_AGE
+
+    def set_count(self, message_id: int, count: int) -> None:
+        self.counts[message_id] = count
+        self.counts.move_to_end(message_id)
+
+        if len(self.counts) > MAX_TRACKED:
+            self.counts.popitem(last=False)
+
+    async def get_message(self, channel_id: int, message_id: int) -> discord.Message:
+        """Gets you a message, from the cache if we can."""
+        for message in reversed(self.bot.cached_messages):
+            if message.id == message_id:
+                return message
+
+        channel = self.bot.get_channel(channel_id) or await self.bot.fetch_channel(
+            channel_id
+        )
+        return await channel.fetch_message(message_id)
+
+    async def count_reaction(
+        self, payload: discord.RawReactionActionEvent, change: int
+    ) -> int:
+        """Updates the reaction count of a message and returns it.
+        Only the first reaction on a message needs to look at the message itself,
+        every one after that just changes the number we already have.
+        """
+        if payload.message_id in self.counts:
+            count = max(self.counts[payload.message_id] + change, 0)
+        else:
+            # The message already includes the reaction that we are handling here.
+            message = await self.get_message(payload.channel_id, payload.message_id)
+            count = next(
+                (
+                    reaction.count
+                    for reaction in message.reactions
+                    if str(reaction.emoji) == self.config["emoji"]
+                ),
+                0,
+            )
+
+        self.set_count(payload.message_id, count)
+        return count
+
+    async def get_star_message(self, starboard_id: int) -> discord.Message:
+        if (star_message := self.star_messages.get(starboard_id)) is None:
+            star_channel = self.bot.get_channel(
+                self.starboard_channel
+            ) or await self.bot.fetch_channel(self.starboard_channel)
+            star_message = await star_channel.fetch_message(starboard_id)
+
+        self.cache_star_message(star_message)
+        return star_message
+
+    def cache_star_message(self, star_message: discord.Message) -> None:
+        self.star_messages[star_message.id] = star_message
+        self.star_messages.move_to_end(star_message.id)
+
+        if len(self.star_messages) > MAX_TRACKED:
+            self.star_messages.popitem(last=False)
+
+    def schedule_edit(self, original_id: int) -> None:
+        """Edits the starboard message in a few seconds, unless an edit is already coming up.
+        The edit uses the latest count, so all of the reactions in between are included.
+        """
+        if original_id in self.pending_edits:
+            return
+
+        self.pending_edits[original_id] = asyncio.create_task(
+            self.edit_later(original_id)
+        )
+
+    async def edit_later(self, original_id: int) -> None:
+        await asyncio.sleep(EDIT_DELAY)
+        # Any reaction from now on schedules a new edit.
+        self.pending_edits.pop(original_id, None)
+
+        try:
+            await self.update_starboard_message(original_id)
+        except discord.HTTPException as exc:
+            logger = self.bot.get_logger("bot.starboard")
+            logger.warning(f"Could not update the starboard message: {exc}")
+
+    async def update_starboard_message(self, original_id: int) -> None:
         """Updates the starboard message with the new value for the
         reaction count whenever a reaction is removed or added.
         """
-        star_channel = await self.bot.fetch_channel(self.starboard_channel)
+        if (count := self.counts.get(original_id)) is None:
+            return
 
         try:
-            edit_message = await star_channel.fetch_message(message_id)
-            new_embed = edit_message.embeds[0]
-            new_value = f"**{reaction.count} {str(reaction.emoji)}**"
+            edit_message = await self.get_star_message(self.starred[original_id])
+        except discord.errors.NotFound:
+            return
 
-            if new_embed.fields[0].value == new_value:
-                return
+        new_embed = edit_message.embeds[0]
+        new_value = f"**{count} {self.config['emoji']}**"
 
-            new_embed.set_field_at(0, name="\u200b", value=new_value)
-            await edit_message.edit(embed=new_embed)
-        except discord.errors.NotFound:
+        if new_embed.fields[0].value == new_value:
             return
 
+        new_embed.set_field_at(0, name="\u200b", value=new_value)
+        self.cache_star_message(await edit_message.edit(embed=new_embed))
+
     @commands.hybrid_group()
     @app_commands.guilds(*GuildIDs.ALL_GUILDS)
     @app_commands.default_permissions(administrator=True)
@@ -82,13 +221,11 @@ class Starboard(commands.Cog):
             await ctx.send("Please enter a valid emoji.")
             return
 
-        with open(r"./json/starboard.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        self.config["emoji"] = emoji
+        self.save_config()
 
-        data["emoji"] = emoji
-
-        with open(r"./json/starboard.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+        # The counts we have are for the old emoji.
+        self.counts.clear()
 
         await ctx.send(f"Changed the emoji to: `{emoji}`")
 
@@ -104,13 +241,8 @@ class Starboard(commands.Cog):
             await ctx.send("Please input a valid integer.")
             return
 
-        with open(r"./json/starboard.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        data["threshold"] = threshold
-
-        with open(r"./json/starboard.json", "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4)
+        self.config["threshold"] = threshold
+        self.save_config()
 
         await ctx.send(f"Changed the threshold to: `{threshold}`")
 
@@ -119,86 +251,19 @@ class Starboard(commands.Cog):
         self, payload: discord.RawReactionActionEvent
     ) -> None:
         # The listener for reactions for the starboard.
-        # First we check if the reaction happened in the right channel.
-        if payload.channel_id not in self.listening_channels:
+        # Everything that is not the right emoji on a recent message in the right channel stops here.
+        if not self.is_tracked(payload):
             return
 
-        with open(r"./json/starboard.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        # These prevent error messages in my console if the setup wasnt done yet.
-        if "emoji" not in data:
-            data["emoji"] = "placeholder"
-
-        if "threshold" not in data:
-            data["threshold"] = 100
+        count = await self.count_reaction(payload, 1)
 
-        if str(payload.emoji) != data["emoji"]:
+        # Just editing the number on already existing messages.
+        if payload.message_id in self.starred:
+            self.schedule_edit(payload.message_id)
             return
 
-        channel = await self.bot.fetch_channel(payload.channel_id)
-        message = await channel.fetch_message(payload.message_id)
-
-        # Dont want to update any old messages, 1 week seems fine.
-        if (datetime.now(timezone.utc) - message.created_at).days > 7:
-            return
-
-        for reaction in message.reactions:
-            if (
-                str(reaction.emoji) == data["emoji"]
-                and reaction.count >= data["threshold"]
-            ):
-                async with aiosqlite.connect("./db/database.db") as db:
-                    matching_entry = await db.execute_fetchall(
-                        """SELECT starboard_id FROM starboardmessages WHERE :original_id = original_id""",
-                        {"original_id": payload.message_id},
-                    )
-
-                # Just editing the number on already existing messages.
-                if len(matching_entry) != 0:
-                    await self.update_starboard_message(reaction, matching_entry[0][0])
-                    return
-
-                # If it doesnt already exist, it creates a new message.
-                star_channel = await self.bot.fetch_channel(self.starboard_channel)
-
-                # Again dont want error messages,
-                # so if the content is invalid it gets replaced by a whitespace character.
-                if len(message.content) == 0 or len(message.content[2000:]) > 0:
-                    message.content = "\u200b"
-
-                embed = discord.Embed(
-                    description=message.content,
-                    colour=message.author.colour,
-                )
-                embed.add_field(
-                    name="\u200b",
-                    value=f"**{reaction.count} {str(reaction.emoji)}**",
-                )
-                embed.add_field(
-                    name="\u200b",
-                    value=f"[Message Link]({message.jump_url})",
-                )
-                embed.set_author(
-                    name=f"{str(message.author)} ({message.author.id})",
-                    icon_url=message.author.display_avatar.url,
-                )
-                embed.set_footer(text=f"{message.id}")
-                embed.timestamp = discord.utils.utcnow()
-
-                embed = utils.embed.add_attachments_to_embed(embed, message)
-
-                star_message = await star_channel.send(embed=embed)
-
-                async with aiosqlite.connect("./db/database.db") as db:
-                    await db.execute(
-                        """INSERT INTO starboardmessages VALUES (:original_id, :starboard_id)""",
-                        {
-                            "original_id": message.id,
-                            "starboard_id": star_message.id,
-                        },
-                    )
-                    await db.commit()
+        if count >= self.config["threshold"]:
+            await self.post_starboard_message(payload.channel_id, payload.message_id)
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(
@@ -206,44 +271,85 @@ class Starboard(commands.Cog):
     ) -> None:
         # If the amount of reactions to a starboard message decrease,
         # we also wanna update the message then.
-        if payload.channel_id not in self.listening_channels:
+        if not self.is_tracked(payload):
             return
 
-        with open(r"./json/starboard.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
+        await self.count_reaction(payload, -1)
 
-        # These prevent error messages in my console if the setup wasnt done yet.
-        if "emoji" not in data:
-            data["emoji"] = "placeholder"
+        if payload.message_id in self.starred:
+            self.schedule_edit(payload.message_id)
 
-        if "threshold" not in data:
-            data["threshold"] = 100
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear(
+        self, payload: discord.RawReactionClearEvent
+    ) -> None:
+        # These dont come with a reaction remove event for every single reaction.
+        self.reset_count(payload.message_id)
 
-        if str(payload.emoji) != data["emoji"]:
-            return
+    @commands.Cog.listener()
+    async def on_raw_reaction_clear_emoji(
+        self, payload: discord.RawReactionClearEmojiEvent
+    ) -> None:
+        if str(payload.emoji) == self.config["emoji"]:
+            self.reset_count(payload.message_id)
+
+    def reset_count(self, message_id: int) -> None:
+        if message_id in self.counts or message_id in self.starred:
+            self.set_count(message_id, 0)
 
-        channel = await self.bot.fetch_channel(payload.channel_id)
-        message = await channel.fetch_message(payload.message_id)
+        if message_id in self.starred:
+            self.schedule_edit(message_id)
 
-        # Dont want to update any old messages, 1 week seems fine.
-        if (datetime.now(timezone.utc) - message.created_at).days > 7:
+    async def post_starboard_message(self, channel_id: int, message_id: int) -> None:
+        """Posts a message to the starboard channel, once it reaches the threshold."""
+        if message_id in self.posting:
             return
 
-        for reaction in message.reactions:
-            if (
-                str(reaction.emoji) == data["emoji"]
-                and reaction.count >= data["threshold"]
-            ):
-                async with aiosqlite.connect("./db/database.db") as db:
-                    matching_entry = await db.execute_fetchall(
-                        """SELECT starboard_id FROM starboardmessages WHERE :original_id = original_id""",
-                        {"original_id": payload.message_id},
-                    )
-
-                # Just editing the number on already existing messages.
-                if len(matching_entry) != 0:
-                    await self.update_starboard_message(reaction, matching_entry[0][0])
-                    return
+        self.posting.add(message_id)
+
+        try:
+            message = await self.get_message(channel_id, message_id)
+            star_channel = self.bot.get_channel(
+                self.starboard_channel
+            ) or await self.bot.fetch_channel(self.starboard_channel)
+
+            # Again dont want error messages,
+            # so if the content is invalid it gets replaced by a whitespace character.
+            content = message.content
+            if len(content) == 0 or len(content[2000:]) > 0:
+                content = "\u200b"
+
+            embed = discord.Embed(
+                description=content,
+                colour=message.author.colour,
+            )
+            embed.add_field(
+                name="\u200b",
+                value=f"**{self.counts.get(message_id, 0)} {self.config['emoji']}**",
+            )
+            embed.add_field(
+                name="\u200b",
+                value=f"[Message Link]({message.jump_url})",
+            )
+            embed.set_author(
+                name=f"{str(message.author)} ({message.author.id})",
+                icon_url=message.author.display_avatar.url,
+            )
+            embed.set_footer(text=f"{message.id}")
+            embed.timestamp = discord.utils.utcnow()
+
+            embed = utils.embed.add_attachments_to_embed(embed, message)
+
+            star_message = await star_channel.send(embed=embed)
+        finally:
+            self.posting.discard(message_id)
+
+        self.starred[message_id] = star_message.id
+        self.cache_star_message(star_message)
+        await self.bot.repo.starboard.add(message_id, star_message.id)
+
+        # Reactions that came in while we were posting get picked up by an edit.
+        self.schedule_edit(message_id)
 
     @starboard.error
     async def starboard_error(
@@ -3,7 +3,6 @@ import os
 import platform
 import time
 
-import aiosqlite
 import discord
 import psutil
 from discord import app_commands
@@ -45,13 +44,13 @@ class Stats(commands.Cog):
         sorted_members = sorted(ctx.guild.members, key=lambda x: x.joined_at)
         index = sorted_members.index(member)
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            badges = await db.execute_fetchall(
-                """SELECT badges FROM userbadges WHERE :user_id = user_id""",
-                {"user_id": member.id},
-            )
+        user_badges = await self.bot.repo.badges.get(member.id)
 
-        badges = "None" if len(badges) == 0 or badges[0][0] == "" else badges[0][0]
+        badges = (
+            " ".join(user_badges.badges)
+            if user_badges and user_badges.badges
+            else "None"
+        )
 
         embed = discord.Embed(
             title=f"Userinfo of {member.name}#{member.discriminator} ({member.id})",
@@ -188,7 +187,7 @@ class Stats(commands.Cog):
         invites = await ctx.guild.invites()
 
         ssbu_guild = self.bot.get_guild(GuildIDs.TRAINING_GROUNDS)
-        staff_role = discord.utils.get(ssbu_guild.roles, id=TGRoleIDs.MOD_ROLE)
+        staff_role = self.bot.roles.get(ssbu_guild, TGRoleIDs.MOD_ROLE)
         staff_online = [
             member
             for member in staff_role.members
@@ -249,8 +248,7 @@ class Stats(commands.Cog):
         ram_total = round(psutil.virtual_memory()[0] / (1024 * 1024 * 1024), 2)
         ram_percent = round((ram_used / ram_total) * 100, 1)
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            macro_list = await db.execute_fetchall("""SELECT name FROM macros""")
+        macro_list = await self.bot.repo.macros.get_names()
 
         # This also walks through the subcommands of each group command .get_commands() would miss those.
         slash_commands = sum(
@@ -269,6 +267,8 @@ class Stats(commands.Cog):
 
         message_commands = len(list(self.bot.walk_commands()))
 
+        write_stats = self.bot.db.queue.stats()
+
         # We use codeblocks with yml syntax highlighting
         # just cause it looks nice, in my opinion.
         # Well at least it does on desktop.
@@ -309,6 +309,7 @@ Number of Events: {len(self.bot.extra_events)}
 ```yml
 Commands executed: {self.bot.commands_ran}
 Events parsed: {self.bot.events_listened_to}
+Database writes: {write_stats['statements']} ({round(write_stats['statements_per_transaction'], 1)} per commit)
 ```
         """
 
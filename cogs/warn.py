@@ -1,7 +1,5 @@
 import datetime
-import random
 
-import aiosqlite
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
@@ -28,22 +26,12 @@ class Warn(commands.Cog):
         """Adds a warning to the database.
         Also logs it to our infraction-logs channel.
         """
-        # Assigning each warning a random 6 digit number, hope thats enough to not get duplicates.
-        warn_id = random.randint(100000, 999999)
         warndate = int(discord.utils.utcnow().timestamp())
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """INSERT INTO warnings VALUES (:user_id, :warn_id, :mod_id, :reason, :timestamp)""",
-                {
-                    "user_id": member.id,
-                    "warn_id": warn_id,
-                    "mod_id": author.id,
-                    "reason": reason,
-                    "timestamp": warndate,
-                },
-            )
-            await db.commit()
+        # Every warning gets a random 6 digit number, which the moderators can delete it by.
+        warn_id = await self.bot.repo.warnings.add(
+            member.id, author.id, reason, warndate
+        )
 
         # And this second part here logs the warn into the warning log discord channel.
         channel = self.bot.get_channel(TGChannelIDs.INFRACTION_LOGS)
@@ -70,13 +58,7 @@ class Warn(commands.Cog):
         Also DMs them informing the User of said action.
         """
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_warnings = await db.execute_fetchall(
-                """SELECT * FROM warnings WHERE user_id = :user_id""",
-                {"user_id": member.id},
-            )
-
-        warns = len(user_warnings)
+        warns = await self.bot.repo.warnings.count(member.id)
 
         if warns > 4:
             try:
@@ -155,13 +137,7 @@ class Warn(commands.Cog):
         if member is None:
             member = ctx.author
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_warnings = await db.execute_fetchall(
-                """SELECT * FROM warnings WHERE user_id = :user_id""",
-                {"user_id": member.id},
-            )
-
-        warns = len(user_warnings)
+        warns = await self.bot.repo.warnings.count(member.id)
 
         if warns == 0:
             await ctx.send(f"{member.mention} doesn't have any warnings (yet).")
@@ -175,12 +151,7 @@ class Warn(commands.Cog):
     @utils.check.is_moderator()
     async def clearwarns(self, ctx: commands.Context, member: discord.Member) -> None:
         """Deletes all warnings of a user from the database."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """DELETE FROM warnings WHERE user_id = :user_id""",
-                {"user_id": member.id},
-            )
-            await db.commit()
+        await self.bot.repo.warnings.clear(member.id)
 
         await ctx.send(f"Cleared all warnings for {member.mention}.")
 
@@ -191,11 +162,7 @@ class Warn(commands.Cog):
     @utils.check.is_moderator()
     async def warndetails(self, ctx: commands.Context, user: discord.User) -> None:
         """Gets you the details of a Users warnings."""
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_warnings = await db.execute_fetchall(
-                """SELECT * FROM warnings WHERE user_id = :user_id""",
-                {"user_id": user.id},
-            )
+        user_warnings = await self.bot.repo.warnings.get_by_user(user.id)
 
         if len(user_warnings) == 0:
             await ctx.send(f"{user.mention} doesn't have any active warnings (yet).")
@@ -208,14 +175,13 @@ class Warn(commands.Cog):
 
         # We can add 25 warnings to the embed, you get banned at 5.
         for i, warning in enumerate(user_warnings, start=1):
-            # The first one is the user id, but we dont need it here.
-            (_, warn_id, mod_id, reason, timestamp) = warning
+            reason = warning.reason
             if len(reason[150:]) > 0:
                 reason = f"{reason[:147]}..."
 
             embed.add_field(
-                name=f"#{i} - ID: {warn_id}",
-                value=f"**Given by: <@{mod_id}> at <t:{timestamp}:F>\nReason:**\n{reason}",
+                name=f"#{i} - ID: {warning.warn_id}",
+                value=f"**Given by: <@{warning.mod_id}> at <t:{warning.timestamp}:F>\nReason:**\n{reason}",
                 inline=False,
             )
 
@@ -235,23 +201,11 @@ class Warn(commands.Cog):
         """Deletes a specific warning of a user, by the randomly generated warning ID.
         Use warndetails to see these warning IDs.
         """
-        async with aiosqlite.connect("./db/database.db") as db:
-            warning = await db.execute_fetchall(
-                """SELECT * FROM warnings WHERE user_id = :user_id AND warn_id = :warn_id""",
-                {"user_id": member.id, "warn_id": warn_id},
-            )
-
-            if len(warning) == 0:
-                await ctx.send(
-                    f"I couldnt find a warning with the ID {warn_id} for {member.mention}."
-                )
-                return
-
-            await db.execute(
-                """DELETE FROM warnings WHERE user_id = :user_id AND warn_id = :warn_id""",
-                {"user_id": member.id, "warn_id": warn_id},
+        if not await self.bot.repo.warnings.delete(member.id, warn_id):
+            await ctx.send(
+                f"I couldnt find a warning with the ID {warn_id} for {member.mention}."
             )
-            await db.commit()
+            return
 
         await ctx.send(f"Deleted warning {warn_id} for {member.mention}")
 
@@ -262,13 +216,12 @@ class Warn(commands.Cog):
         if not interaction.namespace.member:
             return []
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            user_warnings = await db.execute_fetchall(
-                """SELECT warn_id FROM warnings WHERE user_id = :user_id""",
-                {"user_id": interaction.namespace.member.id},
+        warn_ids = [
+            str(warn_id)
+            for warn_id in await self.bot.repo.warnings.get_ids(
+                interaction.namespace.member.id
             )
-
-        warn_ids = [str(warn[0]) for warn in user_warnings]
+        ]
 
         # We dont really need the fuzzy search here, this is all just numbers.
         choices = [
@@ -288,15 +241,11 @@ class Warn(commands.Cog):
 
         expires_at = discord.utils.utcnow() - datetime.timedelta(days=30)
 
-        async with aiosqlite.connect("./db/database.db") as db:
-            await db.execute(
-                """DELETE FROM warnings WHERE timestamp < :expires_at""",
-                {"expires_at": int(expires_at.timestamp())},
-            )
-
-            await db.commit()
+        deleted = await self.bot.repo.warnings.delete_expired(
+            int(expires_at.timestamp())
+        )
 
-        logger.info("Warnloop finished.")
+        logger.info(f"Warnloop finished, deleted {deleted} expired warning(s).")
 
     @warnloop.before_loop
     async def before_warnloop(self) -> None:
@@ -4,7 +4,13 @@ from logging import Logger
 import discord
 from discord.ext import commands
 
+import utils.db
+import utils.db.stats
 import utils.logger
+import utils.pings
+import utils.pipeline
+import utils.roles
+import utils.scheduler
 import utils.sqlite
 
 
@@ -27,15 +33,67 @@ class Tabuu3(commands.Bot):
         # A check to make sure persistent buttons do not get added twice.
         self.modmail_button_added = None
 
+        # The shared database connections, every cog goes through these.
+        self.db = utils.sqlite.Database()
+        # And the queries for every table, built on top of those.
+        self.repo = utils.db.Repositories(self.db)
+        # So that slow queries can be traced back to the command they came from.
+        self.before_invoke(utils.db.stats.track_command)
+
+        # The active matchmaking pings of every type, saved to disk every once in a while.
+        self.mm_pings = utils.pings.PingStore()
+        # Runs the callbacks the cogs schedule, like deleting those pings after 30 minutes.
+        self.scheduler = utils.scheduler.ExpiryScheduler()
+        # The role objects of the role IDs we use, so we dont have to search for them every time.
+        self.roles = utils.roles.RoleRegistry()
+
+        # Every message gets parsed once and then goes through the stages the cogs register.
+        self.message_pipeline = utils.pipeline.MessagePipeline(self.main_prefix)
+        self.message_pipeline.register(
+            "commands", self.command_stage, utils.pipeline.StagePriority.COMMANDS
+        )
+
     async def setup_hook(self) -> None:
         # We need to set up some stuff at startup.
         utils.logger.create_logger()
         await utils.sqlite.setup_db()
+        await self.db.start()
+        await self.mm_pings.start()
+        await self.scheduler.start()
 
         for filename in os.listdir(r"./cogs"):
             if filename.endswith(".py"):
                 await self.load_extension(f"cogs.{filename[:-3]}")
 
+    async def close(self) -> None:
+        await super().close()
+        await self.scheduler.close()
+        await self.mm_pings.close()
+        # Closing the database last, so that the cogs can still write on their way out.
+        await self.db.close()
+
+    async def on_message(self, message: discord.Message) -> None:
+        # Dont want any recursive stuff to happen, so our own messages are skipped entirely.
+        if message.author == self.user:
+            return
+
+        await self.message_pipeline.dispatch(message)
+
+    async def command_stage(self, parsed: utils.pipeline.ParsedMessage) -> bool:
+        await self.process_commands(parsed.message)
+        return True
+
+    async def on_guild_role_create(self, role: discord.Role) -> None:
+        self.roles.invalidate(role)
+
+    async def on_guild_role_update(
+        self, before: discord.Role, after: discord.Role
+    ) -> None:
+        self.roles.invalidate(after)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        self.roles.invalidate(role)
+
     def get_logger(self, name: str) -> Logger:
         # Just attaching it to the bot so we dont have to import it everywhere.
         return utils.logger.get_logger(name)
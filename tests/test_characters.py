@@ -0,0 +1,58 @@
+import json
+import os
+import tempfile
+import unittest
+
+from utils.characters import CharacterRegistry
+
+
+def write_characters(filepath: str, characters: list[dict], mtime: int) -> None:
+    with open(filepath, "w", encoding="utf-8") as f:
+        json.dump({"Characters": characters}, f)
+
+    # Some file systems only keep the mtime to the second.
+    os.utime(filepath, (mtime, mtime))
+
+
+class TestCharacterRegistry(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tempdir.name, "characters.json")
+
+        self.characters = [
+            {"name": "roy", "id": ["13e"], "emoji": ":Roy:", "aliases": ["chroy"]},
+            {"name": "chrom", "id": ["25e"], "emoji": ":Chrom:", "aliases": ["chroy"]},
+        ]
+        write_characters(self.filepath, self.characters, 1000)
+
+        self.registry = CharacterRegistry(self.filepath)
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_match(self) -> None:
+        self.assertEqual(
+            [c.emoji for c in self.registry.match("Chroy, roy")], [":Roy:", ":Chrom:"]
+        )
+        self.assertEqual([c.emoji for c in self.registry.match(" 25E ")], [":Chrom:"])
+        self.assertEqual(self.registry.match("nobody"), [])
+        self.assertEqual(self.registry.match(None), [])
+
+    def test_reload(self) -> None:
+        self.assertEqual(self.registry.autocomplete("ro"), ("Roy", "Chrom"))
+
+        # Nothing changed yet.
+        self.assertFalse(self.registry.reload())
+
+        self.characters.append(
+            {"name": "rob", "id": ["62"], "emoji": ":Rob:", "aliases": []}
+        )
+        write_characters(self.filepath, self.characters, 2000)
+
+        self.assertTrue(self.registry.reload())
+        self.assertEqual([c.emoji for c in self.registry.match("62")], [":Rob:"])
+        self.assertIn("Rob", self.registry.autocomplete("ro"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,270 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from utils.db import Repositories
+from utils.db.base import chunked
+from utils.db.ranking import RankedMatchRow, RankingRow
+from utils.db.reminders import ReminderRow
+from utils.db.stats import QueryStats, current_origin, normalise_sql
+from utils.sqlite import Database, setup_db
+
+
+def calculate(winner_elo: int, loser_elo: int) -> tuple[int, int]:
+    return winner_elo + 16, loser_elo - 16
+
+
+class TestRepositories(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        filepath = os.path.join(self.tempdir.name, "test.db")
+        await setup_db(filepath)
+
+        self.db = Database(filepath, readers=1)
+        await self.db.start()
+        self.repo = Repositories(self.db)
+
+    async def asyncTearDown(self) -> None:
+        await self.db.close()
+        self.tempdir.cleanup()
+
+    def test_chunked(self) -> None:
+        self.assertEqual(list(chunked([1, 2, 2, 3, 4], 2)), [[1, 2], [3, 4]])
+        self.assertEqual(list(chunked([])), [])
+
+    async def test_ranking(self) -> None:
+        await self.repo.ranking.report_match(1, 2, calculate)
+
+        self.assertEqual(await self.repo.ranking.get(1), RankingRow(1, 1, 0, 1016))
+        self.assertEqual(await self.repo.ranking.get_record(2), (0, 1))
+        self.assertEqual(await self.repo.ranking.get_record(3), (0, 0))
+        self.assertIsNone(await self.repo.ranking.get_elo(3))
+
+        self.assertEqual(await self.repo.ranking.get_all_elos(), {1: 1016, 2: 984})
+
+        players = await self.repo.ranking.get_many(range(1000))
+        self.assertEqual(sorted(players), [1, 2])
+
+    async def test_ranked_matches(self) -> None:
+        await self.repo.ranking.report_match(1, 2, calculate, timestamp=100)
+        await self.repo.ranking.report_match(2, 3, calculate, timestamp=200)
+        await self.repo.ranking.report_match(1, 3, calculate, timestamp=300)
+
+        recent = await self.repo.ranking.get_recent_matches(2)
+        self.assertEqual(
+            recent,
+            [
+                RankedMatchRow(2, 2, 3, 984, 1000, 1000, 984, 200),
+                RankedMatchRow(1, 1, 2, 1000, 1016, 1000, 984, 100),
+            ],
+        )
+
+        recent = await self.repo.ranking.get_recent_matches(1, limit=1)
+        self.assertEqual([match.match_id for match in recent], [3])
+
+    async def test_report_match(self) -> None:
+        # No profiles yet, these get created on the way.
+        match = await self.repo.ranking.report_match(1, 2, calculate, timestamp=100)
+        self.assertEqual(match, RankedMatchRow(1, 1, 2, 1000, 1016, 1000, 984, 100))
+
+        # Reporting a lot of matches at once does not lose any of them.
+        matches = await asyncio.gather(
+            *(self.repo.ranking.report_match(1, 3, calculate) for _ in range(20))
+        )
+
+        self.assertEqual(await self.repo.ranking.get(1), RankingRow(1, 21, 0, 1336))
+        self.assertEqual(await self.repo.ranking.get(3), RankingRow(3, 0, 20, 680))
+        self.assertEqual(
+            sorted(match.winner_elo_before for match in matches),
+            list(range(1016, 1336, 16)),
+        )
+
+    async def test_apply_replay(self) -> None:
+        await self.repo.ranking.report_match(1, 2, calculate)
+        await self.repo.ranking.report_match(3, 1, calculate)
+
+        history = await self.repo.ranking.get_match_history()
+        self.assertEqual([match.match_id for match in history], [1, 2])
+
+        # Throwing out the second match.
+        self.assertTrue(
+            await self.repo.ranking.apply_replay(
+                {1: (1016, 1, 0), 2: (984, 0, 1), 3: (1000, 0, 0)},
+                [(1, 1000, 1016, 1000, 984)],
+                [2],
+                2,
+            )
+        )
+
+        self.assertEqual(await self.repo.ranking.get(1), RankingRow(1, 1, 0, 1016))
+        self.assertEqual(await self.repo.ranking.get(3), RankingRow(3, 0, 0, 1000))
+        self.assertEqual(
+            [match.match_id for match in await self.repo.ranking.get_match_history()],
+            [1],
+        )
+
+    async def test_apply_outdated_replay(self) -> None:
+        await self.repo.ranking.report_match(1, 2, calculate)
+        history = await self.repo.ranking.get_match_history()
+
+        # Someone reports a match while the replay is running.
+        await self.repo.ranking.report_match(2, 1, calculate)
+
+        self.assertFalse(
+            await self.repo.ranking.apply_replay(
+                {1: (1016, 1, 0), 2: (984, 0, 1)},
+                [(1, 1000, 1016, 1000, 984)],
+                [],
+                history[-1].match_id,
+            )
+        )
+
+        # The new match is still there, and counted.
+        self.assertEqual(await self.repo.ranking.get_record(1), (1, 1))
+        self.assertEqual(len(await self.repo.ranking.get_match_history()), 2)
+
+    async def test_profile(self) -> None:
+        self.assertIsNone(await self.repo.profile.get_with_elo(1))
+
+        await self.repo.profile.set_field(1, "user#0001", "mains", "A B")
+        await self.repo.profile.set_field(2, "user#0002", "mains", "B")
+        await self.repo.profile.set_field(2, "user#0002", "pockets", "A")
+        await self.repo.ranking.report_match(2, 3, calculate)
+
+        profile, elo = await self.repo.profile.get_with_elo(1)
+        self.assertEqual((profile.tag, profile.mains, elo), ("user#0001", "A B", None))
+        self.assertEqual((await self.repo.profile.get_with_elo(2))[1], 1016)
+
+        # The solo-main comes first.
+        self.assertEqual(await self.repo.profile.find_players("B"), ([2, 1], [], []))
+        self.assertEqual(await self.repo.profile.find_players("A"), ([1], [], [2]))
+
+        # Changing the mains forgets the old ones.
+        await self.repo.profile.set_field(2, "user#0002", "mains", "C")
+        self.assertEqual(await self.repo.profile.find_players("B"), ([1], [], []))
+        self.assertEqual(await self.repo.profile.find_players("C"), ([2], [], []))
+
+        with self.assertRaises(ValueError):
+            await self.repo.profile.set_field(1, "user#0001", "user_id", 2)
+
+        self.assertTrue(await self.repo.profile.delete(1))
+        self.assertFalse(await self.repo.profile.delete(1))
+        self.assertEqual(await self.repo.profile.find_players("A"), ([], [], [2]))
+
+    async def test_badges(self) -> None:
+        self.assertIsNone(await self.repo.badges.remove_badge(1, "a"))
+
+        self.assertEqual(await self.repo.badges.add_badges(1, ["a", "b"]), ["a", "b"])
+        self.assertEqual(await self.repo.badges.add_badges(1, ["b", "c"]), ["c"])
+
+        self.assertFalse(await self.repo.badges.remove_badge(1, "d"))
+        self.assertTrue(await self.repo.badges.remove_badge(1, "b"))
+
+        self.assertEqual((await self.repo.badges.get(1)).badges, ["a", "c"])
+        self.assertEqual(await self.repo.badges.get_users_with("c"), [1])
+
+    async def test_macros(self) -> None:
+        self.assertTrue(await self.repo.macros.add("test", "payload", 1))
+        self.assertFalse(await self.repo.macros.add("test", "other payload", 1))
+
+        await self.repo.macros.add_uses({"test": 1})
+        await self.repo.macros.add_uses({"test": 3, "missing": 1})
+
+        macro = await self.repo.macros.get("test")
+        self.assertEqual((macro.payload, macro.uses), ("payload", 4))
+        self.assertEqual(await self.repo.macros.get_payloads(), {"test": "payload"})
+
+        self.assertTrue(await self.repo.macros.delete("test"))
+        self.assertEqual(await self.repo.macros.get_names(), [])
+
+    async def test_reminders(self) -> None:
+        later = ReminderRow(1, 100, 10, 2000, "1 hour", "later")
+        sooner = ReminderRow(1, 101, 10, 1000, "1 minute", "sooner")
+        other = ReminderRow(2, 100, 10, 1500, "1 minute", "other")
+
+        with mock.patch("random.randint", side_effect=[100, 101, 100]):
+            for reminder in (later, sooner, other):
+                await self.repo.reminders.add(reminder)
+
+        self.assertEqual(await self.repo.reminders.get_all(), [sooner, other, later])
+
+        await self.repo.reminders.delete_many([sooner, other])
+        self.assertEqual(await self.repo.reminders.get_all(), [later])
+
+    async def test_random_ids(self) -> None:
+        # The second warning rolls the same ID as the first one, so it has to pick another.
+        with mock.patch("random.randint", side_effect=[5, 5, 6, 5]):
+            self.assertEqual(await self.repo.warnings.add(1, 10, "first", 1000), 5)
+            self.assertEqual(await self.repo.warnings.add(1, 10, "second", 1001), 6)
+            # Another user can have the same ID.
+            self.assertEqual(await self.repo.warnings.add(2, 10, "third", 1002), 5)
+
+        self.assertEqual(await self.repo.warnings.get_ids(1), [5, 6])
+
+        # Gives up at some point, if every ID it picks is taken.
+        with mock.patch("random.randint", return_value=6):
+            with self.assertRaises(sqlite3.IntegrityError):
+                await self.repo.warnings.add(1, 10, "fourth", 1003)
+
+    async def test_starboard(self) -> None:
+        await self.repo.starboard.add(1, 10)
+        # The first starboard message stays.
+        await self.repo.starboard.add(1, 11)
+        await self.repo.starboard.add(2, 12)
+
+        self.assertEqual(await self.repo.starboard.get_all(), {1: 10, 2: 12})
+
+    async def test_levels(self) -> None:
+        await self.repo.levels.save({1: 10, 2: 25})
+        await self.repo.levels.save({2: 26, 3: 50})
+        await self.repo.levels.save({})
+
+        self.assertEqual(await self.repo.levels.get_all(), {1: 10, 2: 26, 3: 50})
+
+    async def test_statements_recorded(self) -> None:
+        await self.repo.ranking.get_many([1, 2, 3])
+        await self.repo.ranking.get_many([1])
+
+        statement = self.db.stats.statements[
+            "SELECT user_id, wins, losses, elo FROM ranking WHERE user_id IN (?...)"
+        ]
+        self.assertEqual(statement.calls, 2)
+
+
+class TestQueryStats(unittest.TestCase):
+    def test_normalise_sql(self) -> None:
+        self.assertEqual(
+            normalise_sql("""SELECT *\n    FROM x WHERE id IN (?, ?, ?)"""),
+            "SELECT * FROM x WHERE id IN (?...)",
+        )
+
+    def test_percentiles(self) -> None:
+        stats = QueryStats(slow_query_ms=1000)
+
+        for _ in range(98):
+            stats.record("SELECT 1", 0.00001)
+        stats.record("SELECT 1", 0.01)
+        stats.record("SELECT 1", 0.5)
+
+        statement = stats.top(1)[0]
+        self.assertEqual(statement.calls, 100)
+        self.assertEqual(statement.percentile(50), 0.05)
+        self.assertEqual(statement.percentile(99), 12.8)
+        self.assertEqual(statement.percentile(100), 500)
+
+    def test_slow_query_log(self) -> None:
+        stats = QueryStats(slow_query_ms=10)
+        token = current_origin.set("Ranking, command leaderboard")
+
+        with self.assertLogs("discord.bot.db", level="WARNING") as logs:
+            stats.record("SELECT 1", 0.02)
+
+        current_origin.reset(token)
+        self.assertIn("Ranking, command leaderboard", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
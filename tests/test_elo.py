@@ -0,0 +1,115 @@
+import random
+import unittest
+
+import numpy as np
+
+from cogs.ranking import Ranking
+from utils.db.ranking import DEFAULT_ELO, RankedMatchRow, RankingRow
+from utils.elo import K_SCHEDULES, k_factors, replay
+
+
+class TestElo(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(3)
+        self.history = []
+
+        for match_id in range(1, 3001):
+            winner, loser = rng.sample(range(1, 41), 2)
+            self.history.append(
+                RankedMatchRow(match_id, winner, loser, None, None, None, None, None)
+            )
+
+    def test_same_as_reporting(self) -> None:
+        # Reporting every match one after another.
+        elos = {}
+        for match in self.history:
+            winner_elo = elos.get(match.winner_id, DEFAULT_ELO)
+            loser_elo = elos.get(match.loser_id, DEFAULT_ELO)
+            elos[match.winner_id], elos[match.loser_id], _ = Ranking.calculate_elo(
+                self, winner_elo, loser_elo
+            )
+
+        result = replay(self.history, [])
+
+        self.assertEqual(
+            {user_id: player.elo for user_id, player in result.players.items()}, elos
+        )
+        self.assertEqual(len(result.matches), 3000)
+
+        # The elo after one match is the elo before the next one.
+        last_elo = {}
+        for (
+            match_id,
+            winner_before,
+            winner_after,
+            loser_before,
+            loser_after,
+        ) in result.matches:
+            match = self.history[match_id - 1]
+            self.assertEqual(last_elo.get(match.winner_id, DEFAULT_ELO), winner_before)
+            self.assertEqual(last_elo.get(match.loser_id, DEFAULT_ELO), loser_before)
+            last_elo[match.winner_id], last_elo[match.loser_id] = (
+                winner_after,
+                loser_after,
+            )
+
+    def test_k_factors(self) -> None:
+        self.assertEqual(
+            k_factors(K_SCHEDULES["provisional"])(
+                np.array([0, 9, 10, 29, 30, 500])
+            ).tolist(),
+            [48, 48, 32, 32, 24, 24],
+        )
+
+    def test_void(self) -> None:
+        history = [
+            RankedMatchRow(2, 1, 2, None, None, None, None, None),
+            RankedMatchRow(3, 3, 1, None, None, None, None, None),
+            RankedMatchRow(4, 2, 3, None, None, None, None, None),
+        ]
+
+        result = replay(history, [1, 2, 3, 4], voided_players=[3])
+
+        self.assertEqual(result.voided, [3, 4])
+        self.assertEqual([match[0] for match in result.matches], [2])
+
+        self.assertEqual((result.players[1].wins, result.players[1].losses), (1, 0))
+        self.assertEqual(result.players[1].elo, 1016)
+        self.assertEqual(result.players[3].elo, DEFAULT_ELO)
+        self.assertEqual(result.players[4].elo, DEFAULT_ELO)
+
+        # Player 4 has not played, so they stay at the default elo.
+        self.assertEqual(
+            result.diff({1: 1030, 2: 984, 3: 1016}),
+            [(3, 1016, 1000), (1, 1030, 1016)],
+        )
+
+    def test_baseline(self) -> None:
+        history = [RankedMatchRow(1, 1, 2, None, None, None, None, None)]
+        baseline = {1: RankingRow(1, 20, 10, 1100), 3: RankingRow(3, 0, 1, 984)}
+
+        result = replay(history, [1, 2, 3], baseline=baseline)
+
+        # The old record and elo are the starting point, instead of the default.
+        winner_elo, loser_elo, _ = Ranking.calculate_elo(self, 1100, DEFAULT_ELO)
+        self.assertEqual(result.matches, [(1, 1100, winner_elo, 1000, loser_elo)])
+        self.assertEqual(
+            (result.players[1].elo, result.players[1].wins, result.players[1].losses),
+            (winner_elo, 21, 10),
+        )
+
+        # Nothing new since then, so nothing changes.
+        self.assertEqual(
+            (result.players[3].elo, result.players[3].wins, result.players[3].losses),
+            (984, 0, 1),
+        )
+
+        # The old games count towards the K-factor as well, player 1 is past the first 30 games.
+        provisional = replay(
+            history, [1, 2], K_SCHEDULES["provisional"], baseline=baseline
+        )
+        self.assertEqual(provisional.matches, [(1, 1100, 1109, 1000, 983)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from utils.leaderboard import Leaderboard
+
+
+class TestLeaderboard(unittest.TestCase):
+    def setUp(self) -> None:
+        self.leaderboard = Leaderboard(
+            {1: 1000, 2: 1200, 3: 900, 4: 1000, 5: 1100}.items()
+        )
+
+    def test_rank(self) -> None:
+        self.assertEqual(self.leaderboard.rank(2), 1)
+        self.assertEqual(self.leaderboard.rank(5), 2)
+        # Same elo, same rank.
+        self.assertEqual(self.leaderboard.rank(1), 3)
+        self.assertEqual(self.leaderboard.rank(4), 3)
+        self.assertEqual(self.leaderboard.rank(3), 5)
+        self.assertIsNone(self.leaderboard.rank(6))
+
+    def test_update(self) -> None:
+        self.leaderboard.update(3, 1300)
+        self.leaderboard.update(6, 1000)
+
+        self.assertEqual(self.leaderboard.rank(3), 1)
+        self.assertEqual(self.leaderboard.rank(6), 4)
+        self.assertEqual(len(self.leaderboard), 6)
+
+        self.leaderboard.remove(3)
+        self.assertNotIn(3, self.leaderboard)
+        self.assertEqual([e.user_id for e in self.leaderboard.top(2)], [2, 5])
+
+    def test_pages(self) -> None:
+        first = self.leaderboard.top(2)
+        self.assertEqual([(e.rank, e.user_id) for e in first], [(1, 2), (2, 5)])
+
+        second = self.leaderboard.page_after(first[-1].cursor, 2)
+        self.assertEqual([(e.rank, e.user_id) for e in second], [(3, 1), (3, 4)])
+
+        # Someone climbing the ladder does not mess up the next page.
+        self.leaderboard.update(3, 1500)
+        third = self.leaderboard.page_after(second[-1].cursor, 2)
+        self.assertEqual([e.user_id for e in third], [])
+
+        back = self.leaderboard.page_before(second[0].cursor, 2)
+        self.assertEqual([e.user_id for e in back], [2, 5])
+        self.assertEqual(self.leaderboard.page_before(back[0].cursor, 2)[0].elo, 1500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from mee6_py_api.exceptions import HTTPRequestError
+
+from benchmarks.level_sync import FakeBot, FakeGuild, benchmark, parse_args
+from benchmarks.mee6_server import LeaderboardServer, local_api, make_players
+from cogs.mee6api import Mee6api
+from utils.db import Repositories
+from utils.ids import GuildIDs
+from utils.levels import RateLimiter, diff_levels, fetch_levels
+from utils.sqlite import Database, setup_db
+from utils.tiers import TierTable
+
+
+class TestLevels(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.fetched = []
+
+        # 250 players on 3 pages, going down one level every 10 players.
+        pages = [[], [], []]
+        for i in range(250):
+            pages[i // 100].append({"id": str(i), "level": 40 - i // 10})
+
+        async def get_page(page: int) -> dict:
+            self.fetched.append(page)
+            return {"players": pages[page] if page < len(pages) else []}
+
+        self.get_page = get_page
+
+    async def test_fetch_levels(self) -> None:
+        levels = await fetch_levels(self.get_page, 10, concurrency=2)
+
+        # Everyone is at least level 16, so we only stop at the empty page.
+        self.assertEqual(len(levels), 250)
+        self.assertEqual(levels[0], 40)
+        self.assertEqual(levels[249], 16)
+        self.assertEqual(sorted(self.fetched), [0, 1, 2, 3])
+
+    async def test_fetch_levels_stops_early(self) -> None:
+        levels = await fetch_levels(self.get_page, 35, concurrency=2)
+
+        self.assertEqual(len(levels), 60)
+        self.assertEqual(min(levels.values()), 35)
+        # The first page was enough already.
+        self.assertEqual(sorted(self.fetched), [0, 1])
+
+    async def test_rate_limiter(self) -> None:
+        limiter = RateLimiter(2, 0.05)
+
+        start = time.monotonic()
+        for _ in range(5):
+            await limiter.wait()
+
+        # 2 right away, then 2 more after one period, and the last one after another.
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+
+    def test_diff_levels(self) -> None:
+        table = TierTable([10, 25, 50])
+        synced = {1: 12, 2: 24, 3: 30, 6: 15, 7: 5}
+        levels = {1: 12, 2: 25, 3: 31, 4: 11, 5: 60, 6: 15, 7: 5}
+
+        changes = diff_levels(
+            synced, levels, table, {1: 1, 2: 1, 3: 2, 4: None, 6: None, 7: None}
+        )
+
+        # Player 5 is not in the server.
+        self.assertEqual(changes.levels, {2: 25, 3: 31, 4: 11})
+        self.assertEqual(changes.tier_changes, {2, 4})
+        # Player 6 lost their role, player 7 is below the first tier.
+        self.assertEqual(changes.repaired, {6})
+
+    @mock.patch("utils.levels.PAGE_RETRY_BACKOFF", 0)
+    async def test_fetch_levels_error_after_end(self) -> None:
+        async def get_page(page: int) -> dict:
+            if page == 1:
+                raise HTTPRequestError("Page 1 is down")
+            # The first page already goes below the minimum level.
+            return {"players": [{"id": "1", "level": 20}, {"id": "2", "level": 5}]}
+
+        # We would have stopped at the first page anyways, so the error does not matter.
+        levels = await fetch_levels(get_page, 10, concurrency=2)
+        self.assertEqual(levels, {1: 20})
+
+    @mock.patch("utils.levels.PAGE_RETRY_BACKOFF", 0)
+    async def test_fetch_levels_retries(self) -> None:
+        failures = {1: 2}
+        get_page = self.get_page
+
+        async def flaky_page(page: int) -> dict:
+            if failures.get(page):
+                failures[page] -= 1
+                raise HTTPRequestError("Made up error")
+            return await get_page(page)
+
+        levels = await fetch_levels(flaky_page, 10, concurrency=2)
+        self.assertEqual(len(levels), 250)
+
+        # Gives up once a page failed every time.
+        failures[2] = 3
+        with self.assertRaises(HTTPRequestError):
+            await fetch_levels(flaky_page, 10, concurrency=2)
+
+
+class TestLevelSync(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        filepath = os.path.join(self.tempdir.name, "test.db")
+        await setup_db(filepath)
+        self.database = Database(filepath, readers=1)
+        await self.database.start()
+
+        self.server = LeaderboardServer(make_players(300, seed=1), seed=1)
+        await self.server.start()
+        self.api = local_api(self.server.url, GuildIDs.LEADERBOARD_GUILD)
+
+        bot = FakeBot(Repositories(self.database))
+        self.guild = FakeGuild(range(1, 301), bot.roles.role_ids, 0)
+        self.cog = Mee6api(bot)
+
+    async def asyncTearDown(self) -> None:
+        await self.server.close()
+        await self.database.close()
+        self.tempdir.cleanup()
+
+    @mock.patch("utils.levels.PAGE_RETRY_BACKOFF", 0)
+    async def test_repair_without_leaderboard(self) -> None:
+        await self.cog.sync_level_roles(self.guild, self.api)
+
+        # Someone took away the level role by hand.
+        member = next(member for member in self.guild.members if len(member.roles) > 1)
+        member.roles = [self.guild.default_role]
+
+        # The leaderboard is down, so the levels of the last sync have to do.
+        self.server.error_rate = 1
+        with self.assertLogs("discord.bot.level", "WARNING"):
+            changes = await self.cog.sync_level_roles(self.guild, self.api)
+
+        self.assertEqual(changes.levels, {})
+        self.assertEqual(changes.repaired, {member.id})
+        self.assertEqual(len(member.roles), 2)
+
+    async def test_benchmark(self) -> None:
+        first, second = await benchmark(
+            parse_args(["--members", "300", "--level-ups", "0.1", "--no-trace"])
+        )
+
+        # Everyone at level 10 or above gets their role the first time around.
+        self.assertGreater(first.role_edits, 0)
+        self.assertEqual(first.role_edits, first.changed)
+        # The second time, only the ones that moved to a new tier.
+        self.assertLess(second.role_edits, first.role_edits)
+        self.assertLessEqual(second.role_edits, second.changed)
+        self.assertEqual(first.page_requests, second.page_requests)
+        self.assertEqual(first.failed_requests, 0)
+
+    @mock.patch("utils.levels.PAGE_RETRY_BACKOFF", 0)
+    async def test_benchmark_errors(self) -> None:
+        # Half the page requests fail, the sync tries them again instead of giving up right away.
+        results = await benchmark(
+            parse_args(
+                [
+                    "--members",
+                    "1000",
+                    "--error-rate",
+                    "0.5",
+                    "--runs",
+                    "4",
+                    "--no-trace",
+                ]
+            )
+        )
+
+        self.assertEqual(len(results), 4)
+        for result in results:
+            self.assertGreater(result.failed_requests, 0)
+            self.assertGreater(result.page_requests, result.failed_requests)
+            self.assertIn(f"{result.failed_requests} failed", str(result))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import asyncio
+import unittest
+
+from utils.locks import KeyedLock
+
+
+class TestKeyedLock(unittest.IsolatedAsyncioTestCase):
+    async def test_keyed_lock(self) -> None:
+        locks = KeyedLock()
+        order = []
+
+        async def hold(key: int, name: str) -> None:
+            async with locks(key):
+                order.append(f"{name} start")
+                await asyncio.sleep(0.01)
+                order.append(f"{name} end")
+
+        await asyncio.gather(hold(1, "a"), hold(1, "b"), hold(2, "c"))
+
+        # The same key waits its turn, another key does not have to.
+        self.assertLess(order.index("a end"), order.index("b start"))
+        self.assertLess(order.index("c start"), order.index("a end"))
+
+        # Nobody holds or waits for them anymore, so they are gone.
+        self.assertEqual(len(locks), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
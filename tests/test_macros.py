@@ -0,0 +1,46 @@
+import sqlite3
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import utils.logger
+from cogs.macros import Macros
+
+
+class TestMacroUses(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.add_uses = mock.AsyncMock()
+        bot = SimpleNamespace(
+            repo=SimpleNamespace(macros=SimpleNamespace()),
+            get_logger=utils.logger.get_logger,
+        )
+        bot.repo.macros.add_uses = self.add_uses
+
+        self.cog = Macros(bot)
+        self.cog.macros = {"hello": "hi", "bye": "cya"}
+
+    async def test_flush_uses(self) -> None:
+        self.cog.pending_uses.update({"hello": 2, "bye": 1})
+        await self.cog.flush_uses()
+
+        self.add_uses.assert_awaited_once_with({"hello": 2, "bye": 1})
+        self.assertFalse(self.cog.pending_uses)
+
+    async def test_failed_flush(self) -> None:
+        self.cog.pending_uses.update({"hello": 2, "bye": 1})
+        self.add_uses.side_effect = sqlite3.OperationalError("database is locked")
+
+        with self.assertLogs("discord.bot.macros", "ERROR"):
+            await self.cog.flush_uses()
+
+        # The uses are kept for the next try.
+        self.assertEqual(self.cog.pending_uses, {"hello": 2, "bye": 1})
+
+        self.add_uses.side_effect = None
+        self.cog.pending_uses["hello"] += 1
+        await self.cog.flush_uses()
+        self.add_uses.assert_awaited_with({"hello": 3, "bye": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import os
+import tempfile
+import unittest
+
+from utils.pings import MatchmakingPing, PingStore, format_pings
+
+
+class TestPingStore(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.files = {
+            mm_type: os.path.join(self.tempdir.name, f"{mm_type}.json")
+            for mm_type in ("singles", "ranked")
+        }
+        self.store = PingStore(self.files, ttl=1800)
+
+    async def asyncTearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_recent(self) -> None:
+        self.store.add("singles", MatchmakingPing(1, 10, 1000.0, None))
+        self.store.add("singles", MatchmakingPing(2, 10, 1100.0, None))
+        # Pinging again moves you to the front.
+        self.store.add("singles", MatchmakingPing(1, 11, 1200.0, None))
+
+        recent = self.store.recent("singles", 1300.0)
+        self.assertEqual([ping.user_id for ping in recent], [1, 2])
+        self.assertEqual(self.store.recent("ranked", 1300.0), [])
+
+        # The first ping of user 2 has expired by now.
+        recent = self.store.recent("singles", 2950.0)
+        self.assertEqual([ping.user_id for ping in recent], [1])
+
+    def test_remove(self) -> None:
+        self.store.add("singles", MatchmakingPing(1, 10, 1000.0, None))
+        self.store.add("singles", MatchmakingPing(1, 10, 1500.0, None))
+
+        # The older ping is gone already, so the newer one stays.
+        self.assertFalse(self.store.remove("singles", 1, 1000.0))
+        self.assertTrue(self.store.remove("singles", 1, 1500.0))
+        self.assertFalse(self.store.remove("singles", 1))
+
+    def test_format_pings(self) -> None:
+        pings = [MatchmakingPing(1, 10, 1000.0, 5), MatchmakingPing(2, 11, 400.0, None)]
+
+        self.assertEqual(
+            format_pings(pings, 1000.0),
+            "<@&5> | <@!1>, in <#10>, 0 minutes ago\n<@!2>, in <#11>, 10 minutes ago\n",
+        )
+        self.assertEqual(
+            format_pings([], 1000.0), "Looks like no one has pinged recently :("
+        )
+
+    async def test_snapshot(self) -> None:
+        self.store.add("singles", MatchmakingPing(1, 10, 1000.0, None))
+        self.store.add("ranked", MatchmakingPing(2, 11, 1000.0, 5))
+        self.store.add("ranked", MatchmakingPing(3, 11, 100.0, 5))
+        await self.store.snapshot()
+
+        with open(self.files["ranked"], encoding="utf-8") as f:
+            self.assertEqual(
+                json.load(f)["2"], {"channel": 11, "time": 1000.0, "rank": 5}
+            )
+
+        store = PingStore(self.files, ttl=1800)
+        await store.restore(2000.0)
+
+        self.assertEqual(
+            store.recent("singles", 2000.0), [MatchmakingPing(1, 10, 1000.0, None)]
+        )
+        # The ping of user 3 expired while we were offline.
+        self.assertEqual(
+            store.recent("ranked", 2000.0), [MatchmakingPing(2, 11, 1000.0, 5)]
+        )
+
+    async def test_restore_missing_files(self) -> None:
+        with self.assertLogs("discord.bot.mm", level="WARNING"):
+            await self.store.restore(0.0)
+
+        self.assertEqual(self.store.recent("singles", 0.0), [])
+
+    async def test_close_saves(self) -> None:
+        with self.assertLogs("discord.bot.mm", level="WARNING"):
+            await self.store.start()
+
+        self.store.add("singles", MatchmakingPing(1, 10, 2e10, None))
+        await self.store.close()
+
+        with open(self.files["singles"], encoding="utf-8") as f:
+            self.assertIn("1", json.load(f))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from types import SimpleNamespace
+
+from utils.pipeline import MessagePipeline, ParsedMessage
+
+
+def make_message(content: str, guild_id: int = None) -> SimpleNamespace:
+    return SimpleNamespace(
+        content=content,
+        guild=SimpleNamespace(id=guild_id) if guild_id else None,
+        channel=SimpleNamespace(id=2),
+        author=SimpleNamespace(id=3),
+    )
+
+
+class TestMessagePipeline(unittest.IsolatedAsyncioTestCase):
+    def test_parse(self) -> None:
+        parsed = ParsedMessage.parse(make_message("%Macro Some Text", 1), "%")
+        self.assertTrue(parsed.has_prefix)
+        self.assertEqual(parsed.first_token, "Macro")
+        self.assertEqual((parsed.guild_id, parsed.channel_id), (1, 2))
+        self.assertEqual(parsed.role_ids, frozenset())
+
+        parsed = ParsedMessage.parse(make_message("hello there"), "%")
+        self.assertFalse(parsed.has_prefix)
+        self.assertEqual(parsed.first_token, "hello")
+        self.assertIsNone(parsed.guild_id)
+
+    async def test_dispatch(self) -> None:
+        pipeline = MessagePipeline("%")
+        calls = []
+
+        async def stage_filter(parsed: ParsedMessage) -> bool:
+            calls.append("filter")
+            return "bad" in parsed.content.lower()
+
+        async def stage_macros(parsed: ParsedMessage) -> bool:
+            calls.append("macros")
+            return False
+
+        async def stage_broken(parsed: ParsedMessage) -> bool:
+            raise RuntimeError
+
+        # Registered out of order on purpose.
+        pipeline.register("macros", stage_macros, 50)
+        pipeline.register("filter", stage_filter, 0)
+        pipeline.register("broken", stage_broken, 10)
+
+        with self.assertLogs("discord.bot.messages", level="ERROR"):
+            await pipeline.dispatch(make_message("fine"))
+        self.assertEqual(calls, ["filter", "macros"])
+
+        calls.clear()
+        await pipeline.dispatch(make_message("BAD"))
+        self.assertEqual(calls, ["filter"])
+
+        stages = {stage.name: stage for stage in pipeline.stages}
+        self.assertEqual(
+            [stage.name for stage in pipeline.stages], ["filter", "broken", "macros"]
+        )
+        self.assertEqual((stages["filter"].calls, stages["filter"].stops), (2, 1))
+        self.assertEqual(stages["macros"].calls, 1)
+        self.assertEqual(pipeline.messages, 2)
+
+        pipeline.unregister("broken")
+        self.assertEqual(len(pipeline.stages), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
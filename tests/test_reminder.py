@@ -0,0 +1,150 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from typing import Optional
+from unittest import mock
+
+import discord
+
+import utils.logger
+from cogs.reminder import Reminder
+from utils.db.reminders import ReminderRow
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, sent: list, failures: int = 0) -> None:
+        self.id = channel_id
+        self.sent = sent
+        self.failures = failures
+
+    async def send(self, content: str) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise discord.DiscordServerError(
+                SimpleNamespace(status=503, reason="Service Unavailable"), "down"
+            )
+
+        # Gives the other channels a chance to run in between.
+        await asyncio.sleep(0)
+        self.sent.append((self.id, content))
+
+
+class TestReminderDelivery(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.sent = []
+        self.deleted = []
+        self.scheduled = []
+        self.fetched = []
+        # The IDs of the reminders the users deleted themselves.
+        self.removed = set()
+
+        self.channels = {
+            1: FakeChannel(1, self.sent),
+            2: FakeChannel(2, self.sent, failures=1),
+            3: FakeChannel(3, self.sent, failures=10),
+        }
+
+        async def wait_until_ready() -> None:
+            pass
+
+        async def fetch_channel(channel_id: int) -> FakeChannel:
+            self.fetched.append(channel_id)
+            return FakeChannel(channel_id, self.sent)
+
+        async def get(user_id: int, reminder_id: int) -> Optional[ReminderRow]:
+            if reminder_id in self.removed:
+                return None
+            return ReminderRow(user_id, reminder_id, 1, 100, "1 minute", "saved")
+
+        async def delete_many(reminders: list) -> None:
+            self.deleted.extend(reminders)
+
+        bot = SimpleNamespace(
+            get_logger=utils.logger.get_logger,
+            wait_until_ready=wait_until_ready,
+            get_channel=self.channels.get,
+            fetch_channel=fetch_channel,
+            repo=SimpleNamespace(
+                reminders=SimpleNamespace(get=get, delete_many=delete_many)
+            ),
+            scheduler=SimpleNamespace(
+                schedule=lambda *args, **kwargs: self.scheduled.append(args)
+            ),
+        )
+
+        self.cog = Reminder(bot)
+        self.cog.delivery_slots = asyncio.Semaphore(2)
+
+    @mock.patch("cogs.reminder.RETRY_BACKOFF", 0)
+    async def test_deliver_reminders(self) -> None:
+        reminders = [
+            ReminderRow(10, 1, 1, 100, "1 minute", "first"),
+            ReminderRow(10, 2, 2, 100, "1 minute", "retried"),
+            ReminderRow(11, 3, 1, 100, "1 minute", "second"),
+            ReminderRow(11, 4, 3, 100, "1 minute", "failing"),
+            ReminderRow(12, 5, 4, 100, "1 minute", "uncached"),
+        ]
+
+        with self.assertLogs("discord.bot.reminder", level="WARNING"):
+            await self.cog.deliver_reminders(reminders)
+
+        # The reminders of the same channel stay in order.
+        channel_one = [content for channel, content in self.sent if channel == 1]
+        self.assertIn("`first`", channel_one[0])
+        self.assertIn("`second`", channel_one[1])
+
+        # Only the uncached channel had to be fetched.
+        self.assertEqual(self.fetched, [4])
+
+        # The failing one did not get deleted, but scheduled again.
+        self.assertEqual(
+            sorted(reminder.reminder_id for reminder in self.deleted), [1, 2, 3, 5]
+        )
+        self.assertEqual([args[3].reminder_id for args in self.scheduled], [4])
+
+        # The locks of the channels are gone again, once every reminder went out.
+        self.assertEqual(len(self.cog.channel_locks), 0)
+
+    @mock.patch("cogs.reminder.RETRY_BACKOFF", 0.05)
+    async def test_retry_frees_slot(self) -> None:
+        self.cog.delivery_slots = asyncio.Semaphore(1)
+        failing = self.channels[3]
+        channel_one = self.channels[1]
+        # How often the failing channel failed, by the time channel 1 gets its reminder.
+        failures = []
+
+        async def send(content: str) -> None:
+            failures.append(10 - failing.failures)
+            await FakeChannel.send(channel_one, content)
+
+        channel_one.send = send
+
+        reminders = [
+            ReminderRow(10, 1, 3, 100, "1 minute", "failing"),
+            ReminderRow(11, 2, 1, 100, "1 minute", "waiting"),
+        ]
+
+        with self.assertLogs("discord.bot.reminder", level="WARNING"):
+            await self.cog.deliver_reminders(reminders)
+
+        # Channel 1 did not have to wait for every try of the failing channel.
+        self.assertEqual(len(failures), 1)
+        self.assertLess(failures[0], 3)
+        self.assertEqual([reminder.reminder_id for reminder in self.deleted], [2])
+
+    async def test_deleted_reminder(self) -> None:
+        reminders = [
+            ReminderRow(10, 1, 1, 100, "1 minute", "deleted"),
+            ReminderRow(10, 2, 1, 100, "1 minute", "kept"),
+        ]
+        self.removed.add(1)
+
+        await self.cog.deliver_reminders(reminders)
+
+        self.assertEqual(len(self.sent), 1)
+        self.assertIn("`kept`", self.sent[0][1])
+        self.assertEqual([reminder.reminder_id for reminder in self.deleted], [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
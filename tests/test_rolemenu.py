@@ -0,0 +1,71 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from cogs.rolemenu import RoleMenu, Rolemenu
+from utils.db.reactrole import ReactRoleRow
+
+
+class TestRoleMenu(unittest.TestCase):
+    def test_from_entries(self) -> None:
+        animated = "<a:tabuu:123456789012345678>"
+        menu = RoleMenu.from_entries(
+            [
+                ReactRoleRow(1, True, "10 11", "👍", 100),
+                ReactRoleRow(1, True, "10 11", "👍", 101),
+                ReactRoleRow(1, True, "10 11", animated, 102),
+            ]
+        )
+
+        self.assertTrue(menu.exclusive)
+        self.assertEqual(menu.required_roles, {10, 11})
+        self.assertEqual(menu.emoji_roles["👍"], (100, 101))
+        self.assertEqual(menu.role_ids, {100, 101, 102})
+        # The remove event sends us the emoji without the animated part.
+        self.assertEqual(
+            menu.removal_roles["<:tabuu:123456789012345678>"[-20:]], (102,)
+        )
+
+    def test_no_requirements(self) -> None:
+        menu = RoleMenu.from_entries([ReactRoleRow(2, False, None, "👍", 100)])
+
+        self.assertFalse(menu.exclusive)
+        self.assertEqual(menu.required_roles, frozenset())
+
+
+class TestReactionRemove(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.role = SimpleNamespace(id=100, is_default=lambda: False)
+        self.member = mock.Mock(roles=[self.role])
+        self.member.remove_roles = mock.AsyncMock()
+        self.members = {1: self.member}
+
+        guild = SimpleNamespace(get_member=mock.Mock(side_effect=self.members.get))
+        self.guild = guild
+        self.cog = Rolemenu(SimpleNamespace(get_guild=lambda guild_id: guild))
+        self.cog.menus[10] = RoleMenu.from_entries(
+            [ReactRoleRow(10, False, None, "👍", 100)]
+        )
+
+    async def remove_reaction(self, emoji: str, user_id: int) -> None:
+        await self.cog.on_raw_reaction_remove(
+            SimpleNamespace(message_id=10, guild_id=2, emoji=emoji, user_id=user_id)
+        )
+
+    async def test_remove_role(self) -> None:
+        await self.remove_reaction("👍", 1)
+        self.member.remove_roles.assert_awaited_once_with(self.role, reason=None)
+
+    async def test_no_role(self) -> None:
+        # An emoji that is not part of the menu, we do not even look up the member.
+        await self.remove_reaction("👎", 1)
+        self.guild.get_member.assert_not_called()
+        self.member.remove_roles.assert_not_awaited()
+
+    async def test_uncached_member(self) -> None:
+        await self.remove_reaction("👍", 3)
+        self.member.remove_roles.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
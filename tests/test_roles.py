@@ -0,0 +1,125 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+
+import discord
+
+from utils.roles import RoleRegistry, reconcile_roles, update_roles
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, role_ids: list[int]) -> None:
+        self.id = guild_id
+        self.roles = {
+            role_id: SimpleNamespace(id=role_id, guild=self) for role_id in role_ids
+        }
+        self.lookups = 0
+
+    def get_role(self, role_id: int) -> SimpleNamespace:
+        self.lookups += 1
+        return self.roles.get(role_id)
+
+
+class FakeRole(discord.Object):
+    def is_default(self) -> bool:
+        return self.id == 0
+
+
+class FakeMember:
+    """Only remembers which roles got added and removed, the cached roles never change."""
+
+    def __init__(self, role_ids: list[int]) -> None:
+        self.roles = [FakeRole(role_id) for role_id in role_ids]
+        self.added = []
+        self.removed = []
+
+    async def add_roles(self, *roles: FakeRole, reason: str = None) -> None:
+        await asyncio.sleep(0)
+        self.added.extend(role.id for role in roles)
+
+    async def remove_roles(self, *roles: FakeRole, reason: str = None) -> None:
+        await asyncio.sleep(0)
+        self.removed.extend(role.id for role in roles)
+
+
+class TestUpdateRoles(unittest.IsolatedAsyncioTestCase):
+    async def test_update_roles(self) -> None:
+        member = FakeMember([0, 1, 2])
+
+        self.assertTrue(await update_roles(member, [FakeRole(3)], {2, 4}))
+        self.assertEqual((member.added, member.removed), ([3], [2]))
+
+        # Nothing to do, so nothing gets sent.
+        self.assertFalse(await update_roles(member, [FakeRole(1)], {4}))
+        self.assertEqual((member.added, member.removed), ([3], [2]))
+
+    async def test_concurrent_updates(self) -> None:
+        member = FakeMember([0, 1])
+
+        # With the whole list of roles, the second update would take away the first role again.
+        await asyncio.gather(
+            update_roles(member, [FakeRole(2)]),
+            update_roles(member, [FakeRole(3)], {1}),
+        )
+
+        self.assertEqual(sorted(member.added), [2, 3])
+        self.assertEqual(member.removed, [1])
+
+
+class TestRoles(unittest.TestCase):
+    def test_reconcile_roles(self) -> None:
+        current = [discord.Object(1), discord.Object(2), discord.Object(3)]
+
+        target = reconcile_roles(current, [discord.Object(4)], {2, 3})
+        self.assertEqual([role.id for role in target], [1, 4])
+
+        # A role in both gets kept.
+        target = reconcile_roles(current, [discord.Object(2), None], {2, 3})
+        self.assertEqual([role.id for role in target], [1, 2])
+
+    def test_nothing_changed(self) -> None:
+        current = [discord.Object(1), discord.Object(2)]
+
+        self.assertIsNone(reconcile_roles(current, [discord.Object(2)], {3, 4}))
+        self.assertIsNone(reconcile_roles(current))
+
+    def test_role_registry(self) -> None:
+        registry = RoleRegistry({1, 2}, {"tiers": (3, 4, 5)})
+        guild = FakeGuild(10, [1, 3, 5, 6])
+
+        self.assertEqual(registry.get(guild, 1).id, 1)
+        self.assertIsNone(registry.get(guild, 2))
+        self.assertEqual(
+            [role and role.id for role in registry.group(guild, "tiers")],
+            [3, None, 5],
+        )
+
+        # Every known role got resolved once, after that it is just a dict lookup.
+        self.assertEqual(guild.lookups, 5)
+        registry.get(guild, 3)
+        self.assertEqual(guild.lookups, 5)
+
+        # Roles we dont know about go straight to the guild.
+        self.assertEqual(registry.get(guild, 6).id, 6)
+        self.assertEqual(guild.lookups, 6)
+
+    def test_role_registry_invalidate(self) -> None:
+        registry = RoleRegistry({1}, {"tiers": (2, 3)})
+        guild = FakeGuild(10, [1, 2])
+        other_guild = FakeGuild(11, [1])
+
+        registry.group(guild, "tiers")
+        registry.get(other_guild, 1)
+
+        # Unrelated roles do not drop anything.
+        self.assertFalse(registry.invalidate(SimpleNamespace(id=4, guild=guild)))
+
+        # Someone created the missing tier role.
+        guild.roles[3] = SimpleNamespace(id=3, guild=guild)
+        self.assertTrue(registry.invalidate(guild.roles[3]))
+        self.assertEqual([role.id for role in registry.group(guild, "tiers")], [2, 3])
+        self.assertIn(other_guild.id, registry.guilds)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from utils.scheduler import ExpiryScheduler
+
+
+class TestExpiryScheduler(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tempdir.name, "expirations.json")
+        self.scheduler = ExpiryScheduler(self.filepath)
+
+        self.fired = []
+
+        async def handler(payloads: list) -> None:
+            self.fired.append(payloads)
+
+        self.handler = handler
+
+    async def asyncTearDown(self) -> None:
+        await self.scheduler.close()
+        self.tempdir.cleanup()
+
+    def test_pop_due(self) -> None:
+        self.scheduler.schedule("ping", "a", 30, "a")
+        self.scheduler.schedule("ping", "b", 10, "b")
+        self.scheduler.schedule("other", "c", 20, "c")
+        # Rescheduling replaces the old one.
+        self.scheduler.schedule("ping", "b", 40, "b2")
+        self.scheduler.schedule("ping", "d", 15, "d")
+        self.assertTrue(self.scheduler.cancel("ping", "d"))
+        self.assertFalse(self.scheduler.cancel("ping", "d"))
+
+        due = self.scheduler.pop_due(35)
+        self.assertEqual([e.payload for e in due["ping"]], ["a"])
+        self.assertEqual([e.payload for e in due["other"]], ["c"])
+
+        self.assertEqual(list(self.scheduler.pop_due(40)), ["ping"])
+        self.assertEqual(self.scheduler.entries, {})
+        self.assertEqual(self.scheduler.pop_due(1000), {})
+
+    async def test_fire_due(self) -> None:
+        self.scheduler.schedule("ping", "a", 10, 1)
+        self.scheduler.schedule("ping", "b", 10, 2)
+
+        # Without a handler, the expirations wait until one is registered.
+        self.assertEqual(await self.scheduler.fire_due(20), 0)
+
+        self.scheduler.register_handler("ping", self.handler)
+        self.assertEqual(await self.scheduler.fire_due(20), 2)
+        self.assertEqual(self.fired, [[1, 2]])
+
+    async def test_restart(self) -> None:
+        self.scheduler.schedule("ping", "a", 10, {"user_id": 1})
+        self.scheduler.schedule("ping", "b", 2e10, {"user_id": 2})
+        await self.scheduler.snapshot()
+
+        scheduler = ExpiryScheduler(self.filepath)
+        await scheduler.restore()
+        scheduler.register_handler("ping", self.handler)
+
+        # The first one expired while we were offline.
+        await scheduler.fire_due(time.time())
+        self.assertEqual(self.fired, [[{"user_id": 1}]])
+        self.assertEqual(list(scheduler.entries), [("ping", "b")])
+
+    async def test_not_persistent(self) -> None:
+        self.scheduler.schedule("reminder", "1:100", 2e10, object(), persistent=False)
+        self.scheduler.schedule("reminder", "1:101", 2e10, object(), persistent=False)
+        self.scheduler.schedule("ping", "a", 2e10, "a")
+        await self.scheduler.snapshot()
+
+        scheduler = ExpiryScheduler(self.filepath)
+        await scheduler.restore()
+        self.assertEqual(list(scheduler.entries), [("ping", "a")])
+
+        self.assertEqual(self.scheduler.cancel_kind("reminder"), 2)
+        self.assertEqual(list(self.scheduler.entries), [("ping", "a")])
+
+    async def test_loop(self) -> None:
+        self.scheduler.register_handler("ping", self.handler)
+        await self.scheduler.start()
+
+        self.scheduler.schedule("ping", "a", time.time() + 0.05, "a")
+        self.scheduler.schedule("ping", "b", time.time(), "b")
+
+        for _ in range(50):
+            if sum(len(payloads) for payloads in self.fired) == 2:
+                break
+            await asyncio.sleep(0.01)
+
+        self.assertEqual([p for payloads in self.fired for p in payloads], ["b", "a"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,304 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import aiosqlite
+
+from utils.sqlite import MIGRATIONS, Database, get_schema_version, setup_db
+
+
+class TestDatabase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tempdir.name, "test.db")
+        await setup_db(self.filepath)
+
+        self.db = Database(self.filepath, readers=2)
+        await self.db.start()
+
+    async def asyncTearDown(self) -> None:
+        await self.db.close()
+        self.tempdir.cleanup()
+
+    async def test_write_and_read(self) -> None:
+        async with self.db.write() as db:
+            await db.execute(
+                """INSERT INTO muted VALUES (:user_id, :muted)""",
+                {"user_id": 1, "muted": True},
+            )
+
+        # Committed on exit, so the readers see it.
+        async with self.db.read() as db:
+            rows = await db.execute_fetchall("""SELECT user_id FROM muted""")
+
+        self.assertEqual(list(rows), [(1,)])
+
+        async with self.db.read() as db:
+            journal_mode = await db.execute_fetchall("""PRAGMA journal_mode""")
+
+        self.assertEqual(journal_mode[0][0], "wal")
+
+    async def test_write_rollback(self) -> None:
+        with self.assertRaises(ValueError):
+            async with self.db.write() as db:
+                await db.execute(
+                    """INSERT INTO muted VALUES (:user_id, :muted)""",
+                    {"user_id": 2, "muted": True},
+                )
+                raise ValueError
+
+        async with self.db.read() as db:
+            rows = await db.execute_fetchall("""SELECT user_id FROM muted""")
+
+        self.assertEqual(list(rows), [])
+
+    async def test_read_only(self) -> None:
+        with self.assertRaises(sqlite3.OperationalError):
+            async with self.db.read() as db:
+                await db.execute("""DELETE FROM muted""")
+
+    async def test_write_queue(self) -> None:
+        await asyncio.gather(
+            *(
+                self.db.queue.submit(
+                    """INSERT INTO muted VALUES (:user_id, :muted)""",
+                    {"user_id": user_id, "muted": True},
+                )
+                for user_id in range(10)
+            )
+        )
+
+        async with self.db.read() as db:
+            rows = await db.execute_fetchall("""SELECT COUNT(*) FROM muted""")
+
+        self.assertEqual(rows[0][0], 10)
+
+        stats = self.db.queue.stats()
+        self.assertEqual(stats["statements"], 10)
+        self.assertEqual(stats["transactions"], 1)
+
+    async def test_write_queue_failure(self) -> None:
+        # The duplicate user_id fails, but the other statements still go through.
+        results = await asyncio.gather(
+            self.db.queue.submit("""INSERT INTO muted VALUES (1, 1)"""),
+            self.db.queue.submit("""INSERT INTO muted VALUES (1, 1)"""),
+            self.db.queue.submit("""INSERT INTO muted VALUES (2, 1)"""),
+            return_exceptions=True,
+        )
+
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], sqlite3.IntegrityError)
+        self.assertIsNone(results[2])
+
+        async with self.db.read() as db:
+            rows = await db.execute_fetchall("""SELECT user_id FROM muted""")
+
+        self.assertEqual(sorted(rows), [(1,), (2,)])
+
+    async def test_write_queue_commit_failure(self) -> None:
+        with mock.patch.object(
+            self.db._writer,
+            "commit",
+            side_effect=sqlite3.OperationalError("disk I/O error"),
+        ):
+            results = await asyncio.gather(
+                self.db.queue.submit("""INSERT INTO muted VALUES (4, 1)"""),
+                self.db.queue.submit("""INSERT INTO muted VALUES (5, 1)"""),
+                return_exceptions=True,
+            )
+
+        # Nothing got committed, and we are not stuck in the failed transaction.
+        for result in results:
+            self.assertIsInstance(result, sqlite3.OperationalError)
+        self.assertFalse(self.db._writer.in_transaction)
+
+        await self.db.queue.execute("""INSERT INTO muted VALUES (6, 1)""")
+
+        async with self.db.read() as db:
+            rows = await db.execute_fetchall("""SELECT user_id FROM muted""")
+
+        self.assertEqual(list(rows), [(6,)])
+        self.assertEqual(self.db.queue.stats()["failed_statements"], 2)
+
+    async def test_write_queue_close(self) -> None:
+        future = self.db.queue.submit("""INSERT INTO muted VALUES (3, 1)""")
+
+        # Closing flushes whatever is still waiting.
+        await self.db.queue.close()
+        await future
+
+        async with self.db.read() as db:
+            rows = await db.execute_fetchall("""SELECT user_id FROM muted""")
+
+        self.assertEqual(list(rows), [(3,)])
+
+    async def test_write_queue_close_during_flush(self) -> None:
+        # Someone else is writing, so the flush is stuck waiting for the writer.
+        await self.db._write_lock.acquire()
+        future = self.db.queue.submit("""INSERT INTO muted VALUES (7, 1)""")
+        await asyncio.sleep(self.db.queue.interval * 4)
+
+        close = asyncio.create_task(self.db.queue.close())
+        await asyncio.sleep(0)
+        self.db._write_lock.release()
+
+        # The batch that was being written still makes it.
+        await asyncio.wait_for(close, timeout=5)
+        await asyncio.wait_for(future, timeout=5)
+
+        async with self.db.read() as db:
+            rows = await db.execute_fetchall("""SELECT user_id FROM muted""")
+
+        self.assertEqual(list(rows), [(7,)])
+
+
+class TestMigrations(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.filepath = os.path.join(self.tempdir.name, "test.db")
+
+    async def asyncTearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    async def test_fresh_database(self) -> None:
+        await setup_db(self.filepath)
+
+        async with aiosqlite.connect(self.filepath) as db:
+            self.assertEqual(await get_schema_version(db), len(MIGRATIONS))
+
+            indexes = await db.execute_fetchall(
+                """SELECT name FROM sqlite_master WHERE type = 'index'"""
+            )
+
+        indexes = {index[0] for index in indexes}
+        self.assertIn("reminder_date", indexes)
+        self.assertIn("warnings_user_timestamp", indexes)
+
+    async def test_existing_database(self) -> None:
+        # The old schema, without any keys and with duplicate entries.
+        async with aiosqlite.connect(self.filepath) as db:
+            await db.execute(
+                """CREATE TABLE ranking(
+                    user_id INTEGER,
+                    wins INTEGER,
+                    losses INTEGER,
+                    elo INTEGER,
+                    matches TEXT)"""
+            )
+            await db.executemany(
+                """INSERT INTO ranking VALUES (:user_id, 1, 0, :elo, "W")""",
+                [
+                    {"user_id": 1, "elo": 1000},
+                    {"user_id": 1, "elo": 1016},
+                    {"user_id": 2, "elo": 1016},
+                ],
+            )
+            await db.commit()
+
+        # The newest of the duplicates is kept, and we get told about the other one.
+        with self.assertLogs("discord.bot.db", "WARNING") as logs:
+            await setup_db(self.filepath)
+        self.assertIn(
+            "dropped 1 duplicate row(s) from the ranking table", logs.output[0]
+        )
+        # Running it twice should not do anything.
+        await setup_db(self.filepath)
+
+        async with aiosqlite.connect(self.filepath) as db:
+            self.assertEqual(await get_schema_version(db), len(MIGRATIONS))
+
+            players = await db.execute_fetchall(
+                """SELECT user_id, elo FROM ranking ORDER BY user_id"""
+            )
+
+            query_plan = await db.execute_fetchall(
+                """EXPLAIN QUERY PLAN SELECT elo FROM ranking WHERE user_id = 1"""
+            )
+
+        self.assertEqual(list(players), [(1, 1016), (2, 1016)])
+        self.assertNotIn("SCAN", query_plan[0][-1])
+
+    async def test_match_history(self) -> None:
+        async with aiosqlite.connect(self.filepath) as db:
+            await db.execute(
+                """CREATE TABLE ranking(
+                    user_id INTEGER,
+                    wins INTEGER,
+                    losses INTEGER,
+                    elo INTEGER,
+                    matches TEXT)"""
+            )
+            await db.executemany(
+                """INSERT INTO ranking VALUES (:user_id, 2, 1, 1000, :matches)""",
+                [
+                    {"user_id": 1, "matches": "WLW"},
+                    {"user_id": 2, "matches": "L"},
+                    {"user_id": 3, "matches": ""},
+                ],
+            )
+            await db.commit()
+
+        await setup_db(self.filepath)
+
+        async with aiosqlite.connect(self.filepath) as db:
+            history = await db.execute_fetchall("""SELECT * FROM ranked_matches""")
+            baseline = await db.execute_fetchall(
+                """SELECT user_id, wins, losses, elo, matches FROM ranked_baseline ORDER BY user_id"""
+            )
+            columns = await db.execute_fetchall("""PRAGMA table_info(ranking)""")
+
+        # We do not know the opponents of the old matches, so they stay out of the match history.
+        self.assertEqual(list(history), [])
+        self.assertEqual(
+            list(baseline),
+            [(1, 2, 1, 1000, "WLW"), (2, 2, 1, 1000, "L"), (3, 2, 1, 1000, "")],
+        )
+        self.assertNotIn("matches", [column[1] for column in columns])
+
+    async def test_profile_characters(self) -> None:
+        async with aiosqlite.connect(self.filepath) as db:
+            await db.execute(
+                """CREATE TABLE profile(
+                    user_id INTEGER,
+                    tag TEXT,
+                    region TEXT,
+                    mains TEXT,
+                    secondaries TEXT,
+                    pockets TEXT,
+                    note TEXT,
+                    colour INTEGER)"""
+            )
+            await db.executemany(
+                """INSERT INTO profile VALUES (:user_id, "", "", :mains, "", :pockets, "", 0)""",
+                [
+                    {"user_id": 1, "mains": "<:A:1> <:B:2>", "pockets": "<:C:3>"},
+                    {"user_id": 2, "mains": "", "pockets": None},
+                ],
+            )
+            await db.commit()
+
+        await setup_db(self.filepath)
+
+        async with aiosqlite.connect(self.filepath) as db:
+            characters = await db.execute_fetchall(
+                """SELECT user_id, character, slot, position FROM profile_characters
+                ORDER BY slot, position"""
+            )
+
+            query_plan = await db.execute_fetchall(
+                """EXPLAIN QUERY PLAN SELECT user_id FROM profile_characters
+                WHERE character = '<:A:1>' ORDER BY slot"""
+            )
+
+        self.assertEqual(
+            list(characters),
+            [(1, "<:A:1>", 0, 0), (1, "<:B:2>", 0, 1), (1, "<:C:3>", 2, 0)],
+        )
+        self.assertIn("profile_characters_character", query_plan[0][-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
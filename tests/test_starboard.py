@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import discord
+
+import utils.logger
+from cogs.starboard import Starboard
+from utils.ids import TGChannelIDs
+
+
+class FakeStarMessage:
+    def __init__(self, message_id: int, embed: discord.Embed, edits: list) -> None:
+        self.id = message_id
+        self.embeds = [embed]
+        self.edits = edits
+
+    async def edit(self, embed: discord.Embed) -> "FakeStarMessage":
+        self.edits.append(embed.fields[0].value)
+        self.embeds = [embed]
+        return self
+
+
+class FakeStarChannel:
+    def __init__(self, edits: list) -> None:
+        self.sent = []
+        self.edits = edits
+
+    async def send(self, embed: discord.Embed) -> FakeStarMessage:
+        # Gives the other reactions a chance to come in while we post.
+        await asyncio.sleep(0)
+        self.sent.append(embed)
+        return FakeStarMessage(len(self.sent), embed, self.edits)
+
+
+class TestStarboard(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self) -> None:
+        self.edits = []
+        self.saved = []
+        self.fetched = []
+        self.star_channel = FakeStarChannel(self.edits)
+
+        self.channel_id = TGChannelIDs.STARBOARD_LISTENING_CHANNELS[0]
+        self.message_id = discord.utils.time_snowflake(discord.utils.utcnow())
+        message = SimpleNamespace(
+            id=self.message_id,
+            content="hello",
+            reactions=[SimpleNamespace(emoji="⭐", count=1)],
+            author=SimpleNamespace(
+                id=1,
+                colour=discord.Colour.default(),
+                display_avatar=SimpleNamespace(url="https://example.com/avatar.png"),
+            ),
+            jump_url="https://example.com/message",
+            attachments=[],
+            stickers=[],
+        )
+
+        async def add(original_id: int, starboard_id: int) -> None:
+            self.saved.append((original_id, starboard_id))
+
+        async def fetch_channel(channel_id: int) -> None:
+            self.fetched.append(channel_id)
+
+        bot = SimpleNamespace(
+            get_logger=utils.logger.get_logger,
+            cached_messages=[message],
+            get_channel={TGChannelIDs.STARBOARD_CHANNEL: self.star_channel}.get,
+            fetch_channel=fetch_channel,
+            repo=SimpleNamespace(starboard=SimpleNamespace(add=add)),
+        )
+
+        self.cog = Starboard(bot)
+        self.cog.config = {"emoji": "⭐", "threshold": 2}
+
+    async def asyncTearDown(self) -> None:
+        await self.cog.cog_unload()
+
+    def payload(self, emoji: str = "⭐") -> SimpleNamespace:
+        return SimpleNamespace(
+            channel_id=self.channel_id, message_id=self.message_id, emoji=emoji
+        )
+
+    @mock.patch("cogs.starboard.EDIT_DELAY", 0)
+    async def test_reactions(self) -> None:
+        # The first reaction gets its count from the cached message.
+        await self.cog.on_raw_reaction_add(self.payload())
+        await self.cog.on_raw_reaction_add(self.payload("👍"))
+        self.assertEqual(self.star_channel.sent, [])
+
+        await asyncio.gather(
+            *(self.cog.on_raw_reaction_add(self.payload()) for _ in range(4))
+        )
+        self.assertEqual(len(self.star_channel.sent), 1)
+        self.assertEqual(self.saved, [(self.message_id, 1)])
+
+        # Every reaction after the post ends up in a single edit.
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.edits, ["**5 ⭐**"])
+
+        await self.cog.on_raw_reaction_remove(self.payload())
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.edits, ["**5 ⭐**", "**4 ⭐**"])
+
+        # None of this needed an API call to get a channel.
+        self.assertEqual(self.fetched, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from utils.roles import RoleRegistry
+from utils.tiers import TieredRoles, TierTable, load_tier_tables
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, role_ids: list[int]) -> None:
+        self.id = guild_id
+        self.roles = {
+            role_id: SimpleNamespace(id=role_id, guild=self) for role_id in role_ids
+        }
+
+    def get_role(self, role_id: int) -> SimpleNamespace:
+        return self.roles.get(role_id)
+
+
+class TestTiers(unittest.TestCase):
+    def test_tier_table(self) -> None:
+        table = TierTable([800, 950, 1050, 1200, 1300])
+
+        self.assertEqual(len(table), 6)
+        self.assertEqual(
+            [table.tier(score) for score in (0, 799, 800, 1000, 1299, 1300, 5000)],
+            [0, 0, 1, 2, 4, 5, 5],
+        )
+        self.assertEqual(table.adjacent(0), (0, 1))
+        self.assertEqual(table.adjacent(1000), (1, 2, 3))
+        self.assertEqual(table.adjacent(1400), (4, 5))
+
+        with self.assertRaises(ValueError):
+            TierTable([10, 10, 25])
+
+    def test_load_tier_tables(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            filepath = os.path.join(tempdir, "tiers.json")
+            with open(filepath, "w", encoding="utf-8") as f:
+                json.dump({"level": [10, 25]}, f)
+
+            tables = load_tier_tables(filepath)
+
+        self.assertEqual(list(tables), ["level"])
+        self.assertEqual(tables["level"].thresholds, (10, 25))
+
+    def test_tiered_roles(self) -> None:
+        registry = RoleRegistry((), {"tiers": (1, 2, 3, 4)})
+        tiers = TieredRoles(registry, "tiers", TierTable([10, 20, 30]))
+        guild = FakeGuild(100, [1, 2, 4])
+
+        self.assertEqual(tiers.role(guild, 15).id, 2)
+        self.assertIsNone(tiers.role(guild, 25))
+        self.assertEqual(tiers.role_ids, {1, 2, 3, 4})
+        self.assertEqual([role.id for role in tiers.adjacent_roles(guild, 5)], [1, 2])
+        # The missing role gets left out.
+        self.assertEqual([role.id for role in tiers.adjacent_roles(guild, 35)], [4])
+
+        # Once the role exists, the adjacent roles get worked out again.
+        guild.roles[3] = SimpleNamespace(id=3, guild=guild)
+        registry.invalidate(guild.roles[3])
+        self.assertEqual(
+            [role.id for role in tiers.adjacent_roles(guild, 25)], [2, 3, 4]
+        )
+
+        with self.assertRaises(ValueError):
+            TieredRoles(registry, "tiers", TierTable([10, 20]))
+
+
+if __name__ == "__main__":
+    unittest.main()
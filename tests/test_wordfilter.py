@@ -0,0 +1,41 @@
+import unittest
+
+from utils.wordfilter import WordFilter
+
+
+class TestWordFilter(unittest.TestCase):
+    def setUp(self) -> None:
+        self.word_filter = WordFilter(["bad", "worse", "badger", "ger", "bad"])
+
+    def test_match(self) -> None:
+        # Plain matches, the first word in the list wins.
+        self.assertEqual(self.word_filter.match("this is bad"), "bad")
+        self.assertEqual(self.word_filter.match("BAD and worse"), "bad")
+        self.assertEqual(self.word_filter.match("WoRsE!"), "worse")
+        self.assertIsNone(self.word_filter.match("all good here"))
+        self.assertIsNone(self.word_filter.match(""))
+
+        # Separators in between the letters.
+        self.assertEqual(self.word_filter.match("w(o)r)s(e"), "worse")
+
+        # Overlapping words are all found.
+        self.assertEqual(self.word_filter.match("a badger"), "badger")
+        self.assertEqual(self.word_filter.match("_ger_"), "ger")
+
+    def test_excluded(self) -> None:
+        # Part of a longer word.
+        self.assertIsNone(self.word_filter.match("badly"))
+        self.assertIsNone(self.word_filter.match("2bad"))
+        self.assertIsNone(self.word_filter.match("worsen"))
+        # Not an actual letter, so this still counts.
+        self.assertEqual(self.word_filter.match("bad!"), "bad")
+        # Glued to a letter anywhere in the message excludes the word completely.
+        self.assertIsNone(self.word_filter.match("bad, but badly"))
+        self.assertEqual(self.word_filter.match("badly worse"), "worse")
+
+    def test_deduplicated(self) -> None:
+        self.assertEqual(self.word_filter.words, ["bad", "worse", "badger", "ger"])
+
+
+if __name__ == "__main__":
+    unittest.main()
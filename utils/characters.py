@@ -0,0 +1,116 @@
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from stringmatch import Match
+
+# The names, IDs, aliases and emojis of every character.
+CHARACTERS_PATH = r"./files/characters.json"
+
+# How many different autocomplete inputs we remember the matches of.
+AUTOCOMPLETE_CACHE_SIZE = 1024
+
+
+@dataclass
+class Character:
+    __slots__ = ("name", "ids", "aliases", "emoji")
+
+    name: str
+    # 2 characters (pt, aegis) have more than 1 id.
+    ids: tuple[str, ...]
+    aliases: tuple[str, ...]
+    emoji: str
+
+
+class CharacterRegistry:
+    """Reads the characters file once, and looks up characters by their name, ID or aliases.
+    One name can belong to more than one character, like "chroy" does.
+    Call reload to read the file again, if it changed in the meantime.
+    """
+
+    def __init__(self, filepath: str = CHARACTERS_PATH) -> None:
+        self.filepath = filepath
+
+        self.characters: tuple[Character, ...] = ()
+        # Every name, ID and alias, together with the characters it belongs to.
+        self.index: dict[str, tuple[Character, ...]] = {}
+        # The names we suggest in the autocomplete, stringmatch only takes lists.
+        self.names: list[str] = []
+
+        self._match = Match(ignore_case=True, include_partial=True, latinise=True)
+        self._mtime: Optional[float] = None
+
+    def load(self) -> None:
+        with open(self.filepath, "r", encoding="utf-8") as f:
+            mtime = os.fstat(f.fileno()).st_mtime
+            data = json.load(f)
+
+        characters = tuple(
+            Character(
+                character["name"],
+                tuple(character["id"]),
+                tuple(character["aliases"]),
+                character["emoji"],
+            )
+            for character in data["Characters"]
+        )
+
+        index: dict[str, list[Character]] = {}
+        for character in characters:
+            for key in {character.name, *character.ids, *character.aliases}:
+                index.setdefault(key, []).append(character)
+
+        # Swapping everything at once, so nobody sees half of the old and half of the new file.
+        self.characters = characters
+        self.index = {key: tuple(matches) for key, matches in index.items()}
+        self.names = [character.name.title() for character in characters]
+        self.best_matches = lru_cache(maxsize=AUTOCOMPLETE_CACHE_SIZE)(
+            self._best_matches
+        )
+        self._mtime = mtime
+
+    def reload(self) -> bool:
+        """Reads the file again if it changed since the last time.
+        Returns True if it got read again.
+        """
+        if self._mtime == os.stat(self.filepath).st_mtime:
+            return False
+
+        self.load()
+        return True
+
+    def _ensure_loaded(self) -> None:
+        if self._mtime is None:
+            self.load()
+
+    def match(self, profile_input: Optional[str]) -> list[Character]:
+        """Matches every comma separated part of the input to the characters it belongs to.
+        Every character only shows up once, in the order they were given.
+        """
+        self._ensure_loaded()
+
+        if profile_input is None:
+            return []
+
+        matches = {}
+        for name in profile_input.lower().split(","):
+            for character in self.index.get(name.strip(), ()):
+                matches.setdefault(character.emoji, character)
+
+        return list(matches.values())
+
+    def _best_matches(self, current: str) -> tuple[str, ...]:
+        return tuple(
+            self._match.get_best_matches(current, self.names, score=40, limit=25)
+        )
+
+    def autocomplete(self, current: str) -> tuple[str, ...]:
+        """Gets you the names that match the input best, remembering the most recent inputs."""
+        self._ensure_loaded()
+        return self.best_matches(current)
+
+
+# Shared by everything that needs the characters, so the file only gets read once.
+character_registry = CharacterRegistry()
@@ -0,0 +1,62 @@
+from typing import TYPE_CHECKING
+
+from utils.db.badges import BadgesRepository, UserBadgesRow
+from utils.db.levels import LevelsRepository
+from utils.db.macros import MacroRow, MacrosRepository
+from utils.db.names import NamesRepository, NicknameRow, UsernameRow
+from utils.db.notes import NoteRow, NotesRepository
+from utils.db.profile import ProfileRepository, ProfileRow
+from utils.db.ranking import RankedMatchRow, RankingRepository, RankingRow
+from utils.db.reactrole import ReactRoleRepository, ReactRoleRow
+from utils.db.reminders import ReminderRow, RemindersRepository
+from utils.db.starboard import StarboardRepository
+from utils.db.warnings import WarningRow, WarningsRepository
+
+if TYPE_CHECKING:
+    from utils.sqlite import Database
+
+
+class Repositories:
+    """One repository per table, all sharing the same database service.
+    The cogs go through these instead of writing their own queries.
+    """
+
+    def __init__(self, database: "Database") -> None:
+        self.ranking = RankingRepository(database)
+        self.profile = ProfileRepository(database)
+        self.warnings = WarningsRepository(database)
+        self.reminders = RemindersRepository(database)
+        self.reactrole = ReactRoleRepository(database)
+        self.macros = MacrosRepository(database)
+        self.badges = BadgesRepository(database)
+        self.names = NamesRepository(database)
+        self.notes = NotesRepository(database)
+        self.starboard = StarboardRepository(database)
+        self.levels = LevelsRepository(database)
+
+
+__all__ = (
+    "Repositories",
+    "BadgesRepository",
+    "UserBadgesRow",
+    "LevelsRepository",
+    "MacrosRepository",
+    "MacroRow",
+    "NamesRepository",
+    "NicknameRow",
+    "UsernameRow",
+    "NotesRepository",
+    "NoteRow",
+    "ProfileRepository",
+    "ProfileRow",
+    "RankingRepository",
+    "RankingRow",
+    "RankedMatchRow",
+    "ReactRoleRepository",
+    "ReactRoleRow",
+    "RemindersRepository",
+    "ReminderRow",
+    "StarboardRepository",
+    "WarningsRepository",
+    "WarningRow",
+)
@@ -0,0 +1,140 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from utils.db.base import Repository, chunked, placeholders
+
+
+@dataclass
+class UserBadgesRow:
+    __slots__ = ("user_id", "badges")
+
+    user_id: int
+    badges: list[str]
+
+
+class BadgesRepository(Repository):
+    """The badges of our users, and the info texts of every badge.
+    The badges of a user are saved as a single string, separated by spaces.
+    """
+
+    async def get(self, user_id: int) -> Optional[UserBadgesRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT badges FROM userbadges WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return UserBadgesRow(user_id, rows[0][0].split()) if rows else None
+
+    async def get_many(self, user_ids: Iterable[int]) -> dict[int, list[str]]:
+        """Gets you the badges of every user in the list, if they have an entry."""
+        badges = {}
+
+        async with self.database.read() as db:
+            for chunk in chunked(user_ids):
+                rows = await db.execute_fetchall(
+                    f"""SELECT user_id, badges FROM userbadges WHERE user_id IN ({placeholders(len(chunk))})""",
+                    chunk,
+                )
+                badges.update((user_id, b.split()) for user_id, b in rows)
+
+        return badges
+
+    async def add_badges(self, user_id: int, badges: list[str]) -> list[str]:
+        """Adds the badges to a user, creating the entry if needed.
+        Returns the badges that were actually new.
+        """
+        async with self.database.write() as db:
+            await db.execute(
+                """INSERT OR IGNORE INTO userbadges VALUES (:user_id, '')""",
+                {"user_id": user_id},
+            )
+
+            rows = await db.execute_fetchall(
+                """SELECT badges FROM userbadges WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+            user_badges = rows[0][0].split()
+
+            added_badges = [badge for badge in badges if badge not in user_badges]
+
+            await db.execute(
+                """UPDATE userbadges SET badges = :badges WHERE user_id = :user_id""",
+                {"badges": " ".join(user_badges + added_badges), "user_id": user_id},
+            )
+
+        return added_badges
+
+    async def remove_badge(self, user_id: int, badge: str) -> Optional[bool]:
+        """Removes a badge from a user.
+        Returns None if the user has no badges at all, and False if the user did not have this badge.
+        """
+        async with self.database.write() as db:
+            rows = await db.execute_fetchall(
+                """SELECT badges FROM userbadges WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+            if not rows:
+                return None
+
+            user_badges = rows[0][0].split()
+
+            if badge not in user_badges:
+                return False
+
+            user_badges.remove(badge)
+
+            await db.execute(
+                """UPDATE userbadges SET badges = :badges WHERE user_id = :user_id""",
+                {"badges": " ".join(user_badges), "user_id": user_id},
+            )
+
+        return True
+
+    async def clear(self, user_id: int) -> bool:
+        """Removes every badge of a user. Returns False if there was nothing to remove."""
+        async with self.database.write() as db:
+            async with db.execute(
+                """DELETE FROM userbadges WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            ) as cursor:
+                return cursor.rowcount > 0
+
+    async def get_users_with(self, badge: str) -> list[int]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id FROM userbadges WHERE INSTR(badges, :badge) > 0""",
+                {"badge": badge},
+            )
+
+        return [row[0] for row in rows]
+
+    async def get_info_names(self) -> list[str]:
+        """Gets you every badge that has an info text."""
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall("""SELECT badge FROM badgeinfo""")
+
+        return [row[0] for row in rows]
+
+    async def get_info(self, badge: str) -> Optional[str]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT info FROM badgeinfo WHERE badge = :badge""",
+                {"badge": badge},
+            )
+
+        return rows[0][0] if rows else None
+
+    async def set_info(self, badge: str, info: str) -> None:
+        async with self.database.write() as db:
+            await db.execute(
+                """INSERT OR REPLACE INTO badgeinfo (badge, info) VALUES (:badge, :info)""",
+                {"badge": badge, "info": info},
+            )
+
+    async def delete_info(self, badge: str) -> None:
+        async with self.database.write() as db:
+            await db.execute(
+                """DELETE FROM badgeinfo WHERE badge = :badge""", {"badge": badge}
+            )
@@ -0,0 +1,57 @@
+import random
+import sqlite3
+from typing import TYPE_CHECKING, Awaitable, Callable, Iterable, Iterator
+
+if TYPE_CHECKING:
+    from utils.sqlite import Database
+
+# Older SQLite versions only allow 999 variables per statement,
+# so the get-many queries are split up into chunks of this size.
+MAX_VARIABLES = 500
+
+# How often we pick another random ID if the one we picked is already taken.
+RANDOM_ID_ATTEMPTS = 10
+
+
+def placeholders(amount: int) -> str:
+    """Gets you the question marks for an IN (...) clause."""
+    return ", ".join("?" * amount)
+
+
+def chunked(values: Iterable[int], size: int = MAX_VARIABLES) -> Iterator[list[int]]:
+    """Splits up the values into lists of up to `size` entries, without duplicates."""
+    values = list(dict.fromkeys(values))
+
+    for start in range(0, len(values), size):
+        end = start + size
+        yield values[start:end]
+
+
+async def insert_with_random_id(
+    insert: Callable[[int], Awaitable[None]],
+    low: int,
+    high: int,
+    attempts: int = RANDOM_ID_ATTEMPTS,
+) -> int:
+    """Calls the insert with a random ID between low and high.
+    If the primary key says the ID is taken already, we just try again with another one.
+    Returns the ID that got saved.
+    """
+    for attempt in range(1, attempts + 1):
+        new_id = random.randint(low, high)
+        try:
+            await insert(new_id)
+        except sqlite3.IntegrityError:
+            if attempt == attempts:
+                raise
+        else:
+            return new_id
+
+
+class Repository:
+    """The base class for every repository.
+    Just holds the shared database service, the subclasses do the actual queries.
+    """
+
+    def __init__(self, database: "Database") -> None:
+        self.database = database
@@ -0,0 +1,26 @@
+from utils.db.base import Repository
+
+
+class LevelsRepository(Repository):
+    """The Mee6 level of every member, as of the last time we synced their level role."""
+
+    async def get_all(self) -> dict[int, int]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall("""SELECT user_id, level FROM levels""")
+
+        return {user_id: level for user_id, level in rows}
+
+    async def save(self, levels: dict[int, int]) -> None:
+        """Saves the levels of the members, in one transaction."""
+        if not levels:
+            return
+
+        async with self.database.write() as db:
+            await db.executemany(
+                """INSERT INTO levels (user_id, level) VALUES (:user_id, :level)
+                ON CONFLICT(user_id) DO UPDATE SET level = excluded.level""",
+                [
+                    {"user_id": user_id, "level": level}
+                    for user_id, level in levels.items()
+                ],
+            )
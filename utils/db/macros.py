@@ -0,0 +1,71 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.db.base import Repository
+
+
+@dataclass
+class MacroRow:
+    __slots__ = ("name", "payload", "uses", "author")
+
+    name: str
+    payload: str
+    uses: int
+    author: int
+
+
+class MacrosRepository(Repository):
+    """The custom macros of our server."""
+
+    async def get(self, name: str) -> Optional[MacroRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT name, payload, uses, author FROM macros WHERE name = :name""",
+                {"name": name},
+            )
+
+        return MacroRow(*rows[0]) if rows else None
+
+    async def get_names(self) -> list[str]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall("""SELECT name FROM macros""")
+
+        return [row[0] for row in rows]
+
+    async def get_payloads(self) -> dict[str, str]:
+        """Gets you every macro name together with its payload."""
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall("""SELECT name, payload FROM macros""")
+
+        return {name: payload for name, payload in rows}
+
+    async def add(self, name: str, payload: str, author_id: int) -> bool:
+        """Saves a new macro. Returns False if the name was already taken."""
+        async with self.database.write() as db:
+            async with db.execute(
+                """INSERT OR IGNORE INTO macros VALUES (:name, :payload, 0, :author)""",
+                {"name": name, "payload": payload, "author": author_id},
+            ) as cursor:
+                return cursor.rowcount > 0
+
+    async def delete(self, name: str) -> bool:
+        """Deletes a macro. Returns False if there was nothing to delete."""
+        async with self.database.write() as db:
+            async with db.execute(
+                """DELETE FROM macros WHERE name = :name""",
+                {"name": name},
+            ) as cursor:
+                return cursor.rowcount > 0
+
+    async def add_uses(self, uses: dict[str, int]) -> None:
+        """Adds the counted uses of each macro, all in the same transaction."""
+        await asyncio.gather(
+            *(
+                self.database.queue.submit(
+                    """UPDATE macros SET uses = uses + :amount WHERE name = :name""",
+                    {"amount": amount, "name": name},
+                )
+                for name, amount in uses.items()
+            )
+        )
@@ -0,0 +1,86 @@
+import asyncio
+from dataclasses import dataclass
+
+from utils.db.base import Repository
+
+# How many old names we keep per user, in order to not flood the db too much.
+KEEP_NAMES = 5
+
+
+@dataclass
+class UsernameRow:
+    __slots__ = ("user_id", "old_name", "timestamp")
+
+    user_id: int
+    old_name: str
+    timestamp: int
+
+
+@dataclass
+class NicknameRow:
+    __slots__ = ("user_id", "old_name", "guild_id", "timestamp")
+
+    user_id: int
+    old_name: str
+    guild_id: int
+    timestamp: int
+
+
+class NamesRepository(Repository):
+    """The last few usernames and nicknames of our users."""
+
+    async def add_username(self, user_id: int, old_name: str, timestamp: int) -> None:
+        # These can come in big bursts, so they go through the write queue
+        # and get committed together with the other name changes.
+        await asyncio.gather(
+            self.database.queue.submit(
+                """INSERT INTO usernames VALUES (:user_id, :old_name, :timestamp)""",
+                {"user_id": user_id, "old_name": old_name, "timestamp": timestamp},
+            ),
+            # I think the timestamp + user id will be enough to identify a unique entry,
+            # not sure if you can even change your name twice in 1s, rate limit wise.
+            self.database.queue.submit(
+                """DELETE FROM usernames WHERE user_id = :user_id AND timestamp NOT IN
+                (SELECT timestamp FROM usernames WHERE user_id = :user_id ORDER BY timestamp DESC LIMIT :keep)""",
+                {"user_id": user_id, "keep": KEEP_NAMES},
+            ),
+        )
+
+    async def add_nickname(
+        self, user_id: int, old_name: str, guild_id: int, timestamp: int
+    ) -> None:
+        await asyncio.gather(
+            self.database.queue.submit(
+                """INSERT INTO nicknames VALUES (:user_id, :old_name, :guild_id, :timestamp)""",
+                {
+                    "user_id": user_id,
+                    "old_name": old_name,
+                    "guild_id": guild_id,
+                    "timestamp": timestamp,
+                },
+            ),
+            self.database.queue.submit(
+                """DELETE FROM nicknames WHERE user_id = :user_id AND timestamp NOT IN
+                (SELECT timestamp FROM nicknames WHERE user_id = :user_id ORDER BY timestamp DESC LIMIT :keep)""",
+                {"user_id": user_id, "keep": KEEP_NAMES},
+            ),
+        )
+
+    async def get_history(
+        self, user_id: int
+    ) -> tuple[list[UsernameRow], list[NicknameRow]]:
+        """Gets you the old usernames and nicknames of a user, oldest first."""
+        async with self.database.read() as db:
+            usernames = await db.execute_fetchall(
+                """SELECT user_id, old_name, timestamp FROM usernames WHERE user_id = :user_id ORDER BY timestamp""",
+                {"user_id": user_id},
+            )
+            nicknames = await db.execute_fetchall(
+                """SELECT user_id, old_name, guild_id, timestamp FROM nicknames WHERE user_id = :user_id ORDER BY timestamp""",
+                {"user_id": user_id},
+            )
+
+        return (
+            [UsernameRow(*row) for row in usernames],
+            [NicknameRow(*row) for row in nicknames],
+        )
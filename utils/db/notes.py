@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+
+from utils.db.base import Repository, insert_with_random_id
+
+
+@dataclass
+class NoteRow:
+    __slots__ = ("note_id", "user_id", "timestamp", "mod_id", "note")
+
+    note_id: int
+    user_id: int
+    timestamp: int
+    mod_id: int
+    note: str
+
+
+class NotesRepository(Repository):
+    """The moderator notes on our users."""
+
+    async def add(self, note: NoteRow) -> int:
+        """Saves the note under a random 7 digit ID, which also gets set on the note.
+        Returns that ID.
+        """
+
+        async def insert(note_id: int) -> None:
+            async with self.database.write() as db:
+                await db.execute(
+                    """INSERT INTO notes VALUES (:note_id, :user_id, :timestamp, :mod_id, :note)""",
+                    {
+                        "note_id": note_id,
+                        "user_id": note.user_id,
+                        "timestamp": note.timestamp,
+                        "mod_id": note.mod_id,
+                        "note": note.note,
+                    },
+                )
+
+        note.note_id = await insert_with_random_id(insert, 1000000, 9999999)
+        return note.note_id
+
+    async def get_by_user(self, user_id: int) -> list[NoteRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT note_id, user_id, timestamp, mod_id, note FROM notes
+                WHERE user_id = :user_id ORDER BY timestamp""",
+                {"user_id": user_id},
+            )
+
+        return [NoteRow(*row) for row in rows]
+
+    async def get_ids(self, user_id: int) -> list[int]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT note_id FROM notes WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return [row[0] for row in rows]
+
+    async def delete(self, user_id: int, note_id: int) -> bool:
+        """Deletes a single note. Returns False if there was nothing to delete."""
+        async with self.database.write() as db:
+            async with db.execute(
+                """DELETE FROM notes WHERE user_id = :user_id AND note_id = :note_id""",
+                {"user_id": user_id, "note_id": note_id},
+            ) as cursor:
+                return cursor.rowcount > 0
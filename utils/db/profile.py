@@ -0,0 +1,159 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional, Union
+
+from utils.db.base import Repository, chunked, placeholders
+
+# The columns you can change with set_field.
+PROFILE_FIELDS = ("tag", "region", "mains", "secondaries", "pockets", "note", "colour")
+
+# The fields with characters in them, their index is the slot in the profile_characters table.
+CHARACTER_FIELDS = ("mains", "secondaries", "pockets")
+
+
+@dataclass
+class ProfileRow:
+    __slots__ = (
+        "user_id",
+        "tag",
+        "region",
+        "mains",
+        "secondaries",
+        "pockets",
+        "note",
+        "colour",
+    )
+
+    user_id: int
+    tag: str
+    region: str
+    mains: str
+    secondaries: str
+    pockets: str
+    note: str
+    colour: int
+
+
+class ProfileRepository(Repository):
+    """The smash profiles of our users."""
+
+    async def get(self, user_id: int) -> Optional[ProfileRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id, tag, region, mains, secondaries, pockets, note, colour
+                FROM profile WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return ProfileRow(*rows[0]) if rows else None
+
+    async def get_many(self, user_ids: Iterable[int]) -> dict[int, ProfileRow]:
+        """Gets you the profiles of every user in the list, if they have one."""
+        profiles = {}
+
+        async with self.database.read() as db:
+            for chunk in chunked(user_ids):
+                rows = await db.execute_fetchall(
+                    f"""SELECT user_id, tag, region, mains, secondaries, pockets, note, colour
+                    FROM profile WHERE user_id IN ({placeholders(len(chunk))})""",
+                    chunk,
+                )
+                profiles.update((row[0], ProfileRow(*row)) for row in rows)
+
+        return profiles
+
+    async def get_with_elo(
+        self, user_id: int
+    ) -> Optional[tuple[ProfileRow, Optional[int]]]:
+        """Gets you the profile of a user together with their elo, in one query.
+        The elo is None if the user never played ranked.
+        """
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT profile.user_id, tag, region, mains, secondaries, pockets, note, colour, ranking.elo
+                FROM profile LEFT JOIN ranking ON ranking.user_id = profile.user_id
+                WHERE profile.user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        if not rows:
+            return None
+
+        *profile, elo = rows[0]
+        return ProfileRow(*profile), elo
+
+    async def set_field(
+        self, user_id: int, default_tag: str, field: str, value: Union[str, int]
+    ) -> None:
+        """Sets one field of a profile.
+        If the user does not have a profile yet, it gets created first with the default tag.
+        """
+        if field not in PROFILE_FIELDS:
+            raise ValueError(f"{field} is not a profile field.")
+
+        async with self.database.write() as db:
+            await db.execute(
+                """INSERT OR IGNORE INTO profile VALUES (:user_id, :tag, '', '', '', '', '', 0)""",
+                {"user_id": user_id, "tag": default_tag},
+            )
+            await db.execute(
+                f"""UPDATE profile SET {field} = :value WHERE user_id = :user_id""",
+                {"value": value, "user_id": user_id},
+            )
+
+            if field in CHARACTER_FIELDS:
+                slot = CHARACTER_FIELDS.index(field)
+                await db.execute(
+                    """DELETE FROM profile_characters WHERE user_id = :user_id AND slot = :slot""",
+                    {"user_id": user_id, "slot": slot},
+                )
+                # The characters are emojis, separated by spaces.
+                await db.executemany(
+                    """INSERT INTO profile_characters VALUES (:user_id, :character, :slot, :position)""",
+                    [
+                        {
+                            "user_id": user_id,
+                            "character": character,
+                            "slot": slot,
+                            "position": position,
+                        }
+                        for position, character in enumerate(value.split())
+                    ],
+                )
+
+    async def delete(self, user_id: int) -> bool:
+        """Deletes a profile. Returns False if there was nothing to delete."""
+        async with self.database.write() as db:
+            await db.execute(
+                """DELETE FROM profile_characters WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+            async with db.execute(
+                """DELETE FROM profile WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            ) as cursor:
+                return cursor.rowcount > 0
+
+    async def find_players(
+        self, character: str
+    ) -> tuple[list[int], list[int], list[int]]:
+        """Gets you the user IDs of the players of a character,
+        split into mains, secondaries and pockets.
+        Sorted by the amount of characters the player has in that field,
+        so that a solo-main will show up near the top.
+        """
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id, slot FROM profile_characters AS players
+                WHERE character = :character
+                ORDER BY slot, (
+                    SELECT COUNT(*) FROM profile_characters
+                    WHERE user_id = players.user_id AND slot = players.slot
+                ), user_id""",
+                {"character": character},
+            )
+
+        players = ([], [], [])
+        for user_id, slot in rows:
+            players[slot].append(user_id)
+
+        return players
@@ -0,0 +1,293 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from utils.db.base import Repository, chunked, placeholders
+
+DEFAULT_ELO = 1000
+
+
+# How many matches we show in the recent form of a player.
+RECENT_MATCHES = 5
+
+
+@dataclass
+class RankingRow:
+    __slots__ = ("user_id", "wins", "losses", "elo")
+
+    user_id: int
+    wins: int
+    losses: int
+    elo: int
+
+
+@dataclass
+class RankedMatchRow:
+    __slots__ = (
+        "match_id",
+        "winner_id",
+        "loser_id",
+        "winner_elo_before",
+        "winner_elo_after",
+        "loser_elo_before",
+        "loser_elo_after",
+        "timestamp",
+    )
+
+    match_id: int
+    winner_id: int
+    loser_id: int
+    winner_elo_before: int
+    winner_elo_after: int
+    loser_elo_before: int
+    loser_elo_after: int
+    timestamp: int
+
+
+class RankingRepository(Repository):
+    """The ranked matchmaking stats of every player."""
+
+    async def get(self, user_id: int) -> Optional[RankingRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id, wins, losses, elo FROM ranking WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return RankingRow(*rows[0]) if rows else None
+
+    async def get_many(self, user_ids: Iterable[int]) -> dict[int, RankingRow]:
+        """Gets you the stats of every user in the list, if they have any."""
+        players = {}
+
+        async with self.database.read() as db:
+            for chunk in chunked(user_ids):
+                rows = await db.execute_fetchall(
+                    f"""SELECT user_id, wins, losses, elo FROM ranking
+                    WHERE user_id IN ({placeholders(len(chunk))})""",
+                    chunk,
+                )
+                players.update((row[0], RankingRow(*row)) for row in rows)
+
+        return players
+
+    async def get_elo(self, user_id: int) -> Optional[int]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT elo FROM ranking WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return rows[0][0] if rows else None
+
+    async def get_all_elos(self) -> dict[int, int]:
+        """Gets you the elo of every player, which is all we need for the leaderboard."""
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall("""SELECT user_id, elo FROM ranking""")
+
+        return dict(rows)
+
+    async def get_record(self, user_id: int) -> tuple[int, int]:
+        """Gets you the wins and losses of a user, both are 0 if the user has not played yet."""
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT wins, losses FROM ranking WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return (rows[0][0], rows[0][1]) if rows else (0, 0)
+
+    async def get_baseline(self) -> dict[int, RankingRow]:
+        """Gets you the record and elo every player had before we saved every match,
+        which is where the replay of the match history starts from.
+        """
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id, wins, losses, elo FROM ranked_baseline"""
+            )
+
+        return {row[0]: RankingRow(*row) for row in rows}
+
+    async def get_legacy_results(self, user_id: int) -> str:
+        """Gets you the W/L results of a player from before we saved every match, oldest first."""
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT matches FROM ranked_baseline WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return (rows[0][0] or "") if rows else ""
+
+    async def get_recent_matches(
+        self, user_id: int, limit: int = RECENT_MATCHES
+    ) -> list[RankedMatchRow]:
+        """Gets you the last matches of a player, newest first.
+        Both halves only read the last few entries of their index, no matter how many matches someone played.
+        """
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT * FROM (
+                    SELECT * FROM (
+                        SELECT match_id, winner_id, loser_id,
+                        winner_elo_before, winner_elo_after,
+                        loser_elo_before, loser_elo_after,
+                        timestamp
+                        FROM ranked_matches WHERE winner_id = :user_id
+                        ORDER BY match_id DESC LIMIT :limit
+                    )
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT match_id, winner_id, loser_id,
+                        winner_elo_before, winner_elo_after,
+                        loser_elo_before, loser_elo_after,
+                        timestamp
+                        FROM ranked_matches WHERE loser_id = :user_id
+                        ORDER BY match_id DESC LIMIT :limit
+                    )
+                ) ORDER BY match_id DESC LIMIT :limit""",
+                {"user_id": user_id, "limit": limit},
+            )
+
+        return [RankedMatchRow(*row) for row in rows]
+
+    async def get_match_history(self) -> list[RankedMatchRow]:
+        """Gets you every ranked match ever played, oldest first."""
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT match_id, winner_id, loser_id,
+                winner_elo_before, winner_elo_after,
+                loser_elo_before, loser_elo_after,
+                timestamp
+                FROM ranked_matches ORDER BY match_id ASC"""
+            )
+
+        return [RankedMatchRow(*row) for row in rows]
+
+    async def apply_replay(
+        self,
+        players: dict[int, tuple[int, int, int]],
+        matches: list[tuple[int, int, int, int, int]],
+        voided: list[int],
+        last_match_id: Optional[int],
+    ) -> bool:
+        """Saves the result of replaying the match history, all in one transaction.
+        Takes the elo, wins and losses of every player, the match ID with the elo values
+        before and after of every replayed match, the IDs of the matches to delete,
+        and the ID of the last match that got replayed.
+        Returns False without saving anything if a match was reported since the replay,
+        since that match would get lost otherwise.
+        """
+        async with self.database.write() as db:
+            # Keeps report_match out until we are done.
+            await db.execute("""BEGIN IMMEDIATE""")
+
+            rows = await db.execute_fetchall(
+                """SELECT MAX(match_id) FROM ranked_matches"""
+            )
+            if rows[0][0] != last_match_id:
+                return False
+
+            await db.executemany(
+                """DELETE FROM ranked_matches WHERE match_id = ?""",
+                [(match_id,) for match_id in voided],
+            )
+            await db.executemany(
+                """UPDATE ranked_matches SET
+                winner_elo_before = ?, winner_elo_after = ?,
+                loser_elo_before = ?, loser_elo_after = ?
+                WHERE match_id = ?""",
+                [
+                    (winner_before, winner_after, loser_before, loser_after, match_id)
+                    for match_id, winner_before, winner_after, loser_before, loser_after in matches
+                ],
+            )
+            await db.executemany(
+                """UPDATE ranking SET elo = ?, wins = ?, losses = ? WHERE user_id = ?""",
+                [
+                    (elo, wins, losses, user_id)
+                    for user_id, (elo, wins, losses) in players.items()
+                ],
+            )
+
+        return True
+
+    async def report_match(
+        self,
+        winner_id: int,
+        loser_id: int,
+        calculate: Callable[[int, int], tuple[int, int]],
+        timestamp: Optional[int] = None,
+    ) -> RankedMatchRow:
+        """Saves the result of a match, all in one transaction.
+        Creates the ranked profiles if needed, reads the current elo of both players,
+        gets the new values from `calculate` and saves them together with the match.
+        BEGIN IMMEDIATE takes the write lock right away, so nobody can change the elo
+        in between us reading and writing it.
+        Returns the match, with the elo values before and after.
+        """
+        async with self.database.write() as db:
+            await db.execute("""BEGIN IMMEDIATE""")
+
+            rows = await db.execute_fetchall(
+                """SELECT user_id, elo FROM ranking WHERE user_id IN (:winner_id, :loser_id)""",
+                {"winner_id": winner_id, "loser_id": loser_id},
+            )
+            elos = dict(rows)
+
+            winner_before = elos.get(winner_id, DEFAULT_ELO)
+            loser_before = elos.get(loser_id, DEFAULT_ELO)
+            winner_after, loser_after = calculate(winner_before, loser_before)
+
+            match = RankedMatchRow(
+                None,
+                winner_id,
+                loser_id,
+                winner_before,
+                winner_after,
+                loser_before,
+                loser_after,
+                int(time.time()) if timestamp is None else timestamp,
+            )
+
+            async with db.execute(
+                """INSERT INTO ranked_matches (
+                    winner_id, loser_id,
+                    winner_elo_before, winner_elo_after,
+                    loser_elo_before, loser_elo_after,
+                    timestamp
+                ) VALUES (
+                    :winner_id, :loser_id,
+                    :winner_elo_before, :winner_elo_after,
+                    :loser_elo_before, :loser_elo_after,
+                    :timestamp
+                )""",
+                {
+                    "winner_id": match.winner_id,
+                    "loser_id": match.loser_id,
+                    "winner_elo_before": match.winner_elo_before,
+                    "winner_elo_after": match.winner_elo_after,
+                    "loser_elo_before": match.loser_elo_before,
+                    "loser_elo_after": match.loser_elo_after,
+                    "timestamp": match.timestamp,
+                },
+            ) as cursor:
+                match.match_id = cursor.lastrowid
+
+            # Creates the profile of a new player and updates an existing one, in the same statement.
+            await db.execute(
+                """INSERT INTO ranking (user_id, wins, losses, elo) VALUES
+                (:winner_id, 1, 0, :winner_elo),
+                (:loser_id, 0, 1, :loser_elo)
+                ON CONFLICT (user_id) DO UPDATE SET
+                wins = wins + excluded.wins,
+                losses = losses + excluded.losses,
+                elo = excluded.elo""",
+                {
+                    "winner_id": winner_id,
+                    "winner_elo": winner_after,
+                    "loser_id": loser_id,
+                    "loser_elo": loser_after,
+                },
+            )
+
+        return match
@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.db.base import Repository
+
+
+@dataclass
+class ReactRoleRow:
+    __slots__ = ("message_id", "exclusive", "rolereq", "emoji", "role")
+
+    message_id: int
+    exclusive: bool
+    rolereq: Optional[str]
+    emoji: str
+    role: int
+
+
+class ReactRoleRepository(Repository):
+    """The emoji and role pairs of our role menus."""
+
+    async def add(self, message_id: int, emoji: str, role_id: int) -> None:
+        """Adds a new emoji and role pair to a role menu.
+        If the message is already a role menu, the new entry inherits its exclusive and rolereq values.
+        """
+        async with self.database.write() as db:
+            rows = await db.execute_fetchall(
+                """SELECT exclusive, rolereq FROM reactrole WHERE message_id = :message_id LIMIT 1""",
+                {"message_id": message_id},
+            )
+
+            exclusive, rolereq = rows[0] if rows else (False, None)
+
+            await db.execute(
+                """INSERT OR IGNORE INTO reactrole VALUES (:message_id, :exclusive, :rolereq, :emoji, :role)""",
+                {
+                    "message_id": message_id,
+                    "exclusive": exclusive,
+                    "rolereq": rolereq,
+                    "emoji": emoji,
+                    "role": role_id,
+                },
+            )
+
+    async def get_by_message(self, message_id: int) -> list[ReactRoleRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT message_id, exclusive, rolereq, emoji, role FROM reactrole WHERE message_id = :message_id""",
+                {"message_id": message_id},
+            )
+
+        return [ReactRoleRow(*row) for row in rows]
+
+    async def get_all(self) -> list[ReactRoleRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT message_id, exclusive, rolereq, emoji, role FROM reactrole ORDER BY message_id ASC"""
+            )
+
+        return [ReactRoleRow(*row) for row in rows]
+
+    async def update_settings(
+        self, message_id: int, exclusive: bool, rolereq: Optional[str]
+    ) -> bool:
+        """Sets the exclusive and rolereq values of every entry of a role menu.
+        Returns False if the message is not a role menu.
+        """
+        async with self.database.write() as db:
+            async with db.execute(
+                """UPDATE reactrole SET exclusive = :exclusive, rolereq = :rolereq WHERE message_id = :message_id""",
+                {"exclusive": exclusive, "rolereq": rolereq, "message_id": message_id},
+            ) as cursor:
+                return cursor.rowcount > 0
+
+    async def delete_message(self, message_id: int) -> bool:
+        """Deletes every entry of a role menu. Returns False if there was nothing to delete."""
+        async with self.database.write() as db:
+            async with db.execute(
+                """DELETE FROM reactrole WHERE message_id = :message_id""",
+                {"message_id": message_id},
+            ) as cursor:
+                return cursor.rowcount > 0
@@ -0,0 +1,102 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.db.base import Repository, insert_with_random_id
+
+
+@dataclass
+class ReminderRow:
+    __slots__ = ("user_id", "reminder_id", "channel_id", "date", "read_time", "message")
+
+    user_id: int
+    reminder_id: int
+    channel_id: int
+    date: int
+    read_time: str
+    message: str
+
+
+class RemindersRepository(Repository):
+    """The pending reminders of our users."""
+
+    async def add(self, reminder: ReminderRow) -> int:
+        """Saves the reminder under a random 7 digit ID, which also gets set on the reminder.
+        Returns that ID.
+        """
+
+        async def insert(reminder_id: int) -> None:
+            await self.database.queue.execute(
+                """INSERT INTO reminder VALUES (:user_id, :reminder_id, :channel_id, :date, :read_time, :message)""",
+                {
+                    "user_id": reminder.user_id,
+                    "reminder_id": reminder_id,
+                    "channel_id": reminder.channel_id,
+                    "date": reminder.date,
+                    "read_time": reminder.read_time,
+                    "message": reminder.message,
+                },
+            )
+
+        reminder.reminder_id = await insert_with_random_id(insert, 1000000, 9999999)
+        return reminder.reminder_id
+
+    async def get(self, user_id: int, reminder_id: int) -> Optional[ReminderRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id, reminder_id, channel_id, date, read_time, message FROM reminder
+                WHERE user_id = :user_id AND reminder_id = :reminder_id""",
+                {"user_id": user_id, "reminder_id": reminder_id},
+            )
+
+        return ReminderRow(*rows[0]) if rows else None
+
+    async def get_by_user(self, user_id: int) -> list[ReminderRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id, reminder_id, channel_id, date, read_time, message FROM reminder
+                WHERE user_id = :user_id ORDER BY date""",
+                {"user_id": user_id},
+            )
+
+        return [ReminderRow(*row) for row in rows]
+
+    async def get_ids(self, user_id: int) -> list[int]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT reminder_id FROM reminder WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return [row[0] for row in rows]
+
+    async def get_all(self) -> list[ReminderRow]:
+        """Gets you every pending reminder, the ones due first come first."""
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id, reminder_id, channel_id, date, read_time, message FROM reminder
+                ORDER BY date"""
+            )
+
+        return [ReminderRow(*row) for row in rows]
+
+    async def delete(self, user_id: int, reminder_id: int) -> bool:
+        """Deletes a single reminder. Returns False if there was nothing to delete."""
+        async with self.database.write() as db:
+            async with db.execute(
+                """DELETE FROM reminder WHERE user_id = :user_id AND reminder_id = :reminder_id""",
+                {"user_id": user_id, "reminder_id": reminder_id},
+            ) as cursor:
+                return cursor.rowcount > 0
+
+    async def delete_many(self, reminders: list[ReminderRow]) -> None:
+        """Deletes the reminders that were sent out, all in the same transaction."""
+        await asyncio.gather(
+            *(
+                self.database.queue.submit(
+                    """DELETE FROM reminder WHERE user_id = :user_id AND reminder_id = :reminder_id""",
+                    {"user_id": reminder.user_id, "reminder_id": reminder.reminder_id},
+                )
+                for reminder in reminders
+            )
+        )
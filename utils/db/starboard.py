@@ -0,0 +1,21 @@
+from utils.db.base import Repository
+
+
+class StarboardRepository(Repository):
+    """Which starboard message belongs to which original message."""
+
+    async def get_all(self) -> dict[int, int]:
+        """Gets you every original message ID together with its starboard message ID."""
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT original_id, starboard_id FROM starboardmessages"""
+            )
+
+        return {original_id: starboard_id for original_id, starboard_id in rows}
+
+    async def add(self, original_id: int, starboard_id: int) -> None:
+        async with self.database.write() as db:
+            await db.execute(
+                """INSERT OR IGNORE INTO starboardmessages VALUES (:original_id, :starboard_id)""",
+                {"original_id": original_id, "starboard_id": starboard_id},
+            )
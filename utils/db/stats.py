@@ -0,0 +1,179 @@
+import re
+import sqlite3
+import sys
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Awaitable, Iterable, Optional
+
+import aiosqlite
+from discord.ext import commands
+
+import utils.logger
+
+# Statements slower than this get logged, in milliseconds.
+SLOW_QUERY_MS = 100.0
+
+# The upper bounds of the latency histogram buckets, in milliseconds.
+# Doubles every step, from 0.05ms up to ~26s. Anything slower lands in one last bucket.
+BUCKET_BOUNDS = tuple(0.05 * 2**i for i in range(20))
+
+# The cog and command the current task is running, set before every command invocation.
+current_origin: ContextVar[Optional[str]] = ContextVar("current_origin", default=None)
+
+
+async def track_command(ctx: commands.Context) -> None:
+    """Registered as a global before_invoke hook,
+    so that every query knows which command it came from.
+    """
+    cog = ctx.cog.qualified_name if ctx.cog else "No cog"
+    current_origin.set(f"{cog}, command {ctx.command.qualified_name}")
+
+
+def get_origin() -> str:
+    """Gets you the cog and command the current query came from.
+    Outside of commands, this looks up the call stack for the closest cog function instead.
+    """
+    if origin := current_origin.get():
+        return origin
+
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("cogs."):
+            return f"{module[5:]}, function {frame.f_code.co_name}"
+        frame = frame.f_back
+
+    return "Unknown"
+
+
+@lru_cache(maxsize=1024)
+def normalise_sql(sql: str) -> str:
+    """Collapses whitespace, and IN lists of any length,
+    so that the same statement always ends up with the same key.
+    """
+    sql = " ".join(sql.split())
+    return re.sub(r"IN \(\?(?:, \?)*\)", "IN (?...)", sql)
+
+
+@dataclass
+class StatementStats:
+    __slots__ = ("sql", "calls", "total_time", "max_time", "buckets")
+
+    sql: str
+    calls: int
+    total_time: float
+    max_time: float
+    buckets: list[int]
+
+    def record(self, elapsed_ms: float) -> None:
+        self.calls += 1
+        self.total_time += elapsed_ms
+        self.max_time = max(self.max_time, elapsed_ms)
+        self.buckets[bisect_left(BUCKET_BOUNDS, elapsed_ms)] += 1
+
+    def percentile(self, percent: float) -> float:
+        """Gets you the upper bound of the bucket the percentile falls into, in milliseconds."""
+        threshold = self.calls * percent / 100
+        count = 0
+
+        for i, bucket in enumerate(self.buckets):
+            count += bucket
+            if bucket and count >= threshold:
+                # The last bucket does not have an upper bound.
+                if i == len(BUCKET_BOUNDS):
+                    return self.max_time
+                return min(BUCKET_BOUNDS[i], self.max_time)
+
+        return self.max_time
+
+
+class QueryStats:
+    """Keeps track of how often each statement runs and how long it takes.
+    Statements slower than `slow_query_ms` get logged, together with where they came from.
+    """
+
+    def __init__(self, slow_query_ms: float = SLOW_QUERY_MS) -> None:
+        self.slow_query_ms = slow_query_ms
+        self.statements: dict[str, StatementStats] = {}
+
+    def record(self, sql: str, elapsed: float) -> None:
+        elapsed_ms = elapsed * 1000
+        key = normalise_sql(sql)
+
+        if (stats := self.statements.get(key)) is None:
+            stats = self.statements[key] = StatementStats(
+                key, 0, 0.0, 0.0, [0] * (len(BUCKET_BOUNDS) + 1)
+            )
+
+        stats.record(elapsed_ms)
+
+        if elapsed_ms >= self.slow_query_ms:
+            logger = utils.logger.get_logger("bot.db")
+            logger.warning(
+                f"Slow query ({round(elapsed_ms, 1)}ms) from {get_origin()}: {key}"
+            )
+
+    def top(self, limit: int = 10) -> list[StatementStats]:
+        """Gets you the statements that took up the most time in total."""
+        return sorted(
+            self.statements.values(), key=lambda s: s.total_time, reverse=True
+        )[:limit]
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+class TimedCursor:
+    """What InstrumentedConnection.execute returns.
+    Just like aiosqlite, it can be awaited or used as an async context manager.
+    """
+
+    def __init__(self, coro: Awaitable[aiosqlite.Cursor]) -> None:
+        self._coro = coro
+        self._cursor: Optional[aiosqlite.Cursor] = None
+
+    def __await__(self):
+        return self._coro.__await__()
+
+    async def __aenter__(self) -> aiosqlite.Cursor:
+        self._cursor = await self._coro
+        return self._cursor
+
+    async def __aexit__(self, *args) -> None:
+        await self._cursor.close()
+
+
+class InstrumentedConnection:
+    """Wraps a connection and records the time every statement takes.
+    Everything else gets passed through to the connection.
+    """
+
+    def __init__(self, connection: aiosqlite.Connection, stats: QueryStats) -> None:
+        self.connection = connection
+        self.stats = stats
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.connection, name)
+
+    async def _timed(self, sql: str, awaitable: Awaitable) -> Any:
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.stats.record(sql, time.perf_counter() - start)
+
+    def execute(self, sql: str, parameters: Iterable[Any] = None) -> TimedCursor:
+        return TimedCursor(self._timed(sql, self.connection.execute(sql, parameters)))
+
+    async def execute_fetchall(
+        self, sql: str, parameters: Iterable[Any] = None
+    ) -> Iterable[sqlite3.Row]:
+        return await self._timed(sql, self.connection.execute_fetchall(sql, parameters))
+
+    async def executemany(
+        self, sql: str, parameters: Iterable[Iterable[Any]]
+    ) -> aiosqlite.Cursor:
+        return await self._timed(sql, self.connection.executemany(sql, parameters))
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+
+from utils.db.base import Repository, insert_with_random_id
+
+
+@dataclass
+class WarningRow:
+    __slots__ = ("user_id", "warn_id", "mod_id", "reason", "timestamp")
+
+    user_id: int
+    warn_id: int
+    mod_id: int
+    reason: str
+    timestamp: int
+
+
+class WarningsRepository(Repository):
+    """The active warnings of our users."""
+
+    async def add(self, user_id: int, mod_id: int, reason: str, timestamp: int) -> int:
+        """Saves a new warning under a random 6 digit ID, and returns that ID."""
+
+        async def insert(warn_id: int) -> None:
+            # Waits for the commit, since the warn count usually gets checked right after.
+            await self.database.queue.execute(
+                """INSERT INTO warnings VALUES (:user_id, :warn_id, :mod_id, :reason, :timestamp)""",
+                {
+                    "user_id": user_id,
+                    "warn_id": warn_id,
+                    "mod_id": mod_id,
+                    "reason": reason,
+                    "timestamp": timestamp,
+                },
+            )
+
+        return await insert_with_random_id(insert, 100000, 999999)
+
+    async def get_by_user(self, user_id: int) -> list[WarningRow]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT user_id, warn_id, mod_id, reason, timestamp FROM warnings
+                WHERE user_id = :user_id ORDER BY timestamp""",
+                {"user_id": user_id},
+            )
+
+        return [WarningRow(*row) for row in rows]
+
+    async def get_ids(self, user_id: int) -> list[int]:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT warn_id FROM warnings WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return [row[0] for row in rows]
+
+    async def count(self, user_id: int) -> int:
+        async with self.database.read() as db:
+            rows = await db.execute_fetchall(
+                """SELECT COUNT(*) FROM warnings WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+        return rows[0][0]
+
+    async def delete(self, user_id: int, warn_id: int) -> bool:
+        """Deletes a single warning. Returns False if there was nothing to delete."""
+        async with self.database.write() as db:
+            async with db.execute(
+                """DELETE FROM warnings WHERE user_id = :user_id AND warn_id = :warn_id""",
+                {"user_id": user_id, "warn_id": warn_id},
+            ) as cursor:
+                return cursor.rowcount > 0
+
+    async def clear(self, user_id: int) -> None:
+        async with self.database.write() as db:
+            await db.execute(
+                """DELETE FROM warnings WHERE user_id = :user_id""",
+                {"user_id": user_id},
+            )
+
+    async def delete_expired(self, expires_at: int) -> int:
+        """Deletes every warning older than the timestamp, returns how many were deleted."""
+        async with self.database.write() as db:
+            async with db.execute(
+                """DELETE FROM warnings WHERE timestamp < :expires_at""",
+                {"expires_at": expires_at},
+            ) as cursor:
+                return cursor.rowcount
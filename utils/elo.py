@@ -0,0 +1,186 @@
+import time
+from dataclasses import dataclass
+from typing import Callable, Collection, Iterable, Mapping, Optional
+
+import numpy as np
+
+from utils.db.ranking import DEFAULT_ELO, RankedMatchRow, RankingRow
+
+# The K-factor of a player depends on how many games they have played before the match.
+# Every step is (games played, K-factor), the last step you have reached is the one that counts.
+K_SCHEDULES: dict[str, tuple[tuple[int, int], ...]] = {
+    # What we use for every match that gets reported.
+    "classic": ((0, 32),),
+    # New players move faster, so they find their spot on the ladder quicker.
+    "provisional": ((0, 48), (10, 32), (30, 24)),
+    # Established players move slower.
+    "veteran": ((0, 32), (50, 24), (150, 16)),
+}
+
+
+@dataclass
+class PlayerRating:
+    __slots__ = ("elo", "wins", "losses")
+
+    elo: int
+    wins: int
+    losses: int
+
+
+@dataclass
+class ReplayResult:
+    __slots__ = ("players", "matches", "voided", "elapsed")
+
+    players: dict[int, PlayerRating]
+    # The match ID with the elo of the winner and the loser before and after, of every replayed match.
+    matches: list[tuple[int, int, int, int, int]]
+    # The IDs of the matches that got thrown out.
+    voided: list[int]
+    # How long the replay took, in seconds.
+    elapsed: float
+
+    def diff(self, current: dict[int, int]) -> list[tuple[int, int, int]]:
+        """Gets you the user ID, the current elo and the new elo of every player whose elo changes.
+        The biggest changes come first.
+        """
+        changes = [
+            (user_id, current.get(user_id, DEFAULT_ELO), player.elo)
+            for user_id, player in self.players.items()
+            if current.get(user_id, DEFAULT_ELO) != player.elo
+        ]
+        return sorted(
+            changes, key=lambda change: abs(change[2] - change[1]), reverse=True
+        )
+
+
+def k_factors(
+    schedule: tuple[tuple[int, int], ...]
+) -> Callable[[np.ndarray], np.ndarray]:
+    """Turns the schedule into a function looking up the K-factor for every entry of the games played."""
+    thresholds = np.array([step[0] for step in schedule])
+    factors = np.array([step[1] for step in schedule], dtype=np.float64)
+
+    if len(schedule) == 1:
+        return lambda games: factors[0]
+
+    return lambda games: factors[np.searchsorted(thresholds, games, side="right") - 1]
+
+
+def match_rounds(winners: np.ndarray, losers: np.ndarray) -> np.ndarray:
+    """Sorts the matches into rounds where nobody plays more than once.
+    A match goes in the round right after the last match of either player,
+    so every player still plays their matches in the same order as before.
+    The matches of a round do not affect each other, so they can be calculated all at once.
+    """
+    last_round: dict[int, int] = {}
+    rounds = np.empty(len(winners), dtype=np.int64)
+
+    for index, (winner, loser) in enumerate(zip(winners.tolist(), losers.tolist())):
+        current = max(last_round.get(winner, -1), last_round.get(loser, -1)) + 1
+        last_round[winner] = last_round[loser] = current
+        rounds[index] = current
+
+    return rounds
+
+
+def replay(
+    history: Iterable[RankedMatchRow],
+    player_ids: Iterable[int],
+    schedule: tuple[tuple[int, int], ...] = K_SCHEDULES["classic"],
+    voided_players: Collection[int] = (),
+    baseline: Optional[Mapping[int, RankingRow]] = None,
+) -> ReplayResult:
+    """Calculates the elo of every player again, going through the match history in order.
+    Players start out with their record and elo from the baseline, if they have one,
+    since the matches from before we saved every match cannot be replayed.
+    Uses the same calculation as for a single match, so replaying with the classic schedule
+    gets you the same values as reporting every match one after another.
+    Every match involving one of the voided players is thrown out.
+    """
+    start = time.perf_counter()
+    voided_players = set(voided_players)
+    baseline = baseline or {}
+
+    def starting_rating(user_id: int) -> PlayerRating:
+        if (row := baseline.get(user_id)) is None:
+            return PlayerRating(DEFAULT_ELO, 0, 0)
+        return PlayerRating(row.elo, row.wins, row.losses)
+
+    players = {user_id: starting_rating(user_id) for user_id in player_ids}
+    rated: list[RankedMatchRow] = []
+    voided = []
+
+    for match in history:
+        if match.winner_id in voided_players or match.loser_id in voided_players:
+            voided.append(match.match_id)
+            continue
+
+        for user_id in (match.winner_id, match.loser_id):
+            if user_id not in players:
+                players[user_id] = starting_rating(user_id)
+
+        players[match.winner_id].wins += 1
+        players[match.loser_id].losses += 1
+        rated.append(match)
+
+    matches = []
+
+    if rated:
+        # Every player gets an index into the rating arrays.
+        user_ids, indexes = np.unique(
+            np.array([(match.winner_id, match.loser_id) for match in rated]),
+            return_inverse=True,
+        )
+        indexes = indexes.reshape(-1, 2)
+        winners, losers = indexes[:, 0], indexes[:, 1]
+
+        # The games from before the full history still count towards the K-factor.
+        starting = [starting_rating(user_id) for user_id in user_ids.tolist()]
+        ratings = np.array([player.elo for player in starting], dtype=np.float64)
+        games = np.array(
+            [player.wins + player.losses for player in starting], dtype=np.int64
+        )
+        k_factor = k_factors(schedule)
+
+        # Sorted by round, so every round is a slice instead of a lookup.
+        rounds = match_rounds(winners, losers)
+        order = np.argsort(rounds, kind="stable")
+        winners, losers = winners[order], losers[order]
+        bounds = np.concatenate(([0], np.cumsum(np.bincount(rounds)))).tolist()
+
+        # The elo of the winner and the loser, before and after every match.
+        elos = np.empty((4, len(rated)), dtype=np.float64)
+
+        for first, last in zip(bounds, bounds[1:]):
+            winner, loser = winners[first:last], losers[first:last]
+            winner_elo, loser_elo = ratings[winner], ratings[loser]
+
+            exponent = (loser_elo - winner_elo) / 400
+            winner_expected = 1 / (1 + 10**exponent)
+            loser_expected = 1 / (1 + 10**-exponent)
+
+            elos[0, first:last] = winner_elo
+            elos[2, first:last] = loser_elo
+            elos[1, first:last] = ratings[winner] = np.rint(
+                winner_elo + k_factor(games[winner]) * (1 - winner_expected)
+            )
+            elos[3, first:last] = ratings[loser] = np.rint(
+                loser_elo + k_factor(games[loser]) * (0 - loser_expected)
+            )
+
+            if len(schedule) > 1:
+                games[winner] += 1
+                games[loser] += 1
+
+        # Back into the order of the match history.
+        elos[:, order] = elos.copy()
+
+        for user_id, elo in zip(user_ids.tolist(), ratings.astype(np.int64).tolist()):
+            players[user_id].elo = elo
+
+        matches = [
+            (match.match_id, *match_elos)
+            for match, match_elos in zip(rated, elos.T.astype(np.int64).tolist())
+        ]
+
+    return ReplayResult(players, matches, voided, time.perf_counter() - start)
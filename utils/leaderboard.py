@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+# How many players we show on a single page of the leaderboard.
+PAGE_SIZE = 10
+
+
+@dataclass
+class LeaderboardEntry:
+    __slots__ = ("rank", "user_id", "elo")
+
+    # Players with the same elo share the same rank.
+    rank: int
+    user_id: int
+    elo: int
+
+    @property
+    def cursor(self) -> tuple[int, int]:
+        """Where this entry sits on the leaderboard, for getting the pages around it."""
+        return (self.elo, self.user_id)
+
+
+class Leaderboard:
+    """Keeps every ranked player sorted by elo, highest first.
+    Looking up the rank of a player is a binary search, and the pages are fetched
+    relative to the first or last entry of the page before, so they stay consistent
+    even if the elo of someone changes while you look through them.
+    """
+
+    def __init__(self, elos: Iterable[tuple[int, int]] = ()) -> None:
+        self.elos: dict[int, int] = dict(elos)
+        # Sorted by (-elo, user_id), so the highest elo comes first and ties stay in a fixed order.
+        self._keys = sorted((-elo, user_id) for user_id, elo in self.elos.items())
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.elos
+
+    def update(self, user_id: int, elo: int) -> None:
+        """Adds a player, or moves them to their new spot."""
+        self.remove(user_id)
+
+        self.elos[user_id] = elo
+        insort(self._keys, (-elo, user_id))
+
+    def remove(self, user_id: int) -> None:
+        if (elo := self.elos.pop(user_id, None)) is None:
+            return
+
+        del self._keys[bisect_left(self._keys, (-elo, user_id))]
+
+    def _rank_at(self, index: int) -> int:
+        # Everyone with a higher elo is in front of you.
+        return bisect_left(self._keys, (self._keys[index][0],)) + 1
+
+    def _entries(self, start: int, end: int) -> list[LeaderboardEntry]:
+        return [
+            LeaderboardEntry(self._rank_at(index), user_id, -negative_elo)
+            for index, (negative_elo, user_id) in enumerate(
+                self._keys[start:end], start=start
+            )
+        ]
+
+    def rank(self, user_id: int) -> Optional[int]:
+        """Gets you the rank of a player, or None if they are not on the leaderboard."""
+        if (elo := self.elos.get(user_id)) is None:
+            return None
+
+        return bisect_left(self._keys, (-elo,)) + 1
+
+    def top(self, limit: int = PAGE_SIZE) -> list[LeaderboardEntry]:
+        return self._entries(0, limit)
+
+    def page_after(
+        self, cursor: tuple[int, int], limit: int = PAGE_SIZE
+    ) -> list[LeaderboardEntry]:
+        """Gets you the players right behind the (elo, user_id) cursor."""
+        elo, user_id = cursor
+        start = bisect_right(self._keys, (-elo, user_id))
+        return self._entries(start, start + limit)
+
+    def page_before(
+        self, cursor: tuple[int, int], limit: int = PAGE_SIZE
+    ) -> list[LeaderboardEntry]:
+        """Gets you the players right in front of the (elo, user_id) cursor."""
+        elo, user_id = cursor
+        end = bisect_left(self._keys, (-elo, user_id))
+        return self._entries(max(end - limit, 0), end)
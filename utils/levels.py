@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Mapping, Optional
+
+from mee6_py_api.exceptions import HTTPRequestError
+
+from utils.tiers import TierTable
+
+# How many leaderboard pages we fetch at the same time.
+MAX_CONCURRENT_PAGES = 4
+
+# How many leaderboard pages we request per second, at most.
+PAGES_PER_SECOND = 5
+
+# Just in case the API keeps sending us full pages forever.
+MAX_PAGES = 1000
+
+# How often we try to get a page, before we give up on the whole leaderboard.
+PAGE_ATTEMPTS = 3
+# How long we wait after the first failed try, doubles after every try, in seconds.
+PAGE_RETRY_BACKOFF = 1.0
+
+# Errors where it makes sense to try again, the Mee6 API turns every failed request into a HTTPRequestError.
+PAGE_ERRORS = (HTTPRequestError, asyncio.TimeoutError)
+
+# Gets called with the page number and returns the page, like the get_leaderboard_page of the Mee6 API.
+GetPage = Callable[[int], Awaitable[dict[str, Any]]]
+
+
+class RateLimiter:
+    """Lets through a set amount of calls every period, the others have to wait their turn."""
+
+    def __init__(self, calls: int, period: float = 1.0) -> None:
+        self.calls = calls
+        self.period = period
+
+        # When the calls within the last period went through, oldest first.
+        self._sent: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            while self._sent and self._sent[0] <= now - self.period:
+                self._sent.popleft()
+
+            if len(self._sent) >= self.calls:
+                await asyncio.sleep(self._sent.popleft() + self.period - now)
+
+            self._sent.append(time.monotonic())
+
+
+async def fetch_levels(
+    get_page: GetPage,
+    min_level: int,
+    concurrency: int = MAX_CONCURRENT_PAGES,
+    per_second: int = PAGES_PER_SECOND,
+    max_pages: int = MAX_PAGES,
+) -> dict[int, int]:
+    """Gets you the level of every player at or above the minimum level.
+    The leaderboard is sorted by XP, so we can stop at the first player below the minimum level,
+    or at the first empty page. The pages get fetched a few at a time.
+    A failed page gets tried again a couple of times, if it still fails we raise the error,
+    since a leaderboard with a gap in it would look like everyone on that page left.
+    Pages past the point where we stop do not matter, so their errors do not either.
+    """
+    limiter = RateLimiter(per_second)
+
+    async def fetch(page: int) -> dict[str, Any]:
+        for attempt in range(1, PAGE_ATTEMPTS + 1):
+            await limiter.wait()
+            try:
+                return await get_page(page)
+            except PAGE_ERRORS:
+                if attempt == PAGE_ATTEMPTS:
+                    raise
+                await asyncio.sleep(PAGE_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+    levels = {}
+    first_page = 0
+
+    while first_page < max_pages:
+        last_page = min(first_page + concurrency, max_pages)
+        pages = await asyncio.gather(
+            *(fetch(i) for i in range(first_page, last_page)), return_exceptions=True
+        )
+        first_page = last_page
+
+        for page in pages:
+            if isinstance(page, BaseException):
+                raise page
+
+            if not page["players"]:
+                return levels
+
+            for player in page["players"]:
+                if player["level"] < min_level:
+                    return levels
+
+                levels[int(player["id"])] = player["level"]
+
+    return levels
+
+
+@dataclass
+class LevelChanges:
+    __slots__ = ("levels", "tier_changes", "repaired")
+
+    # The members whose level is different from the last sync.
+    levels: dict[int, int]
+    # The members out of those that are in a different tier now, so their role has to change.
+    tier_changes: set[int]
+    # The other members whose roles do not match their tier,
+    # like after leaving and joining again, or someone taking away their role by hand.
+    repaired: set[int]
+
+
+def diff_levels(
+    synced: dict[int, int],
+    levels: dict[int, int],
+    table: TierTable,
+    member_tiers: Mapping[int, Optional[int]],
+) -> LevelChanges:
+    """Compares the levels from the leaderboard with the ones of the last sync.
+    Takes the tier every member has a role for right now, None if they have none or more than one.
+    Players that are not members of the server are left out,
+    so they get their role once they join and the next sync comes around.
+    """
+    changed = {
+        user_id: level
+        for user_id, level in levels.items()
+        if synced.get(user_id) != level and user_id in member_tiers
+    }
+    tier_changes = {
+        user_id
+        for user_id, level in changed.items()
+        if table.tier(level) != table.tier(synced.get(user_id, 0))
+    }
+
+    # Below the first tier you just keep whatever role you have.
+    repaired = set()
+    for user_id, role_tier in member_tiers.items():
+        level = changed.get(user_id, synced.get(user_id))
+        if level is None or user_id in tier_changes:
+            continue
+
+        tier = table.tier(level)
+        if tier > 0 and role_tier != tier:
+            repaired.add(user_id)
+
+    return LevelChanges(changed, tier_changes, repaired)
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import utils.logger
+
+# How long a matchmaking ping stays active, in seconds.
+PING_TTL = 1800
+
+# How often the pings get saved to disk, if anything changed, in seconds.
+SNAPSHOT_INTERVAL = 30
+
+# The matchmaking types, and the file their snapshot gets saved in.
+PING_FILES = {
+    "singles": r"./json/singles.json",
+    "doubles": r"./json/doubles.json",
+    "funnies": r"./json/funnies.json",
+    "ranked": r"./json/rankedpings.json",
+}
+
+
+@dataclass
+class MatchmakingPing:
+    __slots__ = ("user_id", "channel_id", "timestamp", "rank_id")
+
+    user_id: int
+    channel_id: int
+    timestamp: float
+    # The elo role of the user, only used for ranked pings.
+    rank_id: Optional[int]
+
+
+def format_pings(pings: list[MatchmakingPing], timestamp: float) -> str:
+    """Turns the pings into the list we display in the matchmaking embeds."""
+    list_of_searches = []
+
+    for ping in pings:
+        minutes = round((timestamp - ping.timestamp) / 60)
+        rank = f"<@&{ping.rank_id}> | " if ping.rank_id else ""
+
+        list_of_searches.append(
+            f"{rank}<@!{ping.user_id}>, in <#{ping.channel_id}>, {minutes} minutes ago\n"
+        )
+
+    return "".join(list_of_searches) or "Looks like no one has pinged recently :("
+
+
+class PingStore:
+    """Keeps the active matchmaking pings in memory, one queue per type, oldest first.
+    Pings older than the TTL get dropped automatically,
+    and every once in a while the pings get saved to disk, so they survive a restart.
+    """
+
+    def __init__(
+        self,
+        files: dict[str, str] = None,
+        ttl: float = PING_TTL,
+        interval: float = SNAPSHOT_INTERVAL,
+    ) -> None:
+        self.files = files or PING_FILES
+        self.ttl = ttl
+        self.interval = interval
+
+        self.pings: dict[str, OrderedDict[int, MatchmakingPing]] = {
+            mm_type: OrderedDict() for mm_type in self.files
+        }
+        self._dirty = False
+
+        self._closing: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, mm_type: str, ping: MatchmakingPing) -> None:
+        """Saves a ping. If the user already had one, it gets replaced and moved to the end."""
+        pings = self.pings[mm_type]
+        pings.pop(ping.user_id, None)
+        pings[ping.user_id] = ping
+        self._dirty = True
+
+    def remove(self, mm_type: str, user_id: int, timestamp: float = None) -> bool:
+        """Deletes the ping of a user. Returns False if there was nothing to delete.
+        If a timestamp is given, only the ping from that time gets deleted, not a newer one.
+        """
+        ping = self.pings[mm_type].get(user_id)
+
+        if ping is None or (timestamp is not None and ping.timestamp != timestamp):
+            return False
+
+        del self.pings[mm_type][user_id]
+        self._dirty = True
+        return True
+
+    def purge(self, timestamp: float) -> int:
+        """Drops every ping older than the TTL. Returns the amount of pings dropped."""
+        cutoff = timestamp - self.ttl
+        purged = 0
+
+        for pings in self.pings.values():
+            # Oldest first, so we can stop at the first one that is still active.
+            while pings and next(iter(pings.values())).timestamp <= cutoff:
+                pings.popitem(last=False)
+                purged += 1
+
+        if purged:
+            self._dirty = True
+
+        return purged
+
+    def recent(self, mm_type: str, timestamp: float) -> list[MatchmakingPing]:
+        """Gets you the active pings of a type, newest first."""
+        self.purge(timestamp)
+        return list(reversed(self.pings[mm_type].values()))
+
+    def clear(self) -> None:
+        for pings in self.pings.values():
+            pings.clear()
+        self._dirty = True
+
+    def _to_json(self) -> dict[str, dict]:
+        return {
+            mm_type: {
+                str(ping.user_id): {
+                    "channel": ping.channel_id,
+                    "time": ping.timestamp,
+                    **({"rank": ping.rank_id} if ping.rank_id else {}),
+                }
+                for ping in pings.values()
+            }
+            for mm_type, pings in self.pings.items()
+        }
+
+    def _write_files(self, snapshot: dict[str, dict]) -> None:
+        for mm_type, data in snapshot.items():
+            filepath = self.files[mm_type]
+            temp_path = f"{filepath}.tmp"
+
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=4)
+
+            # Replacing the file is atomic, so a crash never leaves half a file behind.
+            os.replace(temp_path, filepath)
+
+    def _read_files(self) -> dict[str, dict]:
+        snapshot = {}
+
+        for mm_type, filepath in self.files.items():
+            try:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    snapshot[mm_type] = json.load(f)
+            except (OSError, ValueError) as exc:
+                logger = utils.logger.get_logger("bot.mm")
+                logger.warning(f"Could not restore the {mm_type} pings: {exc}")
+                snapshot[mm_type] = {}
+
+        return snapshot
+
+    async def snapshot(self) -> None:
+        """Saves the pings to disk, in another thread."""
+        self._dirty = False
+        await asyncio.to_thread(self._write_files, self._to_json())
+
+    async def restore(self, timestamp: float) -> None:
+        """Loads the pings from the last snapshot, without the ones that expired in the meantime."""
+        snapshot = await asyncio.to_thread(self._read_files)
+
+        for mm_type, data in snapshot.items():
+            pings = sorted(
+                (
+                    MatchmakingPing(
+                        int(user_id), ping["channel"], ping["time"], ping.get("rank")
+                    )
+                    for user_id, ping in data.items()
+                ),
+                key=lambda ping: ping.timestamp,
+            )
+            self.pings[mm_type] = OrderedDict((ping.user_id, ping) for ping in pings)
+
+        self.purge(timestamp)
+
+    async def start(self) -> None:
+        await self.restore(time.time())
+
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._snapshot_loop())
+
+    async def close(self) -> None:
+        """Stops the snapshot loop, which saves the pings one last time on its way out."""
+        if self._task is None:
+            return
+
+        self._closing.set()
+        await self._task
+        self._task = None
+
+    async def _snapshot_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._closing.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            closing = self._closing.is_set()
+            self.purge(time.time())
+
+            if self._dirty or closing:
+                try:
+                    await self.snapshot()
+                except OSError as exc:
+                    self._dirty = True
+                    logger = utils.logger.get_logger("bot.mm")
+                    logger.error(f"Could not save the matchmaking pings: {exc}")
+
+            if closing:
+                return
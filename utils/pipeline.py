@@ -0,0 +1,139 @@
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import discord
+
+import utils.logger
+
+
+@dataclass
+class ParsedMessage:
+    """A message, parsed once and then shared between all of the stages."""
+
+    __slots__ = (
+        "message",
+        "content",
+        "has_prefix",
+        "first_token",
+        "guild_id",
+        "channel_id",
+        "role_ids",
+    )
+
+    message: discord.Message
+    content: str
+    # If the message starts with the main prefix.
+    has_prefix: bool
+    # The first word of the message, without the prefix.
+    first_token: str
+    guild_id: Optional[int]
+    channel_id: int
+    # Empty in DMs.
+    role_ids: frozenset[int]
+
+    @classmethod
+    def parse(cls, message: discord.Message, prefix: str) -> "ParsedMessage":
+        content = message.content
+        has_prefix = content.startswith(prefix)
+
+        first_token = content.removeprefix(prefix) if has_prefix else content
+        first_token = first_token.split(" ", 1)[0]
+
+        role_ids = (
+            frozenset(role.id for role in message.author.roles)
+            if isinstance(message.author, discord.Member)
+            else frozenset()
+        )
+
+        return cls(
+            message,
+            content,
+            has_prefix,
+            first_token,
+            message.guild.id if message.guild else None,
+            message.channel.id,
+            role_ids,
+        )
+
+
+class StagePriority:
+    """Where the stages sit in the pipeline, lower runs first."""
+
+    FILTER = 0
+    MACROS = 50
+    COMMANDS = 100
+
+
+# A stage returns True if the message was handled and no other stage should see it.
+Stage = Callable[[ParsedMessage], Awaitable[bool]]
+
+
+@dataclass
+class StageStats:
+    __slots__ = (
+        "name",
+        "priority",
+        "callback",
+        "calls",
+        "stops",
+        "total_time",
+        "max_time",
+    )
+
+    name: str
+    priority: int
+    callback: Stage
+    calls: int
+    # How often this stage stopped the message from going any further.
+    stops: int
+    total_time: float
+    max_time: float
+
+    @property
+    def average_time(self) -> float:
+        return self.total_time / self.calls if self.calls else 0.0
+
+
+class MessagePipeline:
+    """Runs every message through the registered stages, lowest priority first.
+    The message only gets parsed once, and a stage can stop the ones after it,
+    so that for example a filtered message never reaches the macros.
+    """
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self.stages: list[StageStats] = []
+        self.messages = 0
+
+    def register(self, name: str, callback: Stage, priority: int) -> None:
+        """Adds a stage, or replaces the one with the same name."""
+        self.unregister(name)
+        self.stages.append(StageStats(name, priority, callback, 0, 0, 0.0, 0.0))
+        self.stages.sort(key=lambda stage: stage.priority)
+
+    def unregister(self, name: str) -> None:
+        self.stages = [stage for stage in self.stages if stage.name != name]
+
+    async def dispatch(self, message: discord.Message) -> None:
+        self.messages += 1
+        parsed = ParsedMessage.parse(message, self.prefix)
+
+        # Copying the list, since a stage could unregister itself while we are iterating.
+        for stage in tuple(self.stages):
+            start = time.perf_counter()
+            try:
+                stop = await stage.callback(parsed)
+            except Exception:
+                stop = False
+                logger = utils.logger.get_logger("bot.messages")
+                logger.exception(f"Message stage {stage.name} raised an exception.")
+            finally:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                stage.calls += 1
+                stage.total_time += elapsed_ms
+                stage.max_time = max(stage.max_time, elapsed_ms)
+
+            if stop:
+                stage.stops += 1
+                break
@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from typing import Collection, Iterable, Optional
+
+import discord
+
+from utils.ids import BGRoleIDs, TGLevelRoleIDs, TGMatchmakingRoleIDs, TGRoleIDs
+
+# The groups of roles that belong together, lowest tier first.
+ROLE_GROUPS = {
+    "elo": (
+        TGMatchmakingRoleIDs.ELO_800_ROLE,
+        TGMatchmakingRoleIDs.ELO_950_ROLE,
+        TGMatchmakingRoleIDs.ELO_1050_ROLE,
+        TGMatchmakingRoleIDs.ELO_1200_ROLE,
+        TGMatchmakingRoleIDs.ELO_1300_ROLE,
+        TGMatchmakingRoleIDs.ELO_MAX_ROLE,
+    ),
+    "level": (
+        TGLevelRoleIDs.RECRUIT_ROLE,
+        TGLevelRoleIDs.LEVEL_10_ROLE,
+        TGLevelRoleIDs.LEVEL_25_ROLE,
+        TGLevelRoleIDs.LEVEL_50_ROLE,
+        TGLevelRoleIDs.LEVEL_75_ROLE,
+        TGLevelRoleIDs.LEVEL_100_ROLE,
+    ),
+    "colour": TGRoleIDs.COLOUR_ROLES,
+}
+
+
+def collect_role_ids(*id_classes: type) -> frozenset[int]:
+    """Gets you every role ID of the classes in utils/ids.py, including the tuples of them."""
+    role_ids = set()
+
+    for id_class in id_classes:
+        for name, value in vars(id_class).items():
+            if name.endswith("_ROLE"):
+                role_ids.add(value)
+            elif name.endswith("_ROLES"):
+                role_ids.update(value)
+
+    return frozenset(role_ids)
+
+
+# Every role the bot looks up by ID.
+KNOWN_ROLE_IDS = collect_role_ids(
+    TGRoleIDs, TGLevelRoleIDs, TGMatchmakingRoleIDs, BGRoleIDs
+)
+
+
+@dataclass
+class GuildRoles:
+    __slots__ = ("roles", "groups")
+
+    # Only the roles the guild actually has are in here.
+    roles: dict[int, discord.Role]
+    # Roles that got deleted show up as None, so the tiers stay in place.
+    groups: dict[str, tuple[Optional[discord.Role], ...]]
+
+
+class RoleRegistry:
+    """Resolves the well-known role IDs to the role objects of a guild, once per guild.
+    The bot drops the roles of a guild whenever one of them gets created, updated or deleted,
+    and they get resolved again the next time someone asks for them.
+    """
+
+    def __init__(
+        self,
+        role_ids: Collection[int] = KNOWN_ROLE_IDS,
+        groups: dict[str, tuple[int, ...]] = None,
+    ) -> None:
+        self.group_ids = groups or ROLE_GROUPS
+        self.role_ids = frozenset(role_ids).union(*self.group_ids.values())
+
+        self.guilds: dict[int, GuildRoles] = {}
+
+    def resolve(self, guild: discord.Guild) -> GuildRoles:
+        """Gets you the known roles of a guild, resolving them if they are not cached yet."""
+        if (guild_roles := self.guilds.get(guild.id)) is not None:
+            return guild_roles
+
+        roles = {}
+        for role_id in self.role_ids:
+            if (role := guild.get_role(role_id)) is not None:
+                roles[role_id] = role
+
+        guild_roles = GuildRoles(
+            roles,
+            {
+                name: tuple(roles.get(role_id) for role_id in role_ids)
+                for name, role_ids in self.group_ids.items()
+            },
+        )
+        self.guilds[guild.id] = guild_roles
+        return guild_roles
+
+    def get(
+        self, guild: discord.Guild, role_id: Optional[int]
+    ) -> Optional[discord.Role]:
+        """Gets you a role of a guild by its ID, or None if the guild does not have it."""
+        if role_id not in self.role_ids:
+            return guild.get_role(role_id)
+
+        return self.resolve(guild).roles.get(role_id)
+
+    def group(
+        self, guild: discord.Guild, name: str
+    ) -> tuple[Optional[discord.Role], ...]:
+        """Gets you a group of roles from ROLE_GROUPS, lowest tier first."""
+        return self.resolve(guild).groups[name]
+
+    def invalidate(self, role: discord.Role) -> bool:
+        """Drops the cached roles of the guild, if the role is one we know about.
+        Returns True if the roles got dropped.
+        """
+        if role.id not in self.role_ids:
+            return False
+
+        return self.guilds.pop(role.guild.id, None) is not None
+
+
+def reconcile_roles(
+    current: Iterable[discord.abc.Snowflake],
+    add: Iterable[Optional[discord.abc.Snowflake]] = (),
+    remove: Collection[int] = (),
+) -> Optional[list[discord.abc.Snowflake]]:
+    """Works out the roles someone should have, given the roles they have right now.
+    First the role IDs in remove are taken away, then the roles in add are added.
+    Returns None if nothing would change.
+    """
+    current = list(current)
+    current_ids = {role.id for role in current}
+
+    target = [role for role in current if role.id not in remove]
+    target_ids = {role.id for role in target}
+
+    for role in add:
+        # Roles that got deleted show up as None, we just skip over them.
+        if role is not None and role.id not in target_ids:
+            target.append(role)
+            target_ids.add(role.id)
+
+    if target_ids == current_ids:
+        return None
+
+    return target
+
+
+async def update_roles(
+    member: discord.Member,
+    add: Iterable[Optional[discord.abc.Snowflake]] = (),
+    remove: Collection[int] = (),
+    reason: Optional[str] = None,
+) -> bool:
+    """Adds and removes roles of a member, only the ones that actually change.
+    Does not call the API at all if the member has the correct roles already.
+    Every role gets added or removed on its own instead of sending the whole list of roles,
+    since our cached roles could be outdated, and two updates at the same time would undo each other.
+    Returns True if the roles of the member changed.
+    """
+    # The @everyone role is not a real role you can add or remove.
+    current = [role for role in member.roles if not role.is_default()]
+
+    if (target := reconcile_roles(current, add, remove)) is None:
+        return False
+
+    current_ids = {role.id for role in current}
+    target_ids = {role.id for role in target}
+
+    removed = [role for role in current if role.id not in target_ids]
+    if removed:
+        await member.remove_roles(*removed, reason=reason)
+
+    added = [role for role in target if role.id not in current_ids]
+    if added:
+        await member.add_roles(*added, reason=reason)
+
+    return True
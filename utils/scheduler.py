@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+import utils.logger
+
+# Where the pending expirations get saved, so they survive a restart.
+EXPIRATIONS_PATH = r"./json/expirations.json"
+
+# How often the pending expirations get saved to disk, if anything changed, in seconds.
+SNAPSHOT_INTERVAL = 30
+
+# Gets called with the payloads of every expiration of its kind that is due.
+Handler = Callable[[list[Any]], Awaitable[None]]
+
+
+@dataclass
+class Expiration:
+    __slots__ = ("kind", "key", "when", "payload", "persistent", "seq")
+
+    kind: str
+    key: str
+    # The unix timestamp this expires at.
+    when: float
+    # If the expiration is persistent this has to be JSON serializable, since it gets saved to disk.
+    payload: Any
+    # Things that are saved somewhere else already, like reminders, dont need to be saved again.
+    persistent: bool
+    # Tells apart the heap entries of an expiration that got rescheduled.
+    seq: int
+
+
+class ExpiryScheduler:
+    """Fires callbacks once their time is up, using a single min-heap for everything.
+    The cogs register a handler for each kind of expiration,
+    and every expiration that is due at the same time gets handed over in one batch.
+    The pending expirations are saved to disk, and fire after a restart, too.
+    """
+
+    def __init__(
+        self, filepath: str = EXPIRATIONS_PATH, interval: float = SNAPSHOT_INTERVAL
+    ) -> None:
+        self.filepath = filepath
+        self.interval = interval
+
+        self.handlers: dict[str, Handler] = {}
+        self.entries: dict[tuple[str, str], Expiration] = {}
+        self._heap: list[tuple[float, int, str, str]] = []
+        self._seq = 0
+        # Expirations that were due before anyone registered a handler for them.
+        self._unhandled: dict[str, list[Expiration]] = {}
+        self._dirty = False
+
+        self._wakeup: Optional[asyncio.Event] = None
+        self._closing = False
+        self._task: Optional[asyncio.Task] = None
+
+    def register_handler(self, kind: str, handler: Handler) -> None:
+        self.handlers[kind] = handler
+
+        # Anything that expired while the handler was missing is due right away.
+        for expiration in self._unhandled.pop(kind, []):
+            self._push(expiration)
+
+    def unregister_handler(self, kind: str) -> None:
+        self.handlers.pop(kind, None)
+
+    def schedule(
+        self,
+        kind: str,
+        key: str,
+        when: float,
+        payload: Any = None,
+        persistent: bool = True,
+    ) -> None:
+        """Schedules an expiration. Scheduling the same kind and key again replaces the old one."""
+        self._seq += 1
+        self._push(Expiration(kind, key, when, payload, persistent, self._seq))
+        self._dirty = self._dirty or persistent
+
+    def cancel(self, kind: str, key: str) -> bool:
+        """Cancels an expiration. Returns False if there was nothing to cancel.
+        The heap entry stays behind, and gets skipped once it comes up.
+        """
+        if (expiration := self.entries.pop((kind, key), None)) is None:
+            return False
+
+        self._dirty = self._dirty or expiration.persistent
+        return True
+
+    def cancel_kind(self, kind: str) -> int:
+        """Cancels every expiration of a kind. Returns the amount of expirations cancelled."""
+        expirations = [e for e in self.entries.values() if e.kind == kind]
+        expirations.extend(self._unhandled.pop(kind, []))
+
+        for expiration in expirations:
+            self.entries.pop((kind, expiration.key), None)
+            self._dirty = self._dirty or expiration.persistent
+
+        return len(expirations)
+
+    def _push(self, expiration: Expiration) -> None:
+        self.entries[(expiration.kind, expiration.key)] = expiration
+        heapq.heappush(
+            self._heap,
+            (expiration.when, expiration.seq, expiration.kind, expiration.key),
+        )
+
+        # Only need to wake up the loop if this is the new earliest expiration.
+        if self._wakeup and self._heap[0][1] == expiration.seq:
+            self._wakeup.set()
+
+        # Rescheduled and cancelled entries pile up, so every once in a while we clean them up.
+        if len(self._heap) > 2 * len(self.entries) + 64:
+            self._heap = [
+                (entry.when, entry.seq, entry.kind, entry.key)
+                for entry in self.entries.values()
+            ]
+            heapq.heapify(self._heap)
+
+    def pop_due(self, timestamp: float) -> dict[str, list[Expiration]]:
+        """Takes every expiration that is due off the heap, grouped by kind."""
+        due: dict[str, list[Expiration]] = {}
+
+        while self._heap and self._heap[0][0] <= timestamp:
+            _, seq, kind, key = heapq.heappop(self._heap)
+            expiration = self.entries.get((kind, key))
+
+            # Cancelled or rescheduled in the meantime.
+            if expiration is None or expiration.seq != seq:
+                continue
+
+            del self.entries[(kind, key)]
+            self._dirty = self._dirty or expiration.persistent
+            due.setdefault(kind, []).append(expiration)
+
+        return due
+
+    async def fire_due(self, timestamp: float) -> int:
+        """Hands every expiration that is due over to its handler.
+        Returns the amount of expirations that fired.
+        """
+        fired = 0
+
+        for kind, expirations in self.pop_due(timestamp).items():
+            if (handler := self.handlers.get(kind)) is None:
+                self._unhandled.setdefault(kind, []).extend(expirations)
+                continue
+
+            fired += len(expirations)
+            try:
+                await handler([expiration.payload for expiration in expirations])
+            except Exception:
+                logger = utils.logger.get_logger("bot.scheduler")
+                logger.exception(
+                    f"Handler for {len(expirations)} {kind} expiration(s) raised an exception."
+                )
+
+        return fired
+
+    def _to_json(self) -> list[dict]:
+        return [
+            {
+                "kind": expiration.kind,
+                "key": expiration.key,
+                "when": expiration.when,
+                "payload": expiration.payload,
+            }
+            for expiration in (
+                *self.entries.values(),
+                *(e for entries in self._unhandled.values() for e in entries),
+            )
+            if expiration.persistent
+        ]
+
+    def _write_file(self, snapshot: list[dict]) -> None:
+        temp_path = f"{self.filepath}.tmp"
+
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, indent=4)
+
+        # Replacing the file is atomic, so a crash never leaves half a file behind.
+        os.replace(temp_path, self.filepath)
+
+    def _read_file(self) -> list[dict]:
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as exc:
+            logger = utils.logger.get_logger("bot.scheduler")
+            logger.warning(f"Could not restore the pending expirations: {exc}")
+            return []
+
+    async def snapshot(self) -> None:
+        """Saves the pending expirations to disk, in another thread."""
+        self._dirty = False
+        await asyncio.to_thread(self._write_file, self._to_json())
+
+    async def restore(self) -> None:
+        for entry in await asyncio.to_thread(self._read_file):
+            self._seq += 1
+            self._push(
+                Expiration(
+                    entry["kind"],
+                    entry["key"],
+                    entry["when"],
+                    entry["payload"],
+                    True,
+                    self._seq,
+                )
+            )
+
+    async def start(self) -> None:
+        await self.restore()
+
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stops the loop, which saves the pending expirations one last time on its way out."""
+        if self._task is None:
+            return
+
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        last_snapshot = time.monotonic()
+
+        while True:
+            # Sleeps until the next expiration is due, or until the next snapshot if something changed.
+            # With nothing to do, this just waits until something gets scheduled.
+            timeout = self.interval if self._dirty else None
+            if self._heap:
+                due_in = max(self._heap[0][0] - time.time(), 0)
+                timeout = due_in if timeout is None else min(timeout, due_in)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            if not self._closing:
+                await self.fire_due(time.time())
+
+            if self._closing or (
+                self._dirty and time.monotonic() - last_snapshot >= self.interval
+            ):
+                try:
+                    await self.snapshot()
+                except OSError as exc:
+                    self._dirty = True
+                    logger = utils.logger.get_logger("bot.scheduler")
+                    logger.error(f"Could not save the pending expirations: {exc}")
+                last_snapshot = time.monotonic()
+
+            if self._closing:
+                return
@@ -1,9 +1,328 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional, Union
+
 import aiosqlite
 
 import utils.logger
+from utils.db.stats import (
+    SLOW_QUERY_MS,
+    InstrumentedConnection,
+    QueryStats,
+    current_origin,
+    get_origin,
+)
+
+DATABASE_PATH = "./db/database.db"
+
+# Applied to every connection we open.
+# WAL lets the readers keep going while the writer commits,
+# and with WAL, synchronous = NORMAL is still safe against corruption.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA mmap_size = 134217728",
+    "PRAGMA busy_timeout = 5000",
+)
+
+
+class WriteQueue:
+    """A write-behind queue that groups many small writes into a single transaction.
+    Statements get collected for up to `interval` seconds, or until `max_statements` are waiting,
+    and are then committed together, which means one fsync per batch instead of one per statement.
+
+    Every submitted statement gets a future which resolves once the batch it was in is committed,
+    so callers that need their write to be durable before moving on can simply await it.
+    A failing statement only fails its own future, the rest of the batch still gets committed.
+    If the commit fails, the whole batch gets rolled back and every future in it fails.
+    """
+
+    def __init__(
+        self, database: "Database", interval: float = 0.05, max_statements: int = 200
+    ) -> None:
+        self.database = database
+        self.interval = interval
+        self.max_statements = max_statements
+
+        self._pending: list[tuple[str, Union[dict, tuple], asyncio.Future, str]] = []
+        self._has_pending = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        # For the throughput stats.
+        self.started_at = time.monotonic()
+        self.statements = 0
+        self.failed_statements = 0
+        self.transactions = 0
+        self.flush_time = 0.0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self.started_at = time.monotonic()
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """Stops the background task and writes everything that is still waiting."""
+        if self._task is not None:
+            # Not cancelling the task, a batch it is in the middle of writing would get lost.
+            # Instead we wake it up, and it stops after its next flush.
+            self._closing = True
+            self._has_pending.set()
+            self._batch_full.set()
+            await self._task
+            self._task = None
+
+        await self.flush()
+
+    def submit(
+        self, sql: str, parameters: Union[dict, tuple] = ()
+    ) -> "asyncio.Future[None]":
+        """Queues up a statement and returns a future that resolves once it is committed.
+        Statements submitted together end up in the same transaction, in order.
+        """
+        future = asyncio.get_running_loop().create_future()
+        # The flush happens in another task, so we remember where the statement came from now.
+        self._pending.append((sql, parameters, future, get_origin()))
+
+        self._has_pending.set()
+        if len(self._pending) >= self.max_statements:
+            self._batch_full.set()
+
+        return future
+
+    async def execute(self, sql: str, parameters: Union[dict, tuple] = ()) -> None:
+        """Queues up a statement and waits until it is committed."""
+        await self.submit(sql, parameters)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._has_pending.wait()
+
+            # Gives other writes a short window to join this batch.
+            try:
+                await asyncio.wait_for(self._batch_full.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            await self.flush()
+
+            if self._closing:
+                return
+
+    async def flush(self) -> None:
+        """Commits every statement that is currently waiting, in a single transaction."""
+        async with self._flush_lock:
+            batch = self._pending
+            self._pending = []
+            self._has_pending.clear()
+            self._batch_full.clear()
+
+            if not batch:
+                return
+
+            start = time.perf_counter()
+            done = []
+
+            try:
+                async with self.database.write() as db:
+                    for sql, parameters, future, origin in batch:
+                        token = current_origin.set(origin)
+                        # SQLite only undoes the failing statement itself,
+                        # the transaction stays open for the others.
+                        try:
+                            await db.execute(sql, parameters)
+                            done.append(future)
+                        except Exception as exc:
+                            self.failed_statements += 1
+                            if not future.done():
+                                # The traceback points into this task, which keeps running,
+                                # so the caller gets the error without it.
+                                future.set_exception(exc.with_traceback(None))
+                        finally:
+                            current_origin.reset(token)
+            except Exception as exc:
+                # The commit itself failed and got rolled back, so nothing from this batch made it.
+                logger = utils.logger.get_logger("bot.db")
+                logger.exception("Could not commit a batch of queued writes!")
+
+                exc = exc.with_traceback(None)
+                for future in done:
+                    if not future.done():
+                        future.set_exception(exc)
+                self.failed_statements += len(done)
+                return
+
+            self.flush_time += time.perf_counter() - start
+            self.statements += len(done)
+            self.transactions += 1
+
+            for future in done:
+                if not future.done():
+                    future.set_result(None)
 
+    def stats(self) -> dict[str, float]:
+        """Gets you the throughput of the queue since the bot started."""
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
 
-async def setup_db(filepath: str = "./db/database.db") -> None:
+        return {
+            "statements": self.statements,
+            "failed_statements": self.failed_statements,
+            "transactions": self.transactions,
+            "pending": len(self._pending),
+            "statements_per_transaction": self.statements / max(self.transactions, 1),
+            "statements_per_second": self.statements / uptime,
+            "average_flush_ms": self.flush_time / max(self.transactions, 1) * 1000,
+        }
+
+
+class Database:
+    """The bot-wide database service.
+    Holds long-lived connections to the database, instead of opening a new one for every query.
+
+    There is a single writer connection, guarded by a lock since SQLite only allows one writer at a time,
+    and a small pool of read-only connections which can run alongside the writer thanks to WAL mode.
+    """
+
+    def __init__(
+        self,
+        filepath: str = DATABASE_PATH,
+        readers: int = 3,
+        slow_query_ms: float = SLOW_QUERY_MS,
+    ) -> None:
+        self.filepath = filepath
+        self.reader_count = readers
+
+        # Every statement that goes through our connections gets timed here.
+        self.stats = QueryStats(slow_query_ms)
+
+        self._writer: InstrumentedConnection = None
+        self._write_lock: asyncio.Lock = None
+        self._readers: asyncio.Queue = None
+        self._reader_connections: list[InstrumentedConnection] = []
+
+        # For the high-frequency writes that do not need their own transaction.
+        self.queue: WriteQueue = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._writer is not None
+
+    async def _pragma(
+        self,
+        connection: Union[aiosqlite.Connection, InstrumentedConnection],
+        pragma: str,
+    ) -> None:
+        # Some pragmas return a row, the cursor needs to be closed
+        # or else the statement keeps holding a lock on the database.
+        async with connection.execute(pragma):
+            pass
+
+    async def _connect(self, read_only: bool = False) -> InstrumentedConnection:
+        """Opens a new connection with our pragmas applied."""
+        connection = await aiosqlite.connect(self.filepath)
+
+        for pragma in CONNECTION_PRAGMAS:
+            await self._pragma(connection, pragma)
+
+        if read_only:
+            await self._pragma(connection, "PRAGMA query_only = ON")
+
+        return InstrumentedConnection(connection, self.stats)
+
+    async def start(self) -> None:
+        """Opens the writer and the reader connections.
+        Needs to be called before the first query.
+        """
+        if self.is_running:
+            return
+
+        # The asyncio primitives need to be created inside of the running event loop.
+        self._write_lock = asyncio.Lock()
+        self._writer = await self._connect()
+        # Persistent setting, only needs to be set once but it does not hurt to do it on every startup.
+        await self._pragma(self._writer, "PRAGMA journal_mode = WAL")
+
+        self._readers = asyncio.Queue()
+        for _ in range(self.reader_count):
+            connection = await self._connect(read_only=True)
+            self._reader_connections.append(connection)
+            self._readers.put_nowait(connection)
+
+        self.queue = WriteQueue(self)
+        self.queue.start()
+
+        logger = utils.logger.get_logger("bot.db")
+        logger.info(
+            f"Database connections opened: 1 writer, {self.reader_count} reader(s)."
+        )
+
+    async def close(self) -> None:
+        """Closes every connection.
+        Waits for the current write to finish, and checkpoints the WAL file on the way out.
+        """
+        if not self.is_running:
+            return
+
+        # Everything still waiting in the queue gets written first.
+        await self.queue.close()
+
+        async with self._write_lock:
+            for connection in self._reader_connections:
+                await connection.close()
+
+            await self._pragma(self._writer, "PRAGMA optimize")
+            await self._pragma(self._writer, "PRAGMA wal_checkpoint(TRUNCATE)")
+            await self._writer.close()
+
+            self._reader_connections = []
+            self._readers = None
+            self._writer = None
+
+        stats = self.queue.stats()
+        logger = utils.logger.get_logger("bot.db")
+        logger.info(
+            f"Database connections closed. Queued writes: {stats['statements']} statement(s) "
+            f"in {stats['transactions']} transaction(s), {stats['failed_statements']} failed."
+        )
+
+    @asynccontextmanager
+    async def read(self) -> AsyncIterator[InstrumentedConnection]:
+        """Borrows a read-only connection from the pool.
+        Only use this for SELECT statements, writing through it raises an error.
+        """
+        connection = await self._readers.get()
+        try:
+            yield connection
+        finally:
+            self._readers.put_nowait(connection)
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[InstrumentedConnection]:
+        """Gets exclusive access to the writer connection.
+        Everything in the block is committed when it exits, or rolled back if an error occurs.
+        """
+        async with self._write_lock:
+            try:
+                yield self._writer
+            except BaseException:
+                await self._writer.rollback()
+                raise
+            else:
+                if self._writer.in_transaction:
+                    try:
+                        await self._writer.commit()
+                    except BaseException:
+                        # Otherwise the next one to write would carry on in our failed transaction.
+                        await self._writer.rollback()
+                        raise
+
+
+async def setup_db(filepath: str = DATABASE_PATH) -> None:
     """Sets up the database with the required tables.
     Only really needed for first-time setup, or when we add a table.
     """
@@ -115,5 +434,265 @@ async def setup_db(filepath: str = "./db/database.db") -> None:
 
         await db.commit()
 
+        await migrate_db(db)
+
         logger = utils.logger.get_logger("bot.db")
         logger.info("Database setup complete!")
+
+
+def rebuild_table(table: str, schema: str, key: str, columns: str = "*") -> list[str]:
+    """Gets you the statements to rewrite an existing table in place with a new schema.
+    SQLite cannot add keys to an existing table, so we copy everything over into a new one.
+    The columns need to stay in the same order. To drop columns, pass in the ones you want to keep.
+    Of the rows that share the same key only the newest one is kept,
+    how many got dropped is noted down in the dropped_rows table, migrate_db logs them.
+    """
+    return [
+        f"""DROP TABLE IF EXISTS {table}_new""",
+        f"""CREATE TABLE {table}_new({schema})""",
+        # Anything else that clashes with the new schema makes the migration fail, instead of getting lost.
+        f"""INSERT INTO {table}_new SELECT {columns} FROM {table}
+        WHERE rowid IN (SELECT MAX(rowid) FROM {table} GROUP BY {key})""",
+        f"""INSERT INTO temp.dropped_rows
+        SELECT '{table}', (SELECT COUNT(*) FROM {table}) - (SELECT COUNT(*) FROM {table}_new)""",
+        f"""DROP TABLE {table}""",
+        f"""ALTER TABLE {table}_new RENAME TO {table}""",
+    ]
+
+
+# The ordered list of schema migrations, the position in the list is the schema version.
+# Never change or reorder a migration that has already shipped, always append a new one instead.
+# The current version is stored in PRAGMA user_version.
+MIGRATIONS: list[tuple[str, list[str]]] = [
+    (
+        "Add primary keys, unique constraints and lookup indexes",
+        [
+            *rebuild_table(
+                "warnings",
+                """user_id INTEGER,
+                warn_id INTEGER,
+                mod_id INTEGER,
+                reason TEXT,
+                timestamp INTEGER,
+                PRIMARY KEY (user_id, warn_id)""",
+                "user_id, warn_id",
+            ),
+            """CREATE INDEX IF NOT EXISTS warnings_user_timestamp ON warnings(user_id, timestamp)""",
+            """CREATE INDEX IF NOT EXISTS warnings_timestamp ON warnings(timestamp)""",
+            *rebuild_table(
+                "starboardmessages",
+                """original_id INTEGER PRIMARY KEY,
+                starboard_id INTEGER""",
+                "original_id",
+            ),
+            *rebuild_table(
+                "reminder",
+                """user_id INTEGER,
+                reminder_id INTEGER,
+                channel_id INTEGER,
+                date INTEGER,
+                read_time TEXT,
+                message TEXT,
+                PRIMARY KEY (user_id, reminder_id)""",
+                "user_id, reminder_id",
+            ),
+            """CREATE INDEX IF NOT EXISTS reminder_date ON reminder(date)""",
+            *rebuild_table(
+                "reactrole",
+                """message_id INTEGER,
+                exclusive INTEGER,
+                rolereq TEXT,
+                emoji TEXT,
+                role INTEGER,
+                UNIQUE (message_id, emoji, role)""",
+                "message_id, emoji, role",
+            ),
+            *rebuild_table(
+                "ranking",
+                """user_id INTEGER PRIMARY KEY,
+                wins INTEGER,
+                losses INTEGER,
+                elo INTEGER,
+                matches TEXT""",
+                "user_id",
+            ),
+            """CREATE INDEX IF NOT EXISTS ranking_elo ON ranking(elo)""",
+            *rebuild_table(
+                "profile",
+                """user_id INTEGER PRIMARY KEY,
+                tag TEXT,
+                region TEXT,
+                mains TEXT,
+                secondaries TEXT,
+                pockets TEXT,
+                note TEXT,
+                colour INTEGER""",
+                "user_id",
+            ),
+            *rebuild_table(
+                "muted",
+                """user_id INTEGER PRIMARY KEY,
+                muted INTEGER""",
+                "user_id",
+            ),
+            *rebuild_table(
+                "macros",
+                """name TEXT PRIMARY KEY,
+                payload TEXT,
+                uses INTEGER,
+                author INTEGER""",
+                "name",
+            ),
+            *rebuild_table(
+                "userbadges",
+                """user_id INTEGER PRIMARY KEY,
+                badges TEXT""",
+                "user_id",
+            ),
+            *rebuild_table(
+                "badgeinfo",
+                """badge TEXT PRIMARY KEY,
+                info TEXT""",
+                "badge",
+            ),
+            """CREATE INDEX IF NOT EXISTS usernames_user_timestamp ON usernames(user_id, timestamp)""",
+            """CREATE INDEX IF NOT EXISTS nicknames_user_timestamp ON nicknames(user_id, timestamp)""",
+            *rebuild_table(
+                "notes",
+                """note_id INTEGER,
+                user_id INTEGER,
+                timestamp INTEGER,
+                mod_id INTEGER,
+                note TEXT,
+                PRIMARY KEY (user_id, note_id)""",
+                "user_id, note_id",
+            ),
+        ],
+    ),
+    (
+        "Move the ranked match history into its own table",
+        [
+            """CREATE TABLE ranked_matches(
+                match_id INTEGER PRIMARY KEY,
+                winner_id INTEGER,
+                loser_id INTEGER,
+                winner_elo_before INTEGER,
+                winner_elo_after INTEGER,
+                loser_elo_before INTEGER,
+                loser_elo_after INTEGER,
+                timestamp INTEGER)""",
+            """CREATE INDEX ranked_matches_winner ON ranked_matches(winner_id, match_id)""",
+            """CREATE INDEX ranked_matches_loser ON ranked_matches(loser_id, match_id)""",
+            # The old history only knows if you won or lost, not against whom or when,
+            # so it cannot be turned into matches. Instead we remember where everyone stood
+            # before the first full match, and the replay of the match history starts from there.
+            # The old W/L string of every player is still in order, oldest first.
+            """CREATE TABLE ranked_baseline(
+                user_id INTEGER PRIMARY KEY,
+                wins INTEGER,
+                losses INTEGER,
+                elo INTEGER,
+                matches TEXT)""",
+            """INSERT INTO ranked_baseline SELECT user_id, wins, losses, elo, matches FROM ranking""",
+            *rebuild_table(
+                "ranking",
+                """user_id INTEGER PRIMARY KEY,
+                wins INTEGER,
+                losses INTEGER,
+                elo INTEGER""",
+                "user_id",
+                "user_id, wins, losses, elo",
+            ),
+            """CREATE INDEX IF NOT EXISTS ranking_elo ON ranking(elo)""",
+        ],
+    ),
+    (
+        "Remember the Mee6 levels of the last level role sync",
+        [
+            """CREATE TABLE levels(
+                user_id INTEGER PRIMARY KEY,
+                level INTEGER)""",
+        ],
+    ),
+    (
+        "Index the characters of every profile",
+        [
+            # The slot is 0 for mains, 1 for secondaries and 2 for pockets.
+            """CREATE TABLE profile_characters(
+                user_id INTEGER,
+                character TEXT,
+                slot INTEGER,
+                position INTEGER,
+                PRIMARY KEY (user_id, slot, position))""",
+            """CREATE INDEX profile_characters_character ON profile_characters(character, slot)""",
+            # The characters in the profile are emojis separated by spaces, every one of them gets its own row.
+            """INSERT INTO profile_characters (user_id, character, slot, position)
+            WITH RECURSIVE split(user_id, slot, position, character, rest) AS (
+                SELECT user_id, 0, -1, '', mains || ' ' FROM profile WHERE mains != ''
+                UNION ALL
+                SELECT user_id, 1, -1, '', secondaries || ' ' FROM profile WHERE secondaries != ''
+                UNION ALL
+                SELECT user_id, 2, -1, '', pockets || ' ' FROM profile WHERE pockets != ''
+                UNION ALL
+                SELECT user_id, slot, position + 1,
+                    substr(rest, 1, instr(rest, ' ') - 1), substr(rest, instr(rest, ' ') + 1)
+                FROM split WHERE rest != ''
+            )
+            SELECT user_id, character, slot, position FROM split WHERE character != ''""",
+        ],
+    ),
+]
+
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    """Gets you the schema version the database is currently at."""
+    async with db.execute("""PRAGMA user_version""") as cursor:
+        (version,) = await cursor.fetchone()
+
+    return version
+
+
+async def migrate_db(db: aiosqlite.Connection) -> int:
+    """Brings the database up to the latest schema version.
+    Every migration runs in its own transaction together with the version bump,
+    so a failed migration leaves the database untouched and gets retried on the next startup.
+    Returns the new schema version.
+    """
+    logger = utils.logger.get_logger("bot.db")
+
+    version = await get_schema_version(db)
+
+    # Filled in by rebuild_table, so we can tell how many duplicates got dropped.
+    await db.execute(
+        """CREATE TEMP TABLE IF NOT EXISTS dropped_rows(table_name TEXT, dropped INTEGER)"""
+    )
+
+    for new_version, (description, statements) in enumerate(
+        MIGRATIONS[version:], start=version + 1
+    ):
+        try:
+            await db.execute("""BEGIN IMMEDIATE""")
+            for statement in statements:
+                await db.execute(statement)
+            dropped = await db.execute_fetchall(
+                """SELECT table_name, dropped FROM temp.dropped_rows WHERE dropped > 0"""
+            )
+            await db.execute("""DELETE FROM temp.dropped_rows""")
+            # Pragmas do not support parameters, this is always an integer though.
+            await db.execute(f"""PRAGMA user_version = {new_version}""")
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception(f"Database migration #{new_version} failed!")
+            raise
+
+        for table, count in dropped:
+            logger.warning(
+                f"Migration #{new_version} dropped {count} duplicate row(s) from the {table} table."
+            )
+
+        logger.info(f"Applied database migration #{new_version}: {description}")
+        version = new_version
+
+    await db.execute("""DROP TABLE temp.dropped_rows""")
+    return version
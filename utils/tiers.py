@@ -0,0 +1,119 @@
+import json
+from bisect import bisect_right
+from typing import Optional, Sequence
+
+import discord
+
+from utils.roles import RoleRegistry
+
+# The lowest score of every tier but the first one, for each tiered role group.
+TIERS_PATH = r"./json/tiers.json"
+
+
+class TierTable:
+    """Maps a score to a tier, given the lowest score of every tier but the first one.
+    With k thresholds there are k + 1 tiers, tier 0 is everything below the first threshold.
+    """
+
+    def __init__(self, thresholds: Sequence[int]) -> None:
+        self.thresholds = tuple(thresholds)
+
+        if any(a >= b for a, b in zip(self.thresholds, self.thresholds[1:])):
+            raise ValueError("The thresholds need to be in ascending order.")
+
+        # Every tier together with the ones right below and above it, lowest first.
+        self.adjacent_tiers = tuple(
+            tuple(range(max(tier - 1, 0), min(tier + 2, len(self))))
+            for tier in range(len(self))
+        )
+
+    def __len__(self) -> int:
+        return len(self.thresholds) + 1
+
+    def tier(self, score: float) -> int:
+        """Gets you the tier of a score. Hitting a threshold exactly gets you into the tier above."""
+        return bisect_right(self.thresholds, score)
+
+    def adjacent(self, score: float) -> tuple[int, ...]:
+        """Gets you the tier of a score, as well as the ones below and above it."""
+        return self.adjacent_tiers[self.tier(score)]
+
+
+def load_tier_tables(filepath: str = TIERS_PATH) -> dict[str, TierTable]:
+    """Reads the thresholds of every tiered role group."""
+    with open(filepath, "r", encoding="utf-8") as f:
+        return {
+            name: TierTable(thresholds) for name, thresholds in json.load(f).items()
+        }
+
+
+class TieredRoles:
+    """Hands out the roles of a group in the role registry, one role per tier.
+    The roles of every tier and the ones next to it are worked out once per guild,
+    and again after the registry resolved the roles of the guild anew.
+    """
+
+    def __init__(self, registry: RoleRegistry, group: str, table: TierTable) -> None:
+        if len(registry.group_ids[group]) != len(table):
+            raise ValueError(
+                f"The {group} roles need exactly one role for each of the {len(table)} tiers."
+            )
+
+        self.registry = registry
+        self.group = group
+        self.table = table
+
+        # The tier of every role of the group, and their IDs for removing them all at once.
+        self.role_tiers = {
+            role_id: tier for tier, role_id in enumerate(registry.group_ids[group])
+        }
+        self.role_ids = frozenset(self.role_tiers)
+
+        # The roles we worked out the adjacent roles with, and those adjacent roles for each tier.
+        self._adjacent: dict[
+            int,
+            tuple[
+                tuple[Optional[discord.Role], ...], tuple[tuple[discord.Role, ...], ...]
+            ],
+        ] = {}
+
+    def roles(self, guild: discord.Guild) -> tuple[Optional[discord.Role], ...]:
+        """Gets you the role of every tier, lowest first. Missing roles are None."""
+        return self.registry.group(guild, self.group)
+
+    def role(self, guild: discord.Guild, score: float) -> Optional[discord.Role]:
+        """Gets you the role that belongs to a score."""
+        return self.roles(guild)[self.table.tier(score)]
+
+    def member_tier(self, member: discord.Member) -> Optional[int]:
+        """Gets you the tier of the role a member has.
+        None if they have none of the roles, or more than one of them.
+        """
+        tiers = {
+            self.role_tiers[role.id]
+            for role in member.roles
+            if role.id in self.role_tiers
+        }
+        return tiers.pop() if len(tiers) == 1 else None
+
+    def adjacent_roles(
+        self, guild: discord.Guild, score: float
+    ) -> tuple[discord.Role, ...]:
+        """Gets you the role that belongs to a score, as well as the ones below and above it.
+        Roles the guild does not have are left out.
+        """
+        roles = self.roles(guild)
+        cached = self._adjacent.get(guild.id)
+
+        # The registry hands out new tuples once the roles of the guild changed.
+        if cached is None or cached[0] is not roles:
+            cached = (
+                roles,
+                tuple(
+                    tuple(roles[tier] for tier in tiers if roles[tier] is not None)
+                    for tiers in self.table.adjacent_tiers
+                ),
+            )
+            self._adjacent[guild.id] = cached
+
+        return cached[1][self.table.tier(score)]
@@ -0,0 +1,113 @@
+import string
+from typing import Iterable, Optional
+
+BADWORDS_PATH = r"./files/badwords.txt"
+
+# These can sit between the letters of a word and it still counts as the word.
+SEPARATORS = "()"
+
+_STRIP_SEPARATORS = str.maketrans("", "", SEPARATORS)
+
+# A word directly next to one of these is part of a longer word, so it does not count.
+EXCLUDED = frozenset(string.ascii_letters + string.digits)
+
+
+class WordFilter:
+    """Finds blacklisted words in messages.
+    The words get compiled into an Aho-Corasick automaton once,
+    so a message only needs to be scanned once, no matter how many words there are.
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+        self.words: list[str] = []
+        # The trie, one dict of character -> next state per state.
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # The words ending at each state, including the ones reached through the fail links.
+        self._output: list[tuple[str, ...]] = [()]
+
+        for word in dict.fromkeys(words):
+            if word:
+                self._add_word(word)
+
+        self._build_fail_links()
+
+    @classmethod
+    def from_file(cls, filepath: str = BADWORDS_PATH) -> "WordFilter":
+        """Reads the words from a file, separated by whitespace."""
+        with open(filepath, encoding="utf-8") as file:
+            return cls(file.read().split())
+
+    def _add_word(self, word: str) -> None:
+        self.words.append(word)
+        state = 0
+
+        for char in word.lower():
+            if (next_state := self._goto[state].get(char)) is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+
+        self._output[state] += (word,)
+
+    def _build_fail_links(self) -> None:
+        # Breadth first, so the fail state of the parent is always done already.
+        queue = list(self._goto[0].values())
+
+        for state in queue:
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+
+                fail = self._fail[state]
+                while char not in self._goto[fail] and fail != 0:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+
+                self._fail[next_state] = fail
+                self._output[next_state] += self._output[fail]
+
+    def _scan(self, text: str) -> Iterable[tuple[int, str]]:
+        """Yields the end index and the word for every occurrence, overlapping ones included."""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+
+        for i, char in enumerate(text):
+            while char not in goto[state] and state != 0:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for word in output[state]:
+                yield i, word
+
+    def match(self, content: str) -> Optional[str]:
+        """Gets you the first blacklisted word in the message, in the order of the word list.
+
+        A word counts even if separators are sprinkled in between its letters,
+        but it does not count if it is glued to a letter or a digit anywhere in the message.
+        """
+        content = content.lower()
+
+        # Separators are skipped, so this pass finds the words even if they are "h(i)dden".
+        stripped = content.translate(_STRIP_SEPARATORS)
+        found = {word for _, word in self._scan(stripped)}
+
+        if not found:
+            return None
+
+        # Almost no message gets this far, so a second pass just for the exclusions is fine.
+        for end, word in self._scan(content):
+            if word not in found:
+                continue
+
+            start = end - len(word) + 1
+            if (start > 0 and content[start - 1] in EXCLUDED) or (
+                end + 1 < len(content) and content[end + 1] in EXCLUDED
+            ):
+                found.discard(word)
+
+        return next((word for word in self.words if word in found), None)